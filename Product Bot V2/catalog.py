@@ -0,0 +1,75 @@
+# catalog.py — products.csv model, importable without the bot's API clients
+import os, csv, re, json, hashlib, urllib.parse
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+ROOT                     = os.path.dirname(os.path.abspath(__file__))
+ENRICHED_CSV             = os.path.join(ROOT, "products.enriched.csv")   # written by enrich_catalog.py
+PRODUCT_CSV              = os.getenv("PRODUCT_CSV") or os.path.join(ROOT, "products.csv")
+ENRICHED_COLS            = ("asin", "image_path", "price_anchor")
+IMAGES_DIR               = os.path.join(ROOT, "images")
+
+AFFILIATE_TAG            = os.getenv("AFFILIATE_TAG", "futurebutnotn-20")
+TRACKING_IDS_BY_MODE     = json.loads(os.getenv("TRACKING_IDS_BY_MODE", "{}"))  # e.g. {"spiky":"futurebutnotn-20","confession":"futurebutnotn-21",...}
+
+ASIN_RE                  = re.compile(r"\b[A-Z0-9]{10}\b")
+
+@dataclass
+class Product:
+    title: str
+    asin: Optional[str]
+    category: Optional[str]
+    keywords: List[str]
+    image_path: Optional[str]
+    benefits: List[str]
+    price_anchor: Optional[str]
+
+def product_key(title: str) -> str:
+    """Stable product id: hash of the case- and whitespace-normalised title."""
+    return hashlib.sha1(" ".join(title.lower().split()).encode()).hexdigest()[:16]
+
+def load_enrichment(path: Optional[str] = ENRICHED_CSV) -> Dict[str, Dict[str, str]]:
+    """{product_key: non-empty enriched columns}; {} before enrich_catalog.py has run."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {product_key(r.get("title") or ""):
+                    {c: r[c].strip() for c in ENRICHED_COLS if (r.get(c) or "").strip()}
+                for r in csv.DictReader(f)}
+
+def parse_products(path: str, enriched: Optional[str] = ENRICHED_CSV) -> List[Product]:
+    """Rows of `path`; empty asin/image_path/price_anchor cells are filled from
+    the enrichment output by product id. products.csv stays the source of
+    truth: edits to it apply at once, and removed rows stay removed."""
+    extra = load_enrichment(enriched) if enriched and os.path.abspath(enriched) != os.path.abspath(path) else {}
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        rdr = csv.DictReader(f)
+        for r in rdr:
+            found = extra.get(product_key(r.get("title") or ""), {})
+            r = {**r, **{c: v for c, v in found.items() if not (r.get(c) or "").strip()}}
+            asin = (r.get("asin") or "").strip().upper() or None
+            if asin and not ASIN_RE.match(asin):
+                asin = None
+            kws = [k.strip() for k in (r.get("keywords") or "").split("|") if k.strip()]
+            bens = [b.strip() for b in (r.get("benefits") or "").split("|") if b.strip()]
+            img = (r.get("image_path") or "").strip() or None
+            out.append(Product(
+                title=(r.get("title") or "").strip(),
+                asin=asin,
+                category=(r.get("category") or "").strip() or None,
+                keywords=kws,
+                image_path=os.path.join(IMAGES_DIR, img) if img else None,
+                benefits=bens,
+                price_anchor=(r.get("price_anchor") or "").strip() or None
+            ))
+    return out
+
+# ---------- LINKS ----------
+def build_aff_link(product: Product, mode: str) -> str:
+    tag = TRACKING_IDS_BY_MODE.get(mode, AFFILIATE_TAG)
+    if product.asin:
+        return f"https://www.amazon.com/dp/{product.asin}/?tag={tag}"
+    # Fallback to search
+    q = urllib.parse.quote_plus(product.title or " ".join(product.keywords))
+    return f"https://www.amazon.com/s?k={q}&tag={tag}"
@@ -0,0 +1,166 @@
+# enrich_catalog.py — fill asin / image_path / price_anchor for products.csv
+#
+# Offline job: looks every product up against a product-data source with a
+# bounded thread pool, caches each answer in an append-only JSONL file (so an
+# interrupted run resumes where it stopped) and writes products.enriched.csv.
+# The bots read products.csv and fill its empty cells from that file by
+# product id (catalog.parse_products), so curated values always win and later
+# edits to products.csv apply without re-running this job.
+#
+#   python "Product Bot V2/enrich_catalog.py" --source-url http://localhost:8765 --workers 16
+import os, csv, json, time, argparse, threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional
+
+import requests
+
+from catalog import ROOT, IMAGES_DIR, ASIN_RE, ENRICHED_CSV, product_key
+
+SOURCE_CSV   = os.path.join(ROOT, "products.csv")
+CACHE_PATH   = os.path.join(ROOT, "state", "enrich_cache.jsonl")
+HTTP_TIMEOUT = 10
+RETRIES      = 3
+
+
+_local = threading.local()
+
+def _session() -> requests.Session:
+    """This worker thread's session; a Session must not be shared across threads."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+# ---------- SOURCES ----------
+class ProductSource(ABC):
+    name = "base"
+    @abstractmethod
+    def lookup(self, row: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """{"asin", "image_url", "price"} for a products.csv row (any may be missing)."""
+
+class HttpJsonSource(ProductSource):
+    """GET {base}/lookup?q=<title>&keywords=<k1|k2> → JSON object."""
+    name = "http"
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def lookup(self, row):
+        params = {"q": row.get("title", ""), "keywords": row.get("keywords", "")}
+        for attempt in range(RETRIES):
+            r = _session().get(f"{self.base_url}/lookup", params=params, timeout=HTTP_TIMEOUT)
+            if r.status_code == 404:
+                return {}
+            if r.status_code in (429, 500, 502, 503, 504) and attempt < RETRIES - 1:
+                time.sleep(0.5 * 2 ** attempt)
+                continue
+            r.raise_for_status()
+            return r.json()
+        return {}
+
+
+# ---------- CACHE ----------
+def _key(row: Dict[str, str]) -> str:
+    return product_key(row.get("title", ""))
+
+class EnrichCache:
+    """Append-only JSONL; the last line for a key wins."""
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.items: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        d = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue          # torn last line from an interrupted run
+                    self.items[d["key"]] = d
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def put(self, key: str, result: Dict) -> None:
+        d = {"key": key, "ts": time.time(), "result": result}
+        with self._lock:
+            self.items[key] = d
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(d, ensure_ascii=False) + "\n")
+
+
+# ---------- JOB ----------
+def fetch_image(url: str, stem: str) -> Optional[str]:
+    """Download to images/<stem>.<ext> and return the file name parse_products expects."""
+    ext = os.path.splitext(url.split("?")[0])[1].lower()
+    name = stem + (ext if ext in (".jpg", ".jpeg", ".png", ".webp", ".gif") else ".jpg")
+    dest = os.path.join(IMAGES_DIR, name)
+    if os.path.exists(dest):
+        return name
+    r = _session().get(url, timeout=HTTP_TIMEOUT)
+    r.raise_for_status()
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    with open(dest + ".part", "wb") as f:
+        f.write(r.content)
+    os.replace(dest + ".part", dest)
+    return name
+
+def enrich_one(row: Dict[str, str], source: ProductSource) -> Dict:
+    found = source.lookup(row) or {}
+    out = {}
+    asin = (found.get("asin") or "").strip().upper()
+    if asin and ASIN_RE.match(asin):
+        out["asin"] = asin
+    if found.get("price"):
+        out["price_anchor"] = str(found["price"]).strip()
+    if found.get("image_url"):                  # one file per product: ASIN, else title hash
+        curated = (row.get("asin") or "").strip().upper()
+        stem = out.get("asin") or (curated if ASIN_RE.match(curated) else _key(row))
+        out["image_path"] = fetch_image(found["image_url"], stem)
+    return out
+
+def run(source: ProductSource, src: str = SOURCE_CSV, dst: str = ENRICHED_CSV,
+        workers: int = 8, refresh: bool = False, cache_path: str = CACHE_PATH) -> Dict[str, int]:
+    with open(src, "r", encoding="utf-8") as f:
+        rdr = csv.DictReader(f)
+        fields, rows = rdr.fieldnames, list(rdr)
+
+    cache = EnrichCache(cache_path)
+    todo = [r for r in rows
+            if any(not (r.get(c) or "").strip() for c in ("asin", "image_path", "price_anchor"))
+            and (refresh or _key(r) not in cache.items)]
+    stats = {"rows": len(rows), "cached": len(rows) - len(todo), "looked_up": 0, "failed": 0}
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(enrich_one, r, source): r for r in todo}
+        for n, fut in enumerate(as_completed(futures), 1):
+            row = futures[fut]
+            try:
+                cache.put(_key(row), fut.result())
+                stats["looked_up"] += 1
+            except Exception as e:
+                stats["failed"] += 1        # not cached → retried on the next run
+                print(f"[enrich] {row.get('title', '')[:50]}: {type(e).__name__}: {e}")
+            if n % 100 == 0:
+                print(f"[enrich] {n}/{len(todo)} done ({time.time() - t0:.1f}s)")
+
+    tmp = dst + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for r in rows:
+            found = cache.items.get(_key(r), {}).get("result", {})
+            w.writerow({**r, **{c: v for c, v in found.items() if v and not (r.get(c) or "").strip()}})
+    os.replace(tmp, dst)
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Enrich products.csv into products.enriched.csv")
+    ap.add_argument("--source-url", default=os.getenv("PRODUCT_SOURCE_URL"), required=not os.getenv("PRODUCT_SOURCE_URL"))
+    ap.add_argument("--src", default=SOURCE_CSV)
+    ap.add_argument("--out", default=ENRICHED_CSV)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--refresh", action="store_true", help="ignore cached lookups")
+    a = ap.parse_args()
+    t = time.time()
+    s = run(HttpJsonSource(a.source_url), a.src, a.out, a.workers, a.refresh)
+    print(f"[enrich] {s} in {time.time() - t:.1f}s → {a.out}")
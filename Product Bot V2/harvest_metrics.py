@@ -0,0 +1,68 @@
+# harvest_metrics.py — pull public metrics for recent threads and credit the bandit
+#
+# Runs on its own schedule. Everything goes through the shared state store:
+# the recent threads come from its post log, metrics are recorded once per
+# (tweet, harvest), and each mode's reward is an atomic increment, so a post
+# running against the same database never loses a bandit update. In CI the
+# jobs hold separate copies of state.db; the product-state concurrency group
+# runs them one after another on the newest snapshot.
+# metrics.csv is still appended for humans; the engagement model trains from
+# the store.
+#
+#   python "Product Bot V2/harvest_metrics.py"
+import os, sys, csv
+from datetime import datetime, timezone
+from typing import Dict
+
+import tweepy
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
+from state_store import StateStore  # noqa
+
+BOT            = "ProductBot V2"
+RECENT         = 40     # last N thread posts
+METRIC_LOG_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "metrics.csv")
+
+
+def harvest(store: StateStore, client: tweepy.Client) -> Dict[str, float]:
+    recent = [p for p in store.recent_posts(BOT, RECENT) if p["status"].startswith("success")]
+    ids = sorted({i for p in recent for i in (p["tweet_id"], p["tweet_id_2"]) if i})
+    if not ids:
+        return {}
+
+    ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    rows = []
+    for i in range(0, len(ids), 100):
+        res = client.get_tweets(ids=ids[i:i + 100], tweet_fields=["public_metrics"])
+        for t in res.data or []:
+            m = t.data["public_metrics"]
+            rows.append((ts, str(t.id), m["like_count"], m["reply_count"], m["retweet_count"], m.get("quote_count", 0)))
+    store.add_metrics(rows)
+    os.makedirs(os.path.dirname(METRIC_LOG_CSV), exist_ok=True)
+    new = not os.path.exists(METRIC_LOG_CSV)
+    with open(METRIC_LOG_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new:
+            w.writerow(["ts", "tweet_id", "likes", "replies", "retweets", "quotes"])
+        w.writerows(rows)
+
+    # credit back to modes by the primary tweet
+    mode_of = {p["tweet_id"]: p["mode"] for p in recent}
+    rewards: Dict[str, float] = {}
+    for _, tid, l, r, rt, q in rows:
+        if tid in mode_of:
+            rewards[mode_of[tid]] = rewards.get(mode_of[tid], 0.0) + l + 2 * r + 2 * rt + q
+    for mode, score in rewards.items():
+        store.reward(BOT, mode, score)
+    return rewards
+
+if __name__ == "__main__":
+    client = tweepy.Client(
+        consumer_key=os.environ["TWITTER_API_KEY"],
+        consumer_secret=os.environ["TWITTER_API_SECRET"],
+        access_token=os.environ["TWITTER_ACCESS_TOKEN"],
+        access_token_secret=os.environ["TWITTER_ACCESS_SECRET"],
+    )
+    store = StateStore()
+    print("Rewarded modes:", harvest(store, client))
+    print("Bandit:", {m: round(s["w"], 2) for m, s in store.bandit(BOT).items()})
@@ -1,15 +1,27 @@
 # product_bot_v2.py
-import os, sys, csv, json, re, random, urllib.parse
+import os, sys, csv, re, random
 from datetime import datetime, timezone
-from dataclasses import dataclass
+from dataclasses import asdict
 from typing import List, Optional, Dict, Tuple
 
 import tweepy  # v2 client + v1.1 API for media
 from openai import OpenAI
 
+from catalog import Product, parse_products, build_aff_link, PRODUCT_CSV  # noqa
+from prompt_builder import PromptBuilder  # noqa
+
 # Local utils (Slack)
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
 from slack_notifier import notify_slack  # noqa
+from draft_ranker import BEST_OF_N, best_novel, score_draft  # noqa
+from novelty_index import NoveltyIndex, NOVELTY_MAX_SIM, NOVELTY_RETRIES  # noqa
+from llm_ledger import tracked_chat  # noqa
+from post_journal import PostJournal  # noqa
+from deadline import current as run_deadline, start as start_deadline  # noqa
+from circuit_breaker import call, is_open  # noqa
+from engagement_model import EngagementModel, ENGAGEMENT_W  # noqa
+from state_store import StateStore  # noqa
+from render import FORMATS, Generation, render, render_variants  # noqa
 
 # ---------- CONFIG ----------
 OPENAI_API_KEY           = os.getenv("OPENAI_API_KEY")
@@ -19,27 +31,20 @@ X_API_SECRET             = os.getenv("TWITTER_API_SECRET")
 X_ACCESS_TOKEN           = os.getenv("TWITTER_ACCESS_TOKEN")
 X_ACCESS_SECRET          = os.getenv("TWITTER_ACCESS_SECRET")
 
-AFFILIATE_TAG            = os.getenv("AFFILIATE_TAG", "futurebutnotn-20")
-TRACKING_IDS_BY_MODE     = json.loads(os.getenv("TRACKING_IDS_BY_MODE", "{}"))  # e.g. {"spiky":"futurebutnotn-20","confession":"futurebutnotn-21",...}
-
 ROOT                     = os.path.dirname(os.path.abspath(__file__))
-PRODUCT_CSV              = os.path.join(ROOT, "products.csv")
-IMAGES_DIR               = os.path.join(ROOT, "images")
 
 LOG_DIR                  = os.path.join(ROOT, "logs")
 TWEET_LOG_CSV            = os.path.join(LOG_DIR, "tweet_logs.csv")
 METRIC_LOG_CSV           = os.path.join(LOG_DIR, "metrics.csv")
 
 STATE_DIR                = os.path.join(ROOT, "state")
-BANDIT_PATH              = os.path.join(STATE_DIR, "bandit.json")
-USED_SET_PATH            = os.path.join(STATE_DIR, "used_set.json")
 
-MAX_TWEET_LEN            = 280
-PRIMARY_MAX              = 190   # opener (no link)
+BOT                      = "ProductBot V2"   # key in the shared state store
+SPARE_ACCOUNT            = f"{BOT} spare"    # outbox of runner-up drafts, used when generation fails
+
+PRIMARY_MAX              = FORMATS["thread"].limits[0]   # opener (no link)
 REPLY_MAX                = 265   # reply with link + hashtags
-HASHTAGS_MAX             = 2
 
-ASIN_RE                  = re.compile(r"\b[A-Z0-9]{10}\b")
 random.seed()
 
 # ---------- SETUP ----------
@@ -47,12 +52,13 @@ os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(STATE_DIR, exist_ok=True)
 if not os.path.exists(TWEET_LOG_CSV):
     with open(TWEET_LOG_CSV, "w", newline="", encoding="utf-8") as f:
-        csv.writer(f)..writerow(["ts","mode","product_title","asin","tweet_id_1","tweet_id_2","link","status"])
+        csv.writer(f).writerow(["ts","mode","product_title","asin","tweet_id_1","tweet_id_2","link","status"])
 if not os.path.exists(METRIC_LOG_CSV):
     with open(METRIC_LOG_CSV, "w", newline="", encoding="utf-8") as f:
-        csv.writer(f)..writerow(["ts","tweet_id","likes","replies","retweets","quotes"])
+        csv.writer(f).writerow(["ts","tweet_id","likes","replies","retweets","quotes"])
 
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
+STATE = StateStore()   # bandit, used set and post log shared with the metrics job
 
 # v2 for tweets / v1.1 for media upload
 x_client_v2 = tweepy.Client(
@@ -65,58 +71,13 @@ auth_v1 = tweepy.OAuth1UserHandler(X_API_KEY, X_API_SECRET, X_ACCESS_TOKEN, X_AC
 x_api_v1 = tweepy.API(auth_v1)  # for media upload
 
 # ---------- DATA ----------
-@dataclass
-class Product:
-    title: str
-    asin: Optional[str]
-    category: Optional[str]
-    keywords: List[str]
-    image_path: Optional[str]
-    benefits: List[str]
-    price_anchor: Optional[str]
-
-def parse_products(path: str) -> List[Product]:
-    out = []
-    with open(path, "r", encoding="utf-8") as f:
-        rdr = csv.DictReader(f)
-        for r in rdr:
-            asin = (r.get("asin") or "").strip().upper() or None
-            if asin and not ASIN_RE.match(asin):
-                asin = None
-            kws = [k.strip() for k in (r.get("keywords") or "").split("|") if k.strip()]
-            bens = [b.strip() for b in (r.get("benefits") or "").split("|") if b.strip()]
-            img = (r.get("image_path") or "").strip() or None
-            out.append(Product(
-                title=(r.get("title") or "").strip(),
-                asin=asin,
-                category=(r.get("category") or "").strip() or None,
-                keywords=kws,
-                image_path=os.path.join(IMAGES_DIR, img) if img else None,
-                benefits=bens,
-                price_anchor=(r.get("price_anchor") or "").strip() or None
-            ))
-    return out
-
-def load_json(path, default):
-    try:
-        with open(path,"r",encoding="utf-8") as f: return json.load(f)
-    except Exception:
-        return default
-
-def save_json(path, obj):
-    with open(path,"w",encoding="utf-8") as f: json.dump(obj,f,indent=2)
-
 def normalize(s:str) -> str:
     return re.sub(r"\s+"," ",s.strip().lower())
 
 # ---------- BANDIT ----------
 DEFAULT_MODES = ["spiky","confession","problem_fix","brand_tax","micro_drill","two_choice"]
 def load_bandit():
-    b = load_json(BANDIT_PATH, {})
-    if not b:
-        b = {m: {"w":1.0, "n":0, "r":0.0} for m in DEFAULT_MODES}
-        save_json(BANDIT_PATH, b)
-    return b
+    return STATE.bandit(BOT, DEFAULT_MODES)
 
 def choose_mode(bandit, eps=0.25):
     if random.random() < eps:
@@ -124,74 +85,17 @@ def choose_mode(bandit, eps=0.25):
     # exploit
     return max(bandit.items(), key=lambda kv: kv[1]["w"])[0]
 
-def update_bandit(bandit, mode, reward):
-    st = bandit.get(mode, {"w":1.0,"n":0,"r":0.0})
-    st["n"] += 1
-    st["r"] += reward
-    st["w"] = max(0.2, st["r"] / st["n"])  # mean reward, floor to keep exploration alive
-    bandit[mode] = st
-    save_json(BANDIT_PATH, bandit)
-
-# ---------- LINKS ----------
-def build_aff_link(product: Product, mode: str) -> str:
-    tag = TRACKING_IDS_BY_MODE.get(mode, AFFILIATE_TAG)
-    if product.asin:
-        return f"https://www.amazon.com/dp/{product.asin}/?tag={tag}"
-    # Fallback to search
-    q = urllib.parse.quote_plus(product.title or " ".join(product.keywords))
-    return f"https://www.amazon.com/s?k={q}&tag={tag}"
+def update_bandit(mode, reward):
+    STATE.reward(BOT, mode, reward)   # atomic n += 1, r += reward; w is derived on read
 
 # ---------- PROMPTS ----------
-MODE_TEMPLATES = {
-"spiky": """
-You are a brutally honest shopper with strong opinions. Write TWO JSON blocks:
-1) "primary": a spiky but defensible take (no link, no hashtags, no emojis) about the product below (<= {primary_max} chars). Do NOT sound like an ad. No brand superlatives.
-2) "reply": a follow-up that states 1-2 concrete benefits (short phrases), then a very short CTA like "details + today’s price:" (<= {reply_max} chars without link).
-Avoid clichés like "game-changer", "must-have". Be specific, tactile.
-
-Return:
-{{"primary":"...", "reply":"...", "hashtags":["tag1","tag2"]}}
-
-Product: {title}
-Category: {category}
-Benefits: {benefits}
-Price anchor (optional context): {price_anchor}
-""",
-"confession": """
-Voice: candid confession after months of use. Same JSON schema as spiky. Keep it grounded, specific, slightly self-deprecating. No hashtags in primary.
-Constraints: no emojis, no hype adjectives, <= {primary_max} chars primary, <= {reply_max} chars reply.
-Product: {title} | Benefits: {benefits}
-""",
-"problem_fix": """
-Voice: concise problem -> one-move fix. Same JSON schema. Primary states the problem crisply; reply states the fix with 1-2 benefits + short CTA.
-No emojis. No hashtags in primary. Length limits as above.
-Product: {title} | Benefits: {benefits}
-""",
-"brand_tax": """
-Voice: anti-brand-tax. Primary contrasts "logo price" vs utility. Reply gives concrete benefit + CTA. Avoid naming specific competitor brands.
-Schema + limits identical. Product: {title} | Benefits: {benefits}
-""",
-"micro_drill": """
-Voice: nerdy micro-detail only real users notice. Primary = tiny insight, oddly satisfying. Reply = 1-2 benefits + CTA. Schema + limits identical.
-Product: {title} | Benefits: {benefits}
-""",
-"two_choice": """
-Voice: fork-in-the-road. Primary frames A vs B (behavioral choice). Reply: recommend this product for one branch + CTA. Schema + limits identical.
-Product: {title} | Benefits: {benefits}
-"""
-}
-
-def ai_generate(mode:str, product: Product) -> Tuple[str,str,List[str]]:
-    tpl = MODE_TEMPLATES[mode]
-    prompt = tpl.format(
-        title=product.title, category=product.category or "general",
-        benefits=", ".join(product.benefits) if product.benefits else "n/a",
-        price_anchor=product.price_anchor or "n/a",
-        primary_max=PRIMARY_MAX, reply_max=REPLY_MAX
-    )
-    resp = openai_client.chat.completions.create(
+PROMPTS = PromptBuilder(PRIMARY_MAX, REPLY_MAX)
+
+def ai_generate(mode:str, product: Product) -> Generation:
+    resp = tracked_chat(
+        openai_client, bot="ProductBot V2", mode=mode,
         model=OPENAI_MODEL,
-        messages=[{"role":"user","content": prompt}],
+        messages=PROMPTS.messages(mode, product),
         temperature=0.9 if mode in ("spiky","brand_tax") else 0.7,
         top_p=0.95,
         presence_penalty=0.7,
@@ -199,85 +103,153 @@ def ai_generate(mode:str, product: Product) -> Tuple[str,str,List[str]]:
         max_tokens=400
     )
     raw = resp.choices[0].message.content.strip()
-    # harden JSON parsing
     try:
-        j = json.loads(raw)
-        primary = j["primary"].strip()
-        reply   = j["reply"].strip()
-        tags    = [t.strip().lstrip("#") for t in j.get("hashtags", []) if t.strip()][:HASHTAGS_MAX]
+        return Generation.from_json(raw)   # lengths are enforced when rendering
+    except ValueError as e:
+        raise RuntimeError(f"LLM JSON parse failed: {e}")
+
+def score_generation(gen: Generation, product: Product, index: NoveltyIndex,
+                     model: EngagementModel, meta: Dict) -> float:
+    primary, reply = render(gen, "thread")
+    kws = product.keywords + product.benefits
+    return (
+        score_draft(primary, min_len=PRIMARY_MAX // 2, max_len=PRIMARY_MAX, keywords=kws, index=index)
+        + 0.5 * score_draft(reply, min_len=REPLY_MAX // 3, max_len=REPLY_MAX, keywords=kws)
+        + ENGAGEMENT_W * model.z(primary, **meta)
+    )
+
+def ai_generate_best(mode:str, product: Product, n:int=BEST_OF_N) -> Generation:
+    """Best-of-N over ai_generate: N concurrent calls, locally ranked.
+    Openers too similar to past posts, or predicted duds, are rejected and regenerated."""
+    index = NoveltyIndex()
+    model = EngagementModel.load()
+    meta = dict(bot=BOT, mode=mode, category=product.category or "",
+                hour=datetime.now(timezone.utc).hour)
+    best, scored = best_novel(lambda: ai_generate(mode, product),
+                              lambda g: score_generation(g, product, index, model, meta),
+                              lambda g: g.hook, index, NOVELTY_MAX_SIM,
+                              n=n, retries=NOVELTY_RETRIES,
+                              accept=lambda g: not model.is_dud(g.hook, **meta))
+    if len(scored) > 1:
+        print(f"[best-of-{len(scored)}] scores:", [round(sc, 2) for sc, _ in scored])
+    for _, g in scored:                 # runner-ups that passed the same checks become spares
+        if g is not best and index.max_similarity(g.hook) <= NOVELTY_MAX_SIM and not model.is_dud(g.hook, **meta):
+            STATE.queue(SPARE_ACCOUNT, {"mode": mode, "product": asdict(product), "generation": g.as_dict()})
+    return best
+
+def take_spare() -> Optional[Dict]:
+    """Oldest queued spare whose opener is still novel, or None."""
+    index = NoveltyIndex()
+    while True:
+        spare = STATE.take(SPARE_ACCOUNT)
+        if spare is None or index.max_similarity(spare["generation"]["hook"]) <= NOVELTY_MAX_SIM:
+            return spare
+        STATE.ack(spare["outbox_id"])   # too close to something posted since: drop it
+
+def generate_or_spare(mode:str, product: Product, link:str) -> Dict:
+    """The "generated" journal step: a fresh draft, or a spare from an earlier
+    run when generation fails (OpenAI down, out of time, no novel draft)."""
+    try:
+        gen = ai_generate_best(mode, product)
     except Exception as e:
-        raise RuntimeError(f"LLM JSON parse failed: {e} | RAW: {raw[:220]}")
-    if len(primary) > PRIMARY_MAX: primary = primary[:PRIMARY_MAX-1] + "…"
-    if len(reply) > REPLY_MAX: reply = reply[:REPLY_MAX-1] + "…"
-    return primary, reply, tags
+        spare = take_spare()
+        if spare is None:
+            raise
+        run_deadline().fallback("generate", f"spare draft: {spare['product']['title'][:60]} ({type(e).__name__})")
+        product = Product(**spare["product"])
+        return dict(spare, link=build_aff_link(product, spare["mode"]))
+    return {"mode": mode, "product": asdict(product), "link": link, "generation": gen.as_dict()}
 
 # ---------- POSTING ----------
 def upload_media_if_any(path:str) -> Optional[int]:
     if not path or not os.path.exists(path): return None
-    media = x_api_v1.media_upload(filename=path)
+    media = call("x", x_api_v1.media_upload, filename=path)
     return media.media_id
 
-def post_thread(primary:str, reply:str, link:str, hashtags:List[str], image_path:Optional[str]) -> Tuple[str, Optional[str]]:
+def post_thread(primary:str, body:str, image_path:Optional[str],
+                journal:Optional[PostJournal]=None) -> Tuple[str, Optional[str]]:
+    """primary/body as rendered by render(gen, "thread", link)."""
+    # each step runs at most once per journal entry (resume-safe)
+    step = journal.step if journal else (lambda _name, fn, *a: fn(*a))
+
     # T1: no link, no hashtags
-    t1 = x_client_v2.create_tweet(text=primary)
-    t1_id = t1.data["id"]
+    t1_id = step("t1_posted", lambda: call("x", x_client_v2.create_tweet, text=primary).data["id"])
 
     # T2: reply with link + minimal hashtags
-    hline = " ".join(f"#{h}" for h in hashtags[:HASHTAGS_MAX])
-    body = f"{reply}\n{link}\n\n{hline}".strip()
-    if len(body) > MAX_TWEET_LEN:
-        body = body[:MAX_TWEET_LEN-1] + "…"
-
-    media_id = upload_media_if_any(image_path)
-    if media_id:
-        t2 = x_client_v2.create_tweet(text=body, in_reply_to_tweet_id=t1_id, media_ids=[media_id])
-    else:
-        t2 = x_client_v2.create_tweet(text=body, in_reply_to_tweet_id=t1_id)
-    return t1_id, t2.data["id"]
-
-def log_tweet(mode, product:Product, t1_id, t2_id, link, status):
+    media_id = step("media_uploaded", upload_media_if_any, image_path)
+    def create_t2():
+        if media_id:
+            t2 = call("x", x_client_v2.create_tweet, text=body, in_reply_to_tweet_id=t1_id, media_ids=[media_id])
+        else:
+            t2 = call("x", x_client_v2.create_tweet, text=body, in_reply_to_tweet_id=t1_id)
+        return t2.data["id"]
+    return t1_id, step("t2_posted", create_t2)
+
+def log_tweet(mode, product:Product, t1_id, t2_id, link, status, text=""):
+    ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
     with open(TWEET_LOG_CSV, "a", newline="", encoding="utf-8") as f:
         csv.writer(f).writerow([
-            datetime.now(timezone.utc).isoformat(timespec="seconds"),
-            mode, product.title, product.asin or "",
+            ts, mode, product.title, product.asin or "",
             t1_id or "", t2_id or "", link, status
         ])
+    STATE.log_post(BOT, ts=ts, mode=mode, product_title=product.title, asin=product.asin,
+                   tweet_id=t1_id, tweet_id_2=t2_id, link=link, status=status, text=text)
+
+def queue_variants(gen: Generation, product: Product) -> List[str]:
+    """Render this generation for the other accounts in RENDER_ACCOUNTS and
+    leave them in the shared outbox, so they post without their own LLM call."""
+    variants = render_variants(gen, lambda mode: build_aff_link(product, mode))
+    for account, v in variants.items():
+        if account != BOT:
+            STATE.queue(account, dict(v, product_title=product.title, hook=gen.hook))
+    return sorted(a for a in variants if a != BOT)
 
 # ---------- USED-SET ----------
-def load_used_set() -> set:
-    s = set(load_json(USED_SET_PATH, []))
-    return s
-
-def save_used_set(s:set):
-    save_json(USED_SET_PATH, sorted(list(s)))
-
 def choose_product(products: List[Product]) -> Product:
-    used = load_used_set()
-    avail = [p for p in products if normalize(p.title) not in used]
-    if not avail:
-        # allow repeats, but prefer those with ASIN first
-        avail = sorted(products, key=lambda p: (p.asin is None, normalize(p.title)))
-        used.clear()
-    choice = random.choice(avail)
-    used.add(normalize(choice.title))
-    save_used_set(used)
-    return choice
+    # pick-and-mark is one transaction, so overlapping runs never get the same product
+    by_key = {normalize(p.title): p for p in products}
+    return by_key[STATE.claim(BOT, list(by_key), reset_when_empty=True)]
 
 # ---------- MAIN ----------
 def main():
-    products = parse_products(PRODUCT_CSV)
-    if not products:
-        raise RuntimeError("No products loaded. Provide products.csv with headers: title,asin,category,keywords,image_path,benefits,price_anchor")
+    start_deadline()
+    if is_open("x"):                    # nothing can be posted; don't pay for a draft either
+        print("🔌 X circuit open, skipping this run.")
+        notify_slack("ProductBot", "fail", "X circuit open, nothing posted.")
+        return
+    journal = PostJournal("productbot_v2")
+    entry = journal.pending()
+    if entry:
+        # resume a crashed run: same mode/product/draft, skip completed steps
+        mode, link = entry["data"]["mode"], entry["data"]["link"]
+        product = Product(**entry["data"]["product"])
+        print(f"[journal] resuming {entry['id']} (done: {', '.join(entry['steps']) or 'nothing'})")
+    else:
+        products = parse_products(PRODUCT_CSV)
+        if not products:
+            raise RuntimeError("No products loaded. Provide products.csv with headers: title,asin,category,keywords,image_path,benefits,price_anchor")
+        PROMPTS.precompute(products)
 
-    bandit = load_bandit()
-    mode = choose_mode(bandit, eps=0.25)
-    product = choose_product(products)
-    link = build_aff_link(product, mode)
+        bandit = load_bandit()
+        mode = choose_mode(bandit, eps=0.25)
+        product = choose_product(products)
+        link = build_aff_link(product, mode)
+        journal.begin(mode=mode, product=asdict(product), link=link)
 
     try:
-        primary, reply, tags = ai_generate(mode, product)
-        t1, t2 = post_thread(primary, reply, link, tags, product.image_path)
-        log_tweet(mode, product, t1, t2, link, "success")
+        draft = journal.step("generated", generate_or_spare, mode, product, link)
+        if "outbox_id" in draft:        # a spare: the journal owns it now
+            STATE.ack(draft["outbox_id"])
+        mode, link, product = draft["mode"], draft["link"], Product(**draft["product"])
+        gen = Generation(**draft["generation"])
+        primary, body = render(gen, "thread", link)
+        t1, t2 = post_thread(primary, body, product.image_path, journal)
+        def record():
+            log_tweet(mode, product, t1, t2, link, "success", primary)
+            NoveltyIndex().add(primary, bot="ProductBot", tweet_id=t1)
+        journal.step("logged", record)
+        journal.step("queued", queue_variants, gen, product)
+        journal.finish()
         notify_slack("ProductBot", "success", f"Mode={mode}\n{product.title}\nT1={t1}\nT2={t2}")
         print("[✓] Posted thread.", t1, t2)
     except Exception as e:
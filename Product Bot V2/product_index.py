@@ -0,0 +1,112 @@
+# product_index.py — inverted index from trend words to catalog products
+#
+# Every product contributes weighted terms from its keywords, title, category
+# and benefits. Per-row term weights are persisted with a hash of the row, so
+# when products.csv changes only added/edited rows are re-tokenised; postings
+# are then rebuilt in memory (cheap: a few terms per product).
+#
+#   python "Product Bot V2/product_index.py" "my landlord banned smart locks"
+import os, sys, json, math, hashlib
+from collections import defaultdict
+from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog import Product, parse_products, ROOT, PRODUCT_CSV
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
+from text_tokens import tokenize  # noqa
+
+INDEX_PATH    = os.path.join(ROOT, "state", "product_index.json")
+FIELD_WEIGHTS = {"keywords": 3.0, "title": 2.0, "category": 1.0, "benefits": 1.0}
+KEYWORD_BOOST = 1.5     # query terms that came from extract_keywords
+MIN_SCORE     = float(os.getenv("PRODUCT_MATCH_MIN", "3.0"))
+
+
+def _key(p: Product) -> str:
+    return " ".join(p.title.lower().split())
+
+def _row_hash(p: Product) -> str:
+    return hashlib.sha1(json.dumps(asdict(p), sort_keys=True).encode()).hexdigest()[:16]
+
+def _row_terms(p: Product, weights: Dict[str, float]) -> Dict[str, float]:
+    fields = {
+        "keywords": " ".join(p.keywords),
+        "title": p.title,
+        "category": (p.category or "").replace("_", " "),
+        "benefits": " ".join(p.benefits),
+    }
+    terms: Dict[str, float] = defaultdict(float)
+    for field, text in fields.items():
+        for t in set(tokenize(text)):
+            terms[t] += weights.get(field, 1.0)
+    return dict(terms)
+
+
+class ProductIndex:
+    def __init__(self, csv_path: str = PRODUCT_CSV, path: str = INDEX_PATH,
+                 weights: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.weights = weights or FIELD_WEIGHTS
+        self.products: Dict[str, Product] = {}
+        self.rows: Dict[str, Dict] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.reindexed = 0
+        self.build(parse_products(csv_path))
+
+    def build(self, products: Iterable[Product]) -> None:
+        """Incremental: only rows whose hash changed are re-tokenised."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = {}
+        old = saved.get("rows", {}) if saved.get("weights") == self.weights else {}
+
+        self.products, self.rows, self.reindexed = {}, {}, 0
+        for p in products:
+            k, h = _key(p), _row_hash(p)
+            if not k:
+                continue
+            row = old.get(k)
+            if row is None or row["hash"] != h:
+                row = {"hash": h, "terms": _row_terms(p, self.weights)}
+                self.reindexed += 1
+            self.products[k], self.rows[k] = p, row
+
+        postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for k, row in self.rows.items():
+            for t, w in row["terms"].items():
+                postings[t][k] = w
+        self.postings = dict(postings)
+
+        if self.reindexed or len(old) != len(self.rows):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"weights": self.weights, "rows": self.rows}, f, separators=(",", ":"))
+
+    def match(self, trend_title: str, keywords: Iterable[str] = (), k: int = 3,
+              min_score: float = MIN_SCORE) -> List[Tuple[float, Product]]:
+        """Top-k (score, product) for a trend title plus extract_keywords output."""
+        q: Dict[str, float] = defaultdict(float)
+        for t in tokenize(trend_title):
+            q[t] += 1.0
+        for kw in keywords:
+            for t in tokenize(kw):
+                q[t] += KEYWORD_BOOST
+        n = len(self.rows) or 1
+        scores: Dict[str, float] = defaultdict(float)
+        for t, qw in q.items():
+            post = self.postings.get(t)
+            if not post:
+                continue
+            idf = math.log(1 + n / len(post))
+            for key, w in post.items():
+                scores[key] += qw * w * idf
+        top = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [(round(sc, 3), self.products[key]) for key, sc in top if sc >= min_score]
+
+if __name__ == "__main__":
+    idx = ProductIndex()
+    print(f"{len(idx.rows)} products, {len(idx.postings)} terms, {idx.reindexed} re-indexed")
+    for sc, p in idx.match(" ".join(sys.argv[1:]) or "smart lock for renters"):
+        print(f"{sc:7.2f}  {p.title}")
@@ -0,0 +1,155 @@
+# prompt_builder.py — static system prompts + memoised per-product context
+#
+# The instruction preamble and each mode's voice never change between runs,
+# so they are rendered once into one system message per mode. Only the short
+# product block goes in the user message, built once per product and reused.
+# This saves local string building, not API cost: the static prefix is ~300
+# tokens, far below the 1024-token minimum for OpenAI prompt caching.
+#
+# Unlike the legacy per-mode templates, every mode now gets the same product
+# block (category and price anchor included), and every call carries the
+# full preamble, so each mode sends more input tokens than its legacy prompt
+# (see the report below).
+#
+#   python "Product Bot V2/prompt_builder.py"     # token delta vs legacy prompts
+import os, sys, argparse
+from typing import Dict, List, Tuple
+
+from catalog import Product, parse_products, PRODUCT_CSV
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
+from llm_ledger import count_message_tokens, print_table  # noqa
+
+# ---------- STATIC PARTS ----------
+PREAMBLE = """Write the parts of an X post as a real, opinionated shopper. Output only JSON:
+{{"hook":"...","claims":["..."],"benefits":["...","..."],"cta":"...","hashtags":["tag1","tag2"]}}
+hook: the opener, <= {primary_max} chars, no link/hashtags/emojis. Not ad-like: no superlatives, no hype.
+claims: 1-2 short first-hand observations that back the hook up.
+benefits: 1-2 concrete benefits as short phrases. cta: tiny, like "details + today’s price:".
+benefits + cta together <= {reply_max} chars (link is added for you).
+hashtags: at most 2, no "#". No clichés ("game-changer", "must-have"). Be specific, tactile.
+The parts are assembled into several post formats, so each must read well on its own."""
+
+VOICES = {
+"spiky":       "Voice: brutally honest shopper with strong opinions. Hook is a spiky but defensible take.",
+"confession":  "Voice: candid confession after months of use. Grounded, specific, slightly self-deprecating.",
+"problem_fix": "Voice: concise problem -> one-move fix. Hook states the problem crisply; benefits state the fix.",
+"brand_tax":   "Voice: anti-brand-tax. Hook contrasts \"logo price\" vs utility. Never name competitor brands.",
+"micro_drill": "Voice: nerdy micro-detail only real users notice. Hook = tiny insight, oddly satisfying.",
+"two_choice":  "Voice: fork-in-the-road. Hook frames A vs B (a behavioural choice); benefits recommend this product for one branch.",
+}
+
+PRODUCT_BLOCK = """Product: {title}
+Category: {category}
+Benefits: {benefits}
+Price anchor (optional context): {price_anchor}"""
+
+
+class PromptBuilder:
+    def __init__(self, primary_max: int, reply_max: int):
+        preamble = PREAMBLE.format(primary_max=primary_max, reply_max=reply_max)
+        # rendered once: one frozen system message per mode
+        self.system: Dict[str, Dict[str, str]] = {
+            mode: {"role": "system", "content": f"{preamble}\n\n{voice}"}
+            for mode, voice in VOICES.items()
+        }
+        self._blocks: Dict[Tuple, Dict[str, str]] = {}
+
+    @staticmethod
+    def _key(p: Product) -> Tuple:
+        return (p.title, p.category, tuple(p.benefits), p.price_anchor)
+
+    def product_message(self, p: Product) -> Dict[str, str]:
+        key = self._key(p)
+        msg = self._blocks.get(key)
+        if msg is None:
+            msg = {"role": "user", "content": PRODUCT_BLOCK.format(
+                title=p.title, category=p.category or "general",
+                benefits=", ".join(p.benefits) if p.benefits else "n/a",
+                price_anchor=p.price_anchor or "n/a")}
+            self._blocks[key] = msg
+        return msg
+
+    def precompute(self, products: List[Product]) -> None:
+        for p in products:
+            self.product_message(p)
+
+    def messages(self, mode: str, product: Product) -> List[Dict[str, str]]:
+        return [self.system[mode], self.product_message(product)]
+
+
+# ---------- LEGACY (for the delta report) ----------
+LEGACY_TEMPLATES = {
+"spiky": """
+You are a brutally honest shopper with strong opinions. Write TWO JSON blocks:
+1) "primary": a spiky but defensible take (no link, no hashtags, no emojis) about the product below (<= {primary_max} chars). Do NOT sound like an ad. No brand superlatives.
+2) "reply": a follow-up that states 1-2 concrete benefits (short phrases), then a very short CTA like "details + today’s price:" (<= {reply_max} chars without link).
+Avoid clichés like "game-changer", "must-have". Be specific, tactile.
+
+Return:
+{{"primary":"...", "reply":"...", "hashtags":["tag1","tag2"]}}
+
+Product: {title}
+Category: {category}
+Benefits: {benefits}
+Price anchor (optional context): {price_anchor}
+""",
+"confession": """
+Voice: candid confession after months of use. Same JSON schema as spiky. Keep it grounded, specific, slightly self-deprecating. No hashtags in primary.
+Constraints: no emojis, no hype adjectives, <= {primary_max} chars primary, <= {reply_max} chars reply.
+Product: {title} | Benefits: {benefits}
+""",
+"problem_fix": """
+Voice: concise problem -> one-move fix. Same JSON schema. Primary states the problem crisply; reply states the fix with 1-2 benefits + short CTA.
+No emojis. No hashtags in primary. Length limits as above.
+Product: {title} | Benefits: {benefits}
+""",
+"brand_tax": """
+Voice: anti-brand-tax. Primary contrasts "logo price" vs utility. Reply gives concrete benefit + CTA. Avoid naming specific competitor brands.
+Schema + limits identical. Product: {title} | Benefits: {benefits}
+""",
+"micro_drill": """
+Voice: nerdy micro-detail only real users notice. Primary = tiny insight, oddly satisfying. Reply = 1-2 benefits + CTA. Schema + limits identical.
+Product: {title} | Benefits: {benefits}
+""",
+"two_choice": """
+Voice: fork-in-the-road. Primary frames A vs B (behavioral choice). Reply: recommend this product for one branch + CTA. Schema + limits identical.
+Product: {title} | Benefits: {benefits}
+"""
+}
+
+def legacy_messages(mode: str, p: Product, primary_max: int, reply_max: int) -> List[Dict[str, str]]:
+    prompt = LEGACY_TEMPLATES[mode].format(
+        title=p.title, category=p.category or "general",
+        benefits=", ".join(p.benefits) if p.benefits else "n/a",
+        price_anchor=p.price_anchor or "n/a",
+        primary_max=primary_max, reply_max=reply_max)
+    return [{"role": "user", "content": prompt}]
+
+def token_report(products: List[Product], model: str, primary_max: int, reply_max: int) -> List[Dict]:
+    """Average input tokens per mode: legacy prompt vs new total, and the size
+    of the static system prefix."""
+    pb = PromptBuilder(primary_max, reply_max)
+    rows = []
+    for mode in VOICES:
+        legacy = [count_message_tokens(legacy_messages(mode, p, primary_max, reply_max), model) for p in products]
+        new = [count_message_tokens(pb.messages(mode, p), model) for p in products]
+        static = count_message_tokens([pb.system[mode]], model)
+        avg_legacy, avg_new = sum(legacy) / len(legacy), sum(new) / len(new)
+        rows.append({
+            "mode": mode,
+            "legacy": round(avg_legacy),
+            "new_total": round(avg_new),
+            "delta": round(avg_new - avg_legacy),
+            "static_prefix": static,
+        })
+    return rows
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Prompt token delta per mode")
+    ap.add_argument("--csv", default=PRODUCT_CSV)
+    ap.add_argument("--model", default=os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+    ap.add_argument("--primary-max", type=int, default=190)
+    ap.add_argument("--reply-max", type=int, default=265)
+    a = ap.parse_args()
+    print_table(token_report(parse_products(a.csv), a.model, a.primary_max, a.reply_max))
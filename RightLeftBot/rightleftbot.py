@@ -1,20 +1,36 @@
 import os
+import json
 import requests
 import openai
 import time
 import tweepy
 import random
-import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
 
 from slack_notifier import notify_slack
+from llm_ledger import tracked_chat
+from story_cluster import rank_stories
+from keyword_engine import KeywordEngine
+from deadline import current as run_deadline, start as start_deadline
+from circuit_breaker import guard, is_open
 
 # CONFIG
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TEST_MODE = False  # Set to False when you're ready to post
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_DIR = os.path.join(ROOT, ".cache")
+NEWS_CACHE = os.path.join(CACHE_DIR, "news_page.json")
+QUEUE_FILE = os.path.join(CACHE_DIR, "rightleft_queue.json")
+NEWS_TTL = int(os.getenv("NEWS_TTL", str(2 * 60 * 60)))        # reuse a fetched page for 2 h
+QUEUE_MAX_AGE = int(os.getenv("QUEUE_MAX_AGE", str(20 * 60 * 60)))  # drop takes older than 20 h
+BATCH_K = int(os.getenv("BATCH_K", "2"))                        # articles per batch → 2K tweets
+HTTP_TIMEOUT = 15
+GENERATE_NEED = 45                                              # run budget one live generation needs
+
 # Twitter API setup
 TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
 TWITTER_API_SECRET = os.getenv("TWITTER_API_SECRET")
@@ -33,11 +49,64 @@ twitter_client = tweepy.Client(
 
 # === FUNCTIONS ===
 
-def fetch_news():
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+def save_json(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def fetch_news_page():
+    """One page of top articles, cached on disk for NEWS_TTL seconds and
+    revalidated with the server's ETag once stale."""
+    cache = load_json(NEWS_CACHE, {})
+    if cache and time.time() - cache.get("fetched_at", 0) < NEWS_TTL:
+        return cache["articles"]
+
     url = f"https://newsdata.io/api/1/news?apikey={NEWS_API_KEY}&language=en&country=us&category=top"
-    r = requests.get(url)
-    articles = r.json().get("results", [])
-    return articles[:1]
+    headers = {"If-None-Match": cache["etag"]} if cache.get("etag") else {}
+    try:
+        if not run_deadline().allows(HTTP_TIMEOUT):
+            raise requests.Timeout("run deadline")
+        with guard("newsdata"):
+            r = requests.get(url, headers=headers, timeout=run_deadline().timeout(HTTP_TIMEOUT))
+            if r.status_code == 429 or r.status_code >= 500:
+                r.raise_for_status()
+    except Exception as e:
+        print("⚠️ News fetch failed, using cached page:", e)
+        run_deadline().fallback("news", f"cached page ({type(e).__name__})")
+        return cache.get("articles", [])
+    if not r.ok:                                    # 401 bad key, 422 quota/params: keep the old page
+        print(f"⚠️ News fetch returned {r.status_code}, using cached page:", r.text[:200])
+        run_deadline().fallback("news", f"cached page (HTTP {r.status_code})")
+        return cache.get("articles", [])
+    if r.status_code == 304:
+        cache["fetched_at"] = time.time()
+        save_json(NEWS_CACHE, cache)
+        return cache["articles"]
+    articles = r.json().get("results", []) or []
+    save_json(NEWS_CACHE, {"fetched_at": time.time(), "etag": r.headers.get("ETag"), "articles": articles})
+    kw = KeywordEngine()
+    kw.observe([f"{a.get('title') or ''} {a.get('description') or ''}" for a in articles],
+               ids=[a.get("article_id") or a.get("title") or "" for a in articles])
+    kw.save()
+    return articles
+
+def top_stories(articles):
+    """One representative article per story, most widely covered first."""
+    articles = [a for a in articles if a.get("title")]
+    stories = rank_stories(articles, lambda a: f"{a['title']} {a.get('description') or ''}")
+    return [s["rep"] for s in stories]
+
+def fetch_news():
+    return top_stories(fetch_news_page())[:1]
 
 def build_prompt(title, description, context, tone):
     label = "left-leaning progressive" if tone == "left" else "right-leaning conservative"
@@ -57,15 +126,15 @@ And include a header with a brief on the news discussed.
 Avoid politeness. Be blunt and viral.
 """
 
-def generate_single_tweet(article):
+def generate_single_tweet(article, tone=None):
     title = article.get("title", "")
     description = article.get("description", "")
     content = article.get("content", description)
-    tone = random.choice(["left", "right"])
-    label = "[🟦 Left]" if tone == "left" else "[🟥 Right]"
+    tone = tone or random.choice(["left", "right"])
 
     prompt = build_prompt(title, description, content, tone)
-    res = client.chat.completions.create(
+    res = tracked_chat(
+        client, bot="RightLeftBot", mode=tone,
         model="gpt-4",
         messages=[{"role": "user", "content": prompt}],
         temperature=1,
@@ -84,6 +153,10 @@ def post_to_twitter(text):
         notify_slack("Right/Left Bot", "fail", f"Error:\n{str(outer)}")
 
 def run_bot():
+    if is_open("x"):
+        print("🔌 X circuit open, skipping this slot.")
+        notify_slack("Right/Left Bot", "fail", "X circuit open, nothing posted.")
+        return
     print("📰 Fetching news...")
     articles = fetch_news()
     if not articles:
@@ -93,14 +166,117 @@ def run_bot():
 
     article = articles[0]
     print(f"\n🔗 Topic: {article['title']}")
-    tweet = generate_single_tweet(article)
+    tweet = item = None
+    if run_deadline().allows(GENERATE_NEED) and not is_open("openai"):
+        tweet = _safe_generate(article, None)
+    if not tweet:                                   # out of time or OpenAI failed: use a queued take
+        item = pop_queued()
+        if not item:
+            raise RuntimeError("Generation failed and no queued take to fall back to.")
+        run_deadline().fallback("generate", f"queued draft: {item['title'][:60]}")
+        tweet = item["tweet"]
 
     print("\n🧪 Generated Tweet:\n", tweet)
     if not TEST_MODE:
-        twitter_client.create_tweet(text=tweet)
-        print("✅ Tweet posted.")
+        try:
+            with guard("x"):
+                twitter_client.create_tweet(text=tweet)
+                print("✅ Tweet posted.")
+        except Exception:
+            if item:
+                requeue(item)                       # the take is not lost with a failed post
+            raise
+        notify_slack("Right/Left Bot", "success", f"Posted:\n{tweet}")
+    if item:
+        save_json(QUEUE_FILE + ".last", {"tone": item["tone"]})
+
+# === BATCH MODE ===
+# `batch` fetches one page, writes left + right takes for the top BATCH_K
+# articles concurrently and queues them; `post` (the scheduled slots) only
+# pops the queue, so no fetch or generation sits on the posting path.
+
+def load_queue():
+    now = time.time()
+    return [q for q in load_json(QUEUE_FILE, []) if now - q["created"] < QUEUE_MAX_AGE]
+
+def run_batch(k=BATCH_K):
+    if is_open("openai"):
+        print("🔌 OpenAI circuit open, keeping the existing queue.")
+        return load_queue()
+    print("📰 Fetching news page...")
+    articles = top_stories(fetch_news_page())
+    queue = load_queue()
+    seen = {q["article_id"] for q in queue}
+    picked = [a for a in articles if (a.get("article_id") or a["title"]) not in seen][:k]
+    if not picked:
+        print("⚠️ No new articles to queue.")
+        return queue
+
+    jobs = [(a, tone) for a in picked for tone in ("left", "right")]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(lambda j: _safe_generate(*j), jobs))
+
+    for (a, tone), tweet in zip(jobs, results):
+        if tweet:
+            queue.append({"article_id": a.get("article_id") or a["title"], "title": a["title"],
+                          "tone": tone, "tweet": tweet, "created": time.time()})
+    save_json(QUEUE_FILE, queue)
+    print(f"🗂️ Queued {sum(1 for t in results if t)} takes; queue size {len(queue)}.")
+    return queue
+
+def _safe_generate(article, tone):
+    try:
+        return generate_single_tweet(article, tone)
+    except Exception as e:
+        print(f"❌ Generation failed ({tone}):", e)
+        return None
+
+def pop_queued():
+    """Take the next queued take off the queue, or None when it is empty."""
+    queue = load_queue()
+    if not queue:
+        return None
+    # alternate sides: prefer the tone we did not post last
+    last = load_json(QUEUE_FILE + ".last", {}).get("tone")
+    item = next((q for q in queue if q["tone"] != last), queue[0])
+    queue.remove(item)
+    save_json(QUEUE_FILE, queue)
+    return item
+
+def requeue(item):
+    """Put a take back at the front of the queue after a failed post."""
+    save_json(QUEUE_FILE, [item] + load_json(QUEUE_FILE, []))
+
+def post_from_queue():
+    if is_open("x"):                                # keep the take queued for the next slot
+        print("🔌 X circuit open, skipping this slot.")
+        notify_slack("Right/Left Bot", "fail", "X circuit open, nothing posted.")
+        return
+    item = pop_queued()
+    if not item:
+        print("⚠️ Queue empty, falling back to live run.")
+        return run_bot()
+
+    tweet = item["tweet"]
+    print(f"\n🔗 Topic: {item['title']}\n\n🧪 Queued Tweet:\n", tweet)
+    if not TEST_MODE:
+        try:
+            with guard("x"):
+                twitter_client.create_tweet(text=tweet)
+                print("✅ Tweet posted.")
+        except Exception:
+            requeue(item)
+            raise
         notify_slack("Right/Left Bot", "success", f"Posted:\n{tweet}")
+    save_json(QUEUE_FILE + ".last", {"tone": item["tone"]})
 
 # === RUN ===
 if __name__ == "__main__":
-    run_bot()
+    start_deadline()
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if cmd == "batch":
+        run_batch()
+    elif cmd == "post":
+        post_from_queue()
+    else:
+        run_bot()
@@ -11,6 +11,10 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
 
 from slack_notifier import notify_slack
+from novelty_index import NoveltyIndex, NOVELTY_RETRIES
+from llm_ledger import tracked_chat
+from state_store import StateStore
+from render import Generation, render
 
 # === CONFIGURATION ===
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -95,15 +99,14 @@ def mark_product_as_used(product):
         f.write(product.strip() + "\n")
 
 def get_next_unused_product():
-    curated       = get_curated_products()
-    _raw, usedset = get_used_products()
-
-    available = [p for p in curated if normalise(p) not in usedset]
-    if not available:
+    by_key = {normalise(p): p for p in get_curated_products()}
+    # pick-and-mark in one transaction so overlapping runs never post the same product
+    key = StateStore().claim("ProductBot", list(by_key))
+    if key is None:
         raise Exception("🛑 No unused products left. Please refill product_list.txt.")
 
-    choice = random.choice(available)
-    mark_product_as_used(choice)   # record immediately
+    choice = by_key[key]
+    mark_product_as_used(choice)   # keep used_products.txt readable alongside the store
     return choice
 
 # === AI PROMPT ===
@@ -144,7 +147,8 @@ def get_ai_tweet(product_title, retries=2):
     prompt = create_prompt_from_product(product_title)
     for attempt in range(retries):
         try:
-            response = openai_client.chat.completions.create(
+            response = tracked_chat(
+                openai_client, bot="ProductBot", mode="single",
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
@@ -172,20 +176,46 @@ def generate_affiliate_link(keywords, product_title=None):
         return DEFAULT_AFFILIATE_LINK
 
 def format_generated_tweet(tweet_text, cta, hashtags, link):
-    body = f"{tweet_text} {cta}".strip()
-    hashtag_line = " ".join(f"#{tag}" for tag in hashtags[:2])
-    full = f"{body}\n {link}\n\n{hashtag_line}"
-    if len(full) > MAX_TWEET_LENGTH:
-        print("[Warning] Truncated tweet due to length")
-        return full[:MAX_TWEET_LENGTH - 1] + "…"
-    return full
+    # X weighted length (link = 23); drops hashtags, then shortens the text, never the link
+    gen = Generation(hook=tweet_text, cta=cta, hashtags=[t.lstrip("#") for t in hashtags])
+    return render(gen, "single", link)[0]
+
+def post_queued(store, queued):
+    """Post a variant another bot rendered for this account (no LLM call).
+    It leaves the outbox only once posted; a failed post puts it back."""
+    final_tweet = queued["tweets"][0]
+    try:
+        twitter_client.create_tweet(text=final_tweet)
+        store.ack(queued["outbox_id"])
+    except Exception:
+        store.release(queued["outbox_id"])
+        raise
+    log_tweet(queued["product_title"], final_tweet, "", [], queued["link"], "success:queued")
+    NoveltyIndex().add(queued["hook"], bot="ProductBot")
+    print("[✓] Queued tweet posted successfully.")
+    notify_slack("ProductBot", "success", f"Posted (queued {queued['format']}):\n{final_tweet}")
 
 # === MAIN ===
 def post_to_twitter():
     ensure_log_folder()
     try:
+        store = StateStore()
+        queued = store.take("ProductBot")          # rendered from another bot's generation
+        if queued:
+            return post_queued(store, queued)
         product_title = get_next_unused_product()
+        novelty = NoveltyIndex()
         ai_data = get_ai_tweet(product_title)
+        for _ in range(NOVELTY_RETRIES):
+            if not ai_data or novelty.is_novel(ai_data.get("tweet", "")):
+                break
+            print("[Novelty] Draft too close to a past tweet, regenerating…")
+            ai_data = get_ai_tweet(product_title)
+        if ai_data and not novelty.is_novel(ai_data.get("tweet", "")):
+            print("✖ Every draft was too close to a past tweet, nothing posted.")
+            log_tweet(product_title, ai_data.get("tweet", ""), "", [], "", "novelty_reject")
+            notify_slack("ProductBot", "fail", "No novel draft after regenerating, nothing posted.")
+            return
         if not ai_data or not all(k in ai_data for k in ("tweet", "cta", "hashtags", "keywords")):
             print("✖ Failed to generate required tweet content.")
             log_tweet(product_title, "", "", [], "", "gen_fail")
@@ -199,6 +229,7 @@ def post_to_twitter():
         final_tweet = format_generated_tweet(tweet_body, tweet_cta, hashtags, aff_link)
         twitter_client.create_tweet(text=final_tweet)
         log_tweet(product_title, tweet_body, tweet_cta, hashtags, aff_link, "success")
+        novelty.add(tweet_body, bot="ProductBot")
         print("[✓] Tweet posted successfully.")
         notify_slack("ProductBot", "success", f"Posted:\n{final_tweet}")
     except Exception as outer:
@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for d in ("utils", "trendparasite", "Product Bot V2", "RightLeftBot", "productbot"):
+    sys.path.insert(0, os.path.join(ROOT, d))
+
+# the bots build their API clients at import time
+for var in ("OPENAI_API_KEY", "TWITTER_API_KEY", "TWITTER_API_SECRET",
+            "TWITTER_ACCESS_TOKEN", "TWITTER_ACCESS_SECRET"):
+    os.environ.setdefault(var, "test")
+
+# state the bots open at import time goes to a scratch dir, not the repo's .cache
+SCRATCH = tempfile.mkdtemp(prefix="bots-tests-")
+for var, name in (("STATE_DB", "state.db"), ("NOVELTY_DB", "novelty.db"),
+                  ("JOURNAL_DIR", "journal"), ("SLACK_OUTBOX", "slack_outbox.jsonl")):
+    os.environ.setdefault(var, os.path.join(SCRATCH, name))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_breakers(tmp_path, monkeypatch):
+    """Keep circuit-breaker state out of the repo's .cache."""
+    import circuit_breaker
+    monkeypatch.setattr(circuit_breaker, "BREAKER_STATE", str(tmp_path / "breakers.json"))
+    monkeypatch.setattr(circuit_breaker, "_loaded", False)
+    circuit_breaker._state.clear()
+    circuit_breaker._probing.clear()
+    circuit_breaker.transitions.clear()
@@ -0,0 +1,5 @@
+import analysis_cache
+
+
+def test_default_path_is_anchored_at_repo_root():
+    assert analysis_cache.ANALYSIS_CACHE.startswith(analysis_cache.ROOT + "/")
@@ -0,0 +1,32 @@
+import pytest
+
+from bm25 import BM25Ranker, stem
+
+POSTS = [
+    "Company announces layoffs across the engineering org",
+    "My manager laid me off by text message",
+    "Layoff season: three friends lost their jobs this week",
+    "Cat refuses to leave the laundry basket",
+]
+
+
+@pytest.mark.parametrize("word, root", [("layoffs", "layoff"), ("banned", "ban"), ("running", "run"),
+                                        ("updated", "updat"), ("updates", "updat"), ("class", "class")])
+def test_stem(word, root):
+    assert stem(word) == root
+
+
+def test_rank_matches_inflections_and_drops_misses():
+    ranked = BM25Ranker().rank("layoff", POSTS, str, k=5)
+    assert {p for _, p in ranked} == {POSTS[0], POSTS[2]}
+    assert all(s > 0 for s, _ in ranked)
+
+
+def test_shorter_doc_wins_on_equal_term_frequency():
+    docs = ["ban announced", "ban announced after a very long and winding debate in the chamber"]
+    first, second = BM25Ranker().scores("ban", docs)
+    assert first > second
+
+
+def test_empty_query_scores_zero():
+    assert BM25Ranker().scores("", POSTS) == [0.0] * len(POSTS)
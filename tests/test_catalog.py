@@ -0,0 +1,33 @@
+import csv
+
+from catalog import parse_products
+
+FIELDS = ["title", "asin", "category", "keywords", "image_path", "benefits", "price_anchor"]
+
+
+def write(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS)
+        w.writeheader()
+        for r in rows:
+            w.writerow({c: r.get(c, "") for c in FIELDS})
+
+
+def test_enrichment_fills_gaps_in_the_current_products_csv(tmp_path):
+    src, enriched = tmp_path / "products.csv", tmp_path / "products.enriched.csv"
+    write(enriched, [{"title": "Desk Lamp", "asin": "B000000001", "image_path": "B000000001.jpg",
+                      "price_anchor": "$30"},
+                     {"title": "Old Kettle", "asin": "B000000002"}])
+    # edited after enrichment ran: a price change, a new product, a removed one
+    write(src, [{"title": "desk  lamp", "price_anchor": "$25"}, {"title": "New Mug"}])
+
+    lamp, mug = parse_products(str(src), enriched=str(enriched))
+    assert lamp.asin == "B000000001" and lamp.image_path.endswith("B000000001.jpg")
+    assert lamp.price_anchor == "$25"                     # curated value wins
+    assert mug.title == "New Mug" and mug.asin is None
+
+
+def test_without_enrichment_products_csv_is_read_as_is(tmp_path):
+    src = tmp_path / "products.csv"
+    write(src, [{"title": "Desk Lamp"}])
+    assert parse_products(str(src), enriched=str(tmp_path / "missing.csv"))[0].asin is None
@@ -0,0 +1,91 @@
+import json
+import os
+import runpy
+
+import openai
+import praw
+import prawcore
+import pytest
+import requests
+import tweepy
+
+import circuit_breaker as cb
+import slack_notifier
+
+
+def x_error(cls, status):
+    r = requests.Response()
+    r.status_code, r._content = status, json.dumps({"errors": [{"message": "x"}]}).encode()
+    return cls(r)
+
+
+class OpenAIResp:
+    headers, request = {}, None
+
+    def __init__(self, status):
+        self.status_code = status
+
+
+def tweepy_transport_error():
+    try:
+        try:
+            raise requests.ConnectionError("connection reset")
+        except requests.ConnectionError as e:
+            raise tweepy.TweepyException(e) from e
+    except tweepy.TweepyException as e:
+        return e
+
+
+@pytest.mark.parametrize("exc, outage", [
+    (x_error(tweepy.Forbidden, 403), False),                               # duplicate content
+    (openai.BadRequestError("bad", response=OpenAIResp(400), body=None), False),
+    (ValueError("bad JSON from the model"), False),
+    (x_error(tweepy.TooManyRequests, 429), True),
+    (x_error(tweepy.TwitterServerError, 503), True),
+    (openai.InternalServerError("down", response=OpenAIResp(500), body=None), True),
+    (openai.APITimeoutError(request=None), True),
+    (requests.ConnectTimeout("slow"), True),
+    (prawcore.RequestException(OSError("dns"), (), {}), True),
+    (tweepy_transport_error(), True),
+    (TimeoutError("read timed out"), True),
+])
+def test_is_outage(exc, outage):
+    assert cb.is_outage(exc) is outage
+
+
+def fail(dep, exc):
+    with pytest.raises(type(exc)):
+        with cb.guard(dep):
+            raise exc
+
+
+def test_client_errors_never_open_the_breaker():
+    for _ in range(cb.MIN_CALLS + 2):
+        fail("x", x_error(tweepy.Forbidden, 403))
+    assert not cb.is_open("x")
+
+
+def test_outages_open_it_and_a_client_error_probe_closes_it(monkeypatch):
+    for _ in range(cb.MIN_CALLS):
+        fail("openai", openai.APITimeoutError(request=None))
+    assert cb.is_open("openai")
+    with pytest.raises(cb.CircuitOpen):
+        with cb.guard("openai"):
+            pass
+
+    monkeypatch.setattr(cb, "OPEN_SECONDS", 0)                       # cooldown over: one probe
+    fail("openai", openai.BadRequestError("bad", response=OpenAIResp(400), body=None))
+    assert cb._get("openai")["state"] == cb.CLOSED                   # it answered, so it is up
+
+
+def test_trend_sniffer_skips_the_run_while_x_is_open(monkeypatch):
+    for _ in range(cb.MIN_CALLS):
+        fail("x", x_error(tweepy.TwitterServerError, 503))
+    slack = []
+    monkeypatch.setattr(slack_notifier, "notify_slack", lambda **k: slack.append(k))
+    monkeypatch.setattr(praw, "Reddit", lambda *a, **k: pytest.fail("fetched trends with X down"))
+
+    path = os.path.join(os.path.dirname(__file__), "..", "trendparasite", "trend_sniffer.py")
+    with pytest.raises(SystemExit):
+        runpy.run_path(path, run_name="__main__")
+    assert slack and "X circuit open" in slack[0]["message_block"]
@@ -0,0 +1,42 @@
+import pytest
+
+from draft_ranker import best_novel, best_of_n, score_draft
+
+
+def drafts(*texts):
+    it = iter(texts)
+    return lambda: next(it)
+
+
+def test_best_of_n_returns_the_highest_local_score():
+    best, scored = best_of_n(drafts("bb", "ccc", "a"), score=len, n=3)
+    assert best == "ccc"
+    assert [sc for sc, _ in scored] == [3, 2, 1]
+
+
+def test_failed_generations_are_dropped_until_none_are_left():
+    def flaky():
+        raise RuntimeError("429")
+    with pytest.raises(RuntimeError):
+        best_of_n(flaky, score=len, n=3)
+
+
+def test_score_rewards_fit_and_keywords_and_penalises_cliches():
+    fit = score_draft("A quiet desk lamp for late work", min_len=20, max_len=40, keywords=["lamp"])
+    cliche = score_draft("A game-changer desk lamp for you", min_len=20, max_len=40, keywords=["lamp"])
+    off = score_draft("Lamp", min_len=20, max_len=40, keywords=["lamp"])
+    assert fit > cliche and fit > off
+
+
+class Index:
+    def __init__(self, posted):
+        self.posted = posted
+
+    def max_similarity(self, text):
+        return 1.0 if text in self.posted else 0.0
+
+
+def test_best_novel_skips_drafts_too_close_to_past_posts():
+    best, _ = best_novel(drafts("posted before!", "fresh"), score=len, text_of=str,
+                         index=Index({"posted before!"}), max_sim=0.6, n=2)
+    assert best == "fresh"
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from engagement_model import DUD_QUANTILE, MIN_TRAIN, EngagementModel, load_examples, train
+from state_store import StateStore
+
+WORDS = "lamp mug desk chair kettle blender pillow charger backpack bottle".split()
+
+
+def examples(n, bot="ProductBot V2", seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"text": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", "bot": bot, "mode": "spiky",
+             "y": float(rng.normal(3.0, 1.0))} for i in range(n)]
+
+
+def test_dud_cut_flags_the_bottom_quantile_of_predictions():
+    ex = examples(80)
+    model = train(ex)
+    assert model.ready
+
+    flagged = np.mean([model.is_dud(e["text"], bot="ProductBot V2", mode="spiky") for e in ex])
+    assert abs(flagged - DUD_QUANTILE) <= 0.05
+
+
+def test_gate_is_neutral_for_bots_missing_from_the_training_set(tmp_path):
+    model = train(examples(80))
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    model = EngagementModel.load(path)
+
+    assert model.bots == {"ProductBot V2": 80}
+    texts = [e["text"] for e in examples(80)]
+    assert any(model.is_dud(t, bot="ProductBot V2", mode="spiky") for t in texts)
+    assert not any(model.is_dud(t, bot="TrendParasite", mode="trend") for t in texts)
+    assert model.z(texts[0], bot="TrendParasite", mode="trend") == 0.0
+
+
+def test_trains_from_the_state_store_posts_and_latest_metrics(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"), migrate=False)
+    for i in range(MIN_TRAIN):
+        store.log_post("ProductBot V2", ts="2026-10-01T14:00:00+00:00", mode="spiky",
+                       tweet_id=str(i), status="success", text=f"{WORDS[i % 10]} deal {i}")
+        store.add_metrics([("2026-10-02T05:15:00+00:00", str(i), 1, 0, 0, 0),
+                           ("2026-10-03T05:15:00+00:00", str(i), i, 0, 0, 0)])
+    store.log_post("ProductBot V2", ts="2026-10-01T14:00:00+00:00", tweet_id="no-metrics", text="x")
+    store.log_post("ProductBot V2", ts="2026-10-01T14:00:00+00:00", tweet_id="no-text")
+    store.add_metrics([("2026-10-02T05:15:00+00:00", "no-text", 5, 0, 0, 0)])
+
+    ex = load_examples(store, products_csv=str(tmp_path / "none.csv"))
+    assert len(ex) == MIN_TRAIN
+    assert ex[7]["y"] == np.log1p(7) and ex[7]["hour"] == 14 and ex[7]["bot"] == "ProductBot V2"
+    assert train(ex).knows("ProductBot V2")
+
+
+def test_three_thousand_posts_train_without_a_dense_design_matrix():
+    rng = np.random.default_rng(1)
+    vocab = [f"w{i}" for i in range(5000)]
+    ex = [{"text": " ".join(rng.choice(vocab, 30)), "bot": "ProductBot V2",
+           "y": float(rng.normal())} for _ in range(3000)]
+    t0 = time.perf_counter()
+    model = train(ex)
+    assert time.perf_counter() - t0 < 10
+    assert model.n == 3000 and np.isfinite(model.w).all()
@@ -0,0 +1,102 @@
+import csv
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import enrich_catalog as ec
+
+LONG = "Ultra quiet cordless handheld vacuum cleaner with washable HEPA filter"   # > 60 chars
+CATALOG = {
+    f"{LONG} (black)": {"asin": "B0AAAAAAA1", "image_url": "/img/black.jpg", "price": "$49"},
+    f"{LONG} (white)": {"image_url": "/img/white.jpg"},                 # no ASIN from the source
+    "Flaky lookup": {"asin": "B0CCCCCCC3"},
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path.startswith("/img/"):
+            return self._send(200, b"\xff\xd8" + url.path.encode(), "image/jpeg")
+        q = urllib.parse.parse_qs(url.query)["q"][0]
+        Handler.hits[q] = Handler.hits.get(q, 0) + 1
+        if q == "Flaky lookup" and Handler.hits[q] == 1:
+            return self._send(503, b"{}")
+        if q not in CATALOG:
+            return self._send(404, b"{}")
+        found = dict(CATALOG[q])
+        if "image_url" in found:
+            found["image_url"] = f"http://{self.headers['Host']}{found['image_url']}"
+        self._send(200, json.dumps(found).encode())
+
+    def _send(self, status, body, ctype="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    Handler.hits = {}
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_run_against_fixture_server(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(ec, "IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.setattr(ec.time, "sleep", lambda _: None)
+    src, dst = tmp_path / "products.csv", tmp_path / "products.enriched.csv"
+    fields = ["title", "asin", "image_path", "price_anchor"]
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerow({"title": f"{LONG} (black)", "price_anchor": "$59 curated"})
+        w.writerow({"title": f"{LONG} (white)"})
+        w.writerow({"title": "Flaky lookup"})
+        w.writerow({"title": "Unknown gadget"})
+
+    stats = ec.run(ec.HttpJsonSource(server), str(src), str(dst), workers=4,
+                   cache_path=str(tmp_path / "enrich_cache.jsonl"))
+    assert stats == {"rows": 4, "cached": 0, "looked_up": 4, "failed": 0}
+
+    with open(dst, encoding="utf-8") as f:
+        out = {r["title"]: r for r in csv.DictReader(f)}
+    black, white = out[f"{LONG} (black)"], out[f"{LONG} (white)"]
+    assert black["asin"] == "B0AAAAAAA1" and black["price_anchor"] == "$59 curated"
+    assert black["image_path"] == "B0AAAAAAA1.jpg"
+    assert white["image_path"] == ec._key({"title": f"{LONG} (white)"}) + ".jpg"
+    assert (tmp_path / "images" / white["image_path"]).read_bytes().endswith(b"/img/white.jpg")
+    assert out["Flaky lookup"]["asin"] == "B0CCCCCCC3" and Handler.hits["Flaky lookup"] == 2
+    assert out["Unknown gadget"]["asin"] == ""
+
+    again = ec.run(ec.HttpJsonSource(server), str(src), str(dst),
+                   cache_path=str(tmp_path / "enrich_cache.jsonl"))
+    assert again["cached"] == 4 and again["looked_up"] == 0
+
+
+def test_source_interface_is_abstract():
+    with pytest.raises(TypeError):
+        ec.ProductSource()
+
+
+def test_each_worker_thread_gets_its_own_session():
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(ec._session())) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(s) for s in sessions}) == 3
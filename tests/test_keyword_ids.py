@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+import trend_sniffer
+from keyword_engine import KeywordEngine
+
+
+def test_full_text_counted_after_listing_title(tmp_path, monkeypatch):
+    monkeypatch.setattr(trend_sniffer, "sample_comments", lambda post: [{"body": "zucchini lasagna recipe", "score": 5, "depth": 0}])
+    post = SimpleNamespace(id="abc123", title="My landlord kept the deposit",
+                           selftext="Photographs prove the carpet was spotless")
+    engine = KeywordEngine(str(tmp_path / "df.json"))
+    trend_sniffer.observe_titles(engine, {post.id: post.title})     # listing pass
+
+    trend_sniffer.analyze_post(post, engine)
+
+    assert engine.n_docs == 2
+    assert engine.df["photographs"] == 1          # selftext reached the DF stats
+    assert engine.df["zucchini"] == 1             # and so did sampled comments
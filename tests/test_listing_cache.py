@@ -0,0 +1,54 @@
+import time
+from types import SimpleNamespace
+
+import listing_cache
+from listing_cache import ListingCache
+
+
+def post(pid, score=100, comments=10):
+    return SimpleNamespace(id=pid, fullname=f"t3_{pid}", title=f"post {pid}", score=score,
+                           num_comments=comments, created_utc=time.time() - 600, stickied=False,
+                           over_18=False, selftext="", subreddit=SimpleNamespace(display_name="all"))
+
+
+class Reddit:
+    def __init__(self):
+        self.pages, self.calls = [], 0
+
+    def subreddit(self, _):
+        return self
+
+    def hot(self, limit):
+        self.calls += 1
+        return self.pages.pop(0)
+
+
+def test_snapshot_serves_a_retry_but_not_the_next_scheduled_run(tmp_path):
+    reddit = Reddit()
+    reddit.pages = [[post("a")], [post("a", score=300)]]
+    cache = ListingCache(str(tmp_path / "listings.json"))
+    cache.listing(reddit, "all")
+
+    cache.data["all"]["fetched_at"] -= 60                         # a retry a minute later
+    _, stats = cache.listing(reddit, "all")
+    assert not stats["fetched"] and reddit.calls == 1
+
+    cache.data["all"]["fetched_at"] -= 4.5 * 60 * 60              # the next scheduled run
+    assert not cache.is_fresh("all")
+    _, stats = cache.listing(reddit, "all")
+    assert stats["fetched"] and reddit.calls == 2
+
+
+def test_refresh_drops_posts_that_left_the_listing(tmp_path):
+    reddit = Reddit()
+    reddit.pages = [[post("a"), post("b")], [post("b", score=500), post("c")]]
+    cache = ListingCache(str(tmp_path / "listings.json"))
+    cache.listing(reddit, "all")
+
+    records, stats = cache.listing(reddit, "all", force=True)
+    assert sorted(r["id"] for r in records) == ["b", "c"]
+    assert stats["dropped"] == 1 and stats["new"] == 1 and stats["changed"] == 1
+
+
+def test_default_path_is_anchored_at_repo_root():
+    assert listing_cache.LISTING_CACHE.startswith(listing_cache.ROOT + "/")
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_ledger
+
+
+class Client:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **_):
+        r = self.results.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=r[0], completion_tokens=r[1]))
+
+
+def test_ledger_totals_tokens_and_cost_per_bot_and_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_ledger, "LEDGER_CSV", str(tmp_path / "ledger.csv"))
+    client = Client((1000, 200), (500, 100), ValueError("bad request"))
+    msgs = [{"role": "user", "content": "hello there"}]
+
+    llm_ledger.tracked_chat(client, bot="ProductBot", mode="spiky", model="gpt-4o-mini", messages=msgs)
+    llm_ledger.tracked_chat(client, bot="ProductBot", mode="spiky", model="gpt-4o-mini", messages=msgs)
+    with pytest.raises(ValueError):
+        llm_ledger.tracked_chat(client, bot="TrendParasite", model="gpt-4o-mini", messages=msgs)
+
+    rows = llm_ledger.load_rows(path=llm_ledger.LEDGER_CSV)
+    product, trend = llm_ledger.summarize(rows)
+    assert product["calls"] == 2 and product["errors"] == 0
+    assert product["prompt_tokens"] == 1500 and product["completion_tokens"] == 300
+    assert product["cost_usd"] == pytest.approx((1500 * 0.15 + 300 * 0.60) / 1e6)
+    assert trend["errors"] == 1                                   # failed calls still land in the ledger
+    assert trend["prompt_tokens"] == llm_ledger.count_message_tokens(msgs, "gpt-4o-mini")
+
+
+def test_trim_to_tokens_fits_the_budget():
+    text = "word " * 400
+    cut = llm_ledger.trim_to_tokens(text, 50)
+    assert llm_ledger.count_tokens(cut) <= 50 and text.startswith(cut)
@@ -0,0 +1,23 @@
+from novelty_index import NoveltyIndex
+
+POSTED = "This retrofit smart lock installs in ten minutes without drilling a single hole"
+
+
+def test_near_duplicates_cross_the_threshold_and_rewrites_do_not(tmp_path):
+    index = NoveltyIndex(str(tmp_path / "novelty.db"))
+    index.add(POSTED, bot="ProductBot", tweet_id="1")
+
+    assert index.max_similarity(POSTED + " #smarthome https://amzn.to/x") == 1.0
+    assert not index.is_novel("This retrofit smart lock installs in ten minutes without drilling a single hole!!",
+                              max_sim=0.6)
+    assert index.is_novel("Blackout curtains that finally let night shift workers sleep past noon", max_sim=0.6)
+    assert index.nearest("unrelated words about kettles and tea") == []
+
+
+def test_index_persists_across_instances(tmp_path):
+    path = str(tmp_path / "novelty.db")
+    NoveltyIndex(path).add(POSTED, bot="TrendParasite")
+
+    reopened = NoveltyIndex(path)
+    assert len(reopened) == 1
+    assert reopened.nearest(POSTED)[0] == (1.0, POSTED)
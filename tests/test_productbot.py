@@ -0,0 +1,54 @@
+import pytest
+
+import productbot_git as pb
+from state_store import StateStore
+
+
+def test_failed_post_leaves_the_variant_queued(tmp_path, monkeypatch):
+    store = StateStore(str(tmp_path / "state.db"), migrate=False)
+    store.queue("ProductBot", {"tweets": ["Queued variant"], "product_title": "Lamp", "link": "https://x",
+                               "hook": "h", "format": "single"})
+
+    def boom(**_):
+        raise RuntimeError("503 Service Unavailable")
+    monkeypatch.setattr(pb.twitter_client, "create_tweet", boom)
+
+    with pytest.raises(RuntimeError):
+        pb.post_queued(store, store.take("ProductBot"))
+    assert store.take("ProductBot")["tweets"] == ["Queued variant"]
+
+
+def test_posted_variant_is_acked(tmp_path, monkeypatch):
+    store = StateStore(str(tmp_path / "state.db"), migrate=False)
+    store.queue("ProductBot", {"tweets": ["Queued variant"], "product_title": "Lamp", "link": "https://x",
+                               "hook": "h", "format": "single"})
+    sent = []
+    monkeypatch.setattr(pb.twitter_client, "create_tweet", lambda **k: sent.append(k))
+    monkeypatch.setattr(pb, "log_tweet", lambda *a: None)
+    monkeypatch.setattr(pb, "notify_slack", lambda *a: None)
+    monkeypatch.setattr(pb.NoveltyIndex, "add", lambda self, text, **k: None)
+
+    pb.post_queued(store, store.take("ProductBot"))
+    assert sent == [{"text": "Queued variant"}]
+    assert store.take("ProductBot") is None
+
+
+def test_near_duplicate_is_not_posted_after_the_retries(tmp_path, monkeypatch):
+    import novelty_index
+    monkeypatch.setattr(novelty_index.NoveltyIndex.__init__, "__defaults__", (str(tmp_path / "novelty.db"),))
+    monkeypatch.setattr(pb, "StateStore", lambda: StateStore(str(tmp_path / "state.db"), migrate=False))
+    monkeypatch.chdir(tmp_path)
+    draft = {"tweet": "This lamp finally fixed my late night desk setup for good",
+             "cta": "Grab one", "hashtags": ["#desk"], "keywords": ["lamp"]}
+    novelty_index.NoveltyIndex().add(draft["tweet"], bot="ProductBot")
+
+    calls, sent, logged = [], [], []
+    monkeypatch.setattr(pb, "get_next_unused_product", lambda: "Desk Lamp")
+    monkeypatch.setattr(pb, "get_ai_tweet", lambda title: calls.append(title) or dict(draft))
+    monkeypatch.setattr(pb.twitter_client, "create_tweet", lambda **k: sent.append(k))
+    monkeypatch.setattr(pb, "log_tweet", lambda *a: logged.append(a[-1]))
+    monkeypatch.setattr(pb, "notify_slack", lambda *a: None)
+
+    pb.post_to_twitter()
+    assert len(calls) == 1 + pb.NOVELTY_RETRIES
+    assert sent == [] and logged == ["novelty_reject"]
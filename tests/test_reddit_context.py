@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+
+import analysis_cache
+import keyword_engine
+import reddit_corpus
+import trend_sniffer
+from reddit_corpus import RedditCorpus
+
+
+@pytest.fixture
+def corpus_path(tmp_path, monkeypatch):
+    for cls, name in ((reddit_corpus.RedditCorpus, "corpus.db"),
+                      (analysis_cache.AnalysisCache, "analysis.json"),
+                      (keyword_engine.KeywordEngine, "keyword_df.json")):
+        monkeypatch.setattr(cls.__init__, "__defaults__", (str(tmp_path / name),))
+    path = str(tmp_path / "corpus.db")
+    corpus = RedditCorpus(path)
+    corpus.add_posts([{"id": "loc1", "subreddit": "antiwork", "title": "Landlord banned smart locks",
+                       "selftext": "The landlord says smart locks are a fire hazard", "score": 420,
+                       "num_comments": 12, "created_utc": 1.8e9}])
+    corpus.add_comments("loc1", [{"body": "Ask the landlord for that rule in writing", "score": 30}])
+    corpus.close()
+    return path
+
+
+def reddit_with(search=None, submission=None):
+    return SimpleNamespace(subreddit=lambda _: SimpleNamespace(search=search), submission=submission)
+
+
+def test_failed_live_search_keeps_the_local_hits(corpus_path, monkeypatch):
+    def search(*a, **k):
+        raise TimeoutError("read timed out")
+    monkeypatch.setattr(trend_sniffer, "reddit_client", lambda: reddit_with(search))
+
+    context = trend_sniffer.fetch_reddit_context("landlord smart locks")
+
+    assert not context.startswith("Context fetch failed")
+    assert "Landlord banned smart locks" in context
+
+
+class Unreachable:
+    """A lazy praw Submission whose fetch fails: any data attribute triggers it."""
+    fetches = 0
+
+    def __init__(self, id):
+        self.id = id
+
+    def __getattr__(self, name):
+        if name in ("comment_sort", "comment_limit"):
+            raise AttributeError(name)
+        type(self).fetches += 1
+        raise ConnectionError("reddit unreachable")
+
+    def __setattr__(self, name, value):
+        if name != "id":
+            return                      # comment_sort / comment_limit before the fetch
+        object.__setattr__(self, name, value)
+
+
+def test_comment_fetch_outage_counts_against_the_breaker_once(tmp_path, monkeypatch):
+    import circuit_breaker
+    monkeypatch.setattr(reddit_corpus.RedditCorpus.__init__, "__defaults__", (str(tmp_path / "corpus.db"),))
+    monkeypatch.setattr(analysis_cache.AnalysisCache.__init__, "__defaults__", (str(tmp_path / "a.json"),))
+    monkeypatch.setattr(keyword_engine.KeywordEngine.__init__, "__defaults__", (str(tmp_path / "df.json"),))
+    corpus = RedditCorpus()
+    corpus.add_posts([{"id": "nocm", "subreddit": "antiwork", "title": "Landlord banned smart locks",
+                       "selftext": "", "score": 420, "num_comments": 12, "created_utc": 1.8e9}])
+    corpus.close()
+    monkeypatch.setattr(trend_sniffer, "CORPUS_MIN_HITS", 1)
+    monkeypatch.setattr(trend_sniffer, "reddit_client", lambda: reddit_with(submission=Unreachable))
+
+    context = trend_sniffer.fetch_reddit_context("landlord smart locks")
+
+    assert "Landlord banned smart locks" in context              # listing text still used
+    assert Unreachable.fetches == 1
+    outcomes = circuit_breaker._get("reddit")["outcomes"]
+    assert [o[1] for o in outcomes] == [0]
+    assert analysis_cache.AnalysisCache().get(SimpleNamespace(id="nocm", num_comments=12)) is None
@@ -0,0 +1,32 @@
+import reddit_corpus
+
+
+def test_default_path_is_anchored_at_repo_root():
+    assert reddit_corpus.REDDIT_CORPUS.startswith(reddit_corpus.ROOT + "/")
+
+
+def post(pid, title, selftext="", created=1.8e9):
+    return {"id": pid, "subreddit": "antiwork", "title": title, "selftext": selftext,
+            "score": 10, "num_comments": 3, "created_utc": created}
+
+
+def test_add_then_search_round_trips_posts_and_comments(tmp_path):
+    corpus = reddit_corpus.RedditCorpus(str(tmp_path / "corpus.db"))
+    assert corpus.add_posts([post("a", "Landlord banned smart locks", "fire hazard, he says"),
+                             post("b", "My cat learned to open the fridge")]) == 2
+    assert corpus.add_posts([post("a", "Landlord banned smart locks")]) == 0     # upsert, not a duplicate
+    corpus.add_comments("a", [{"body": "Get the rule in writing", "score": 40}])
+
+    hits = corpus.search("landlord banning locks")                  # matches across inflections
+    assert [p.id for p in hits] == ["a"]
+    assert hits[0].comments[0].body == "Get the rule in writing"
+    assert [p.id for p in corpus.search("writing rule")] == []      # comments alone don't cover the title terms
+    assert corpus.search("fridge cat")[0].id == "b"
+
+
+def test_prune_drops_old_posts_from_the_index(tmp_path):
+    corpus = reddit_corpus.RedditCorpus(str(tmp_path / "corpus.db"))
+    corpus.add_posts([post("old", "Landlord banned smart locks", created=0.0),
+                      post("new", "Landlord banned smart doorbells")])
+    assert corpus.prune(now=1.8e9) == 1
+    assert [p.id for p in corpus.search("landlord banned")] == ["new"] and len(corpus) == 1
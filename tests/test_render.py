@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from render import FORMATS, Generation, render, truncate, weighted_length
+
+UTILS = os.path.join(os.path.dirname(__file__), "..", "utils")
+
+
+def test_unset_repo_variable_means_no_variants():
+    # an unset variable in a workflow env block arrives as an empty string
+    out = subprocess.run([sys.executable, "-c", "import render; print(render.RENDER_ACCOUNTS)"],
+                         cwd=UTILS, env=dict(os.environ, RENDER_ACCOUNTS=""),
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "{}"
+
+
+@pytest.mark.parametrize("text, n", [
+    ("hello", 5),
+    ("see https://example.com/a/very/long/path?with=query", 4 + 23),   # any URL counts 23
+    ("ok 👍", 3 + 2),
+    ("family 👨‍👩‍👧", 7 + 2),                                            # one ZWJ sequence
+    ("日本", 4),                                                         # CJK weighs 2
+    ("🇺🇸", 2),                                                          # flag pair
+])
+def test_weighted_length(text, n):
+    assert weighted_length(text) == n
+
+
+def test_truncate_cuts_at_a_word_with_an_ellipsis():
+    text = "one two three four five six"
+    out = truncate(text, 15)                                # "…" itself weighs 2
+    assert out == "one two three…" and weighted_length(out) == 15
+    assert truncate(text, 100) == text
+
+
+def test_truncate_never_splits_an_emoji_sequence():
+    out = truncate("👨‍👩‍👧" * 10, 7)
+    assert weighted_length(out) <= 7 and out.endswith("…")
+
+
+def test_render_keeps_every_tweet_within_its_limit_and_the_link_whole():
+    gen = Generation(hook="word " * 80, claims=["claim " * 20], benefits=["benefit " * 20],
+                     cta="Grab it", hashtags=["one", "two"])
+    link = "https://www.amazon.com/dp/B000000000/?tag=example-20"
+    for fmt, f in FORMATS.items():
+        tweets = render(gen, fmt, link)
+        assert all(weighted_length(t) <= lim for t, lim in zip(tweets, f.limits))
+        assert link in tweets[-1]
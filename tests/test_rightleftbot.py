@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import rightleftbot as rl
+
+
+class Resp:
+    def __init__(self, status, body):
+        self.status_code, self._body, self.headers, self.text = status, body, {}, json.dumps(body)
+        self.ok = status < 400
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(rl, "NEWS_CACHE", str(tmp_path / "news_page.json"))
+    monkeypatch.setattr(rl, "QUEUE_FILE", str(tmp_path / "queue.json"))
+    monkeypatch.setattr(rl, "notify_slack", lambda *a, **k: None)
+    return tmp_path
+
+
+@pytest.mark.parametrize("status", [401, 422])
+def test_client_error_keeps_cached_page(files, monkeypatch, status):
+    page = [{"title": "Cached story", "article_id": "a1"}]
+    rl.save_json(rl.NEWS_CACHE, {"fetched_at": 0, "etag": None, "articles": page})
+    monkeypatch.setattr(rl.requests, "get", lambda *a, **k: Resp(status, {"status": "error", "results": {"message": "x"}}))
+
+    assert rl.fetch_news_page() == page
+    assert rl.load_json(rl.NEWS_CACHE, {})["articles"] == page      # not overwritten
+
+
+def test_failed_post_requeues_take(files, monkeypatch):
+    take = {"article_id": "a1", "title": "t", "tone": "left", "tweet": "hot take", "created": 9e12}
+    rl.save_json(rl.QUEUE_FILE, [take])
+
+    def boom(**_):
+        raise RuntimeError("403 duplicate content")
+    monkeypatch.setattr(rl.twitter_client, "create_tweet", boom)
+
+    with pytest.raises(RuntimeError):
+        rl.post_from_queue()
+    assert rl.load_json(rl.QUEUE_FILE, []) == [take]
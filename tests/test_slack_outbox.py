@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import slack_notifier as sn
+
+
+class Resp:
+    status_code, text = 200, "ok"
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    path = tmp_path / "slack_outbox.jsonl"
+    monkeypatch.setattr(sn, "SLACK_OUTBOX", str(path))
+    monkeypatch.setenv("SLACK_WEBHOOK_URL", "https://hooks.example/x")
+    return path
+
+
+def test_torn_line_is_skipped_and_the_rest_sent(outbox, monkeypatch):
+    outbox.write_text(json.dumps({"text": "a"}) + "\n" + '{"text": "b' + "\n" + json.dumps({"text": "c"}) + "\n")
+    sent = []
+    monkeypatch.setattr(sn.requests, "post", lambda url, json, timeout: sent.append(json) or Resp())
+
+    sn.notify_slack("Bot", "success", "now")
+
+    assert sent[1:] == [{"text": "a"}, {"text": "c"}]
+    assert not outbox.exists()
+
+
+def test_unsent_payloads_stay_parked(outbox, monkeypatch):
+    parked = [{"text": "a"}, {"text": "b"}, {"text": "c"}]
+    outbox.write_text("".join(json.dumps(p) + "\n" for p in parked))
+    calls = []
+
+    def post(url, json, timeout):
+        calls.append(json)
+        if len(calls) == 3:                                   # live message, "a", then "b" fails
+            raise sn.requests.ConnectionError("webhook down")
+        return Resp()
+    monkeypatch.setattr(sn.requests, "post", post)
+
+    sn.notify_slack("Bot", "success", "now")
+
+    assert [json.loads(ln) for ln in outbox.read_text().splitlines()] == parked[1:]
+
+
+def test_outbox_survives_a_run_killed_mid_flush(outbox, monkeypatch):
+    parked = [{"text": "a"}, {"text": "b"}]
+    outbox.write_text("".join(json.dumps(p) + "\n" for p in parked))
+    calls = []
+
+    def post(url, json, timeout):
+        calls.append(json)
+        if len(calls) == 2:
+            raise KeyboardInterrupt                          # runner cancelled mid-send
+        return Resp()
+    monkeypatch.setattr(sn.requests, "post", post)
+
+    with pytest.raises(KeyboardInterrupt):
+        sn.notify_slack("Bot", "success", "now")
+    assert [json.loads(ln) for ln in outbox.read_text().splitlines()] == parked
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+from dataclasses import asdict
+
+import pytest
+
+import novelty_index
+from circuit_breaker import CircuitOpen
+from state_store import StateStore
+
+V2_DIR = os.path.join(os.path.dirname(__file__), "..", "Product Bot V2")
+POSTED = "Your desk lamp is lying to you about how bright your room really is"
+
+
+@pytest.fixture(scope="module")
+def v2():
+    made = [d for d in ("logs", "state") if not os.path.exists(os.path.join(V2_DIR, d))]
+    import product_bot_v2
+    yield product_bot_v2
+    for d in made:                                           # created at import time
+        shutil.rmtree(os.path.join(V2_DIR, d), ignore_errors=True)
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setattr(novelty_index.NoveltyIndex.__init__, "__defaults__", (str(tmp_path / "novelty.db"),))
+    novelty_index.NoveltyIndex().add(POSTED)
+    return StateStore(str(tmp_path / "state.db"), migrate=False)
+
+
+def test_v2_falls_back_to_a_novel_spare(v2, state, monkeypatch):
+    lamp = v2.Product("Desk lamp", "B0LAMP0001", "home", ["lamp"], None, ["bright"], None)
+    for hook in (POSTED, "Three hours of glare later, this lamp fixed my headaches"):
+        state.queue(v2.SPARE_ACCOUNT, {"mode": "spiky", "product": asdict(lamp),
+                                       "generation": v2.Generation(hook=hook).as_dict()})
+    monkeypatch.setattr(v2, "STATE", state)
+
+    def down(mode, product):
+        raise CircuitOpen("openai circuit open")
+    monkeypatch.setattr(v2, "ai_generate_best", down)
+    other = v2.Product("Mug", None, None, [], None, [], None)
+
+    draft = v2.generate_or_spare("calm", other, "https://example/mug")
+    assert draft["generation"]["hook"].startswith("Three hours of glare")
+    assert draft["mode"] == "spiky" and draft["link"] == v2.build_aff_link(lamp, "spiky")
+
+    with pytest.raises(CircuitOpen):                         # no spares left
+        v2.generate_or_spare("calm", other, "https://example/mug")
+
+
+def test_trend_spare_skips_drafts_too_close_to_past_posts(state, monkeypatch):
+    import trend_sniffer as ts
+    monkeypatch.setattr(ts, "StateStore", lambda: state)
+    for text in (POSTED, "Nobody in this thread has actually read the bill"):
+        state.queue(ts.SPARE_ACCOUNT, {"trend": {"title": "t"}, "context": "", "link": "",
+                                       "raw": json.dumps({"tweet": text, "cta": "c", "hashtag": "#x"})})
+
+    spare = ts.take_spare()
+    assert "read the bill" in spare["raw"]
+    assert ts.take_spare() is None
@@ -0,0 +1,42 @@
+import pytest
+
+import state_store
+from state_store import StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / "state.db"), migrate=False)
+
+
+def test_claim_hands_out_each_key_once(store):
+    keys = ["a", "b", "c"]
+    got = {store.claim("bot", keys) for _ in keys}
+    assert got == set(keys)
+    assert store.claim("bot", keys) is None
+    assert store.claim("bot", keys, reset_when_empty=True) in keys
+
+
+def test_take_is_a_lease_until_acked(store):
+    store.queue("ProductBot", {"tweets": ["one"]})
+    store.queue("ProductBot", {"tweets": ["two"]})
+
+    first = store.take("ProductBot")
+    assert first["tweets"] == ["one"]
+    assert store.take("ProductBot")["tweets"] == ["two"]         # leased: nobody else gets "one"
+    assert store.take("ProductBot") is None
+
+    store.release(first["outbox_id"])                           # post failed
+    again = store.take("ProductBot")
+    assert again == first
+    store.ack(again["outbox_id"])
+    store.release(again["outbox_id"])                           # too late: it was posted
+    assert store.take("ProductBot") is None
+
+
+def test_expired_lease_comes_back(store, monkeypatch):
+    store.queue("ProductBot", {"tweets": ["one"]})
+    item = store.take("ProductBot")
+    monkeypatch.setattr(state_store, "OUTBOX_LEASE", -1)         # job died without ack/release
+    assert store.take("ProductBot") == item
+
@@ -0,0 +1,32 @@
+from story_cluster import cluster, rank_stories
+
+PAGE = [
+    "Senate passes bipartisan infrastructure bill after marathon vote",
+    "Infrastructure bill clears Senate in bipartisan marathon vote",
+    "Senate approves bipartisan infrastructure bill after marathon vote",
+    "Wildfire forces evacuations across northern California towns",
+    "Tech giant unveils new smartphone with foldable display",
+    "Central bank holds interest rates steady amid inflation worries",
+    "Star striker signs record transfer deal with rival club",
+    "Scientists discover new species of deep sea fish near Japan",
+    "Airline cancels hundreds of flights as storm hits east coast",
+    "Museum returns looted artifacts to their country of origin",
+]
+
+
+def test_three_outlet_story_clusters_on_small_page():
+    groups = cluster(PAGE)
+    assert sorted(groups[0]) == [0, 1, 2]
+    assert all(len(g) == 1 for g in groups[1:])
+
+
+def test_rank_stories_puts_widest_coverage_first():
+    stories = rank_stories(PAGE, lambda t: t)
+    assert stories[0]["size"] == 3
+    assert len(stories) == 8
+
+
+def test_common_terms_still_dropped_on_large_corpus():
+    # "update" appears in every doc; alone it must not merge unrelated stories
+    docs = [f"update on topic{i} alpha{i} beta{i}" for i in range(60)]
+    assert all(len(g) == 1 for g in cluster(docs))
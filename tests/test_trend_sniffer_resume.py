@@ -0,0 +1,41 @@
+import json
+import os
+import runpy
+import time
+
+import praw
+import tweepy
+
+import novelty_index
+import post_journal
+import slack_notifier
+
+SNIFFER = os.path.join(os.path.dirname(__file__), "..", "trendparasite", "trend_sniffer.py")
+
+
+def test_crash_before_generated_reuses_the_journaled_draft(tmp_path, monkeypatch):
+    raw = json.dumps({"tweet": "Everyone argues about the vote, nobody read the bill",
+                      "cta": "Read it first", "hashtag": "#Senate"})
+    entry = {"id": "abc123", "bot": "trendparasite", "created": time.time(), "status": "pending",
+             "attempts": 1, "steps": {},
+             "data": {"trend": {"title": "Senate vote"}, "context": "ctx", "raw": raw, "link": ""}}
+    (tmp_path / "trendparasite.json").write_text(json.dumps(entry))
+    monkeypatch.setattr(post_journal.PostJournal.__init__, "__defaults__", (str(tmp_path),))
+
+    posted, slack = [], []
+    class Client:
+        def __init__(self, **_): pass
+        def create_tweet(self, text): posted.append(text)
+    def no_reddit(*a, **k):
+        raise AssertionError("resumed run must not fetch trends")
+    monkeypatch.setattr(tweepy, "Client", Client)
+    monkeypatch.setattr(praw, "Reddit", no_reddit)
+    monkeypatch.setattr(novelty_index.NoveltyIndex.__init__, "__defaults__", (str(tmp_path / "novelty.db"),))
+    monkeypatch.setattr(slack_notifier, "notify_slack", lambda **k: slack.append(k))
+
+    runpy.run_path(SNIFFER, run_name="__main__")
+
+    assert len(posted) == 1 and posted[0].startswith("Everyone argues about the vote")
+    assert slack[-1]["status"] == "success"
+    done = json.loads((tmp_path / "trendparasite.json").read_text())
+    assert done["status"] == "done" and {"generated", "posted", "logged"} <= set(done["steps"])
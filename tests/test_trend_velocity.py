@@ -0,0 +1,70 @@
+from trend_velocity import MIN_GAP, TrendVelocity
+
+
+def store(tmp_path):
+    return TrendVelocity(str(tmp_path / "velocity.npz"), max_posts=8)
+
+
+def test_same_post_from_two_listings_is_one_sample(tmp_path):
+    v = store(tmp_path)
+    # r/all and the post's own sub, sampled four seconds apart
+    assert v.record([("p1", 1000.0, 500, 40), ("p1", 1004.0, 507, 40)]) == 1
+    assert v.momentum() == {}
+
+
+def test_velocity_needs_samples_half_an_hour_apart(tmp_path):
+    v = store(tmp_path)
+    v.record([("p1", 0.0, 100, 10)])
+    v.record([("p1", 60.0, 110, 10)])                     # a minute later: ignored
+    assert v.momentum() == {}
+
+    v.record([("p1", float(MIN_GAP), 150, 20)])
+    m = v.momentum()["p1"]
+    assert m["velocity"] == 100.0                          # +50 over half an hour
+    assert m["comment_velocity"] == 20.0
+
+
+def test_two_scheduled_runs_give_every_listed_post_a_momentum(tmp_path, monkeypatch):
+    import time
+    from types import SimpleNamespace
+
+    import keyword_engine
+    import listing_cache
+    import reddit_corpus
+    import trend_sniffer
+    import trend_velocity
+
+    clock = [1_800_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    monkeypatch.setattr(trend_sniffer, "_HISTORY", str(tmp_path / "used_trends.json"))
+    for cls, name in ((listing_cache.ListingCache, "listings.json"),
+                      (trend_velocity.TrendVelocity, "velocity.npz"),
+                      (reddit_corpus.RedditCorpus, "corpus.db"),
+                      (keyword_engine.KeywordEngine, "keyword_df.json")):
+        defaults = list(cls.__init__.__defaults__)
+        defaults[0] = str(tmp_path / name)
+        monkeypatch.setattr(cls.__init__, "__defaults__", tuple(defaults))
+
+    runs = [0]
+    def hot(limit):
+        return [SimpleNamespace(id=f"p{i}", fullname=f"t3_p{i}", title=f"A long enough headline {i}",
+                                score=100 + 400 * runs[0] * i, num_comments=10, created_utc=clock[0] - 3600,
+                                stickied=False, over_18=False, selftext="",
+                                subreddit=SimpleNamespace(display_name="all")) for i in range(1, 4)]
+    reddit = SimpleNamespace(subreddit=lambda _: SimpleNamespace(hot=hot))
+    monkeypatch.setattr(trend_sniffer, "reddit_client", lambda: reddit)
+    monkeypatch.setattr(trend_sniffer.time, "sleep", lambda _: None)
+
+    trend_sniffer.fetch_reddit_trends()                   # 18:00 UTC run
+    clock[0] += 4.5 * 60 * 60
+    runs[0] += 1
+    trend_sniffer.fetch_reddit_trends()                   # 22:30 UTC run
+
+    m = trend_velocity.TrendVelocity().momentum()
+    assert set(m) == {"p1", "p2", "p3"}
+    assert m["p3"]["velocity"] > m["p1"]["velocity"] > 0
+
+
+def test_default_path_is_anchored_at_repo_root():
+    import trend_velocity
+    assert trend_velocity.VELOCITY_STORE.startswith(trend_velocity.ROOT + "/")
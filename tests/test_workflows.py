@@ -0,0 +1,67 @@
+import glob
+import os
+
+import yaml
+
+WORKFLOWS = os.path.join(os.path.dirname(__file__), "..", ".github", "workflows")
+STATE_SCRIPTS = ("harvest_metrics.py", "productbot_git.py")
+
+
+def state_jobs():
+    paths = glob.glob(os.path.join(WORKFLOWS, "*.yml")) + [os.path.join(WORKFLOWS, "productbot-metrics")]
+    for path in paths:
+        wf = yaml.safe_load(open(path, encoding="utf-8"))
+        for name, job in wf["jobs"].items():
+            runs = " ".join(str(s.get("run", "")) for s in job["steps"])
+            if any(s in runs for s in STATE_SCRIPTS) and "# python" not in runs:
+                yield os.path.basename(path), name, wf, job
+
+
+def test_every_state_db_writer_restores_and_saves_its_own_snapshot():
+    jobs = list(state_jobs())
+    assert {j for _, _, _, job in jobs for j in STATE_SCRIPTS
+            if j in " ".join(str(s.get("run", "")) for s in job["steps"])} == set(STATE_SCRIPTS)
+    for path, name, wf, job in jobs:
+        caches = [s["with"] for s in job["steps"] if str(s.get("uses", "")).startswith("actions/cache")]
+        state = [c for c in caches if ".cache/state.db*" in str(c["path"]).split()]
+        if path.startswith("test_"):
+            assert not state, f"dry run {path} must not touch the shared state.db"
+            continue
+        assert state, f"{path}:{name} has no state.db cache"
+        assert state[0]["restore-keys"] == "state-db-"
+        assert "github.run_id" in state[0]["key"] and "github.workflow" in state[0]["key"]
+        assert caches.index(state[0]) == len(caches) - 1, f"{path}:{name} restores state.db before .cache"
+        group = job.get("concurrency") or wf.get("concurrency")
+        assert group and group["group"] == "product-state" and group["cancel-in-progress"] is False
+
+
+def all_jobs():
+    for path in glob.glob(os.path.join(WORKFLOWS, "*.yml")):
+        wf = yaml.safe_load(open(path, encoding="utf-8"))
+        for name, job in wf["jobs"].items():
+            runs = " ".join(str(s.get("run", "")) for s in job["steps"])
+            caches = [s["with"] for s in job["steps"] if str(s.get("uses", "")).startswith("actions/cache")]
+            yield os.path.basename(path), name, runs, caches
+
+
+def test_every_posting_bot_shares_one_novelty_index():
+    posting = [(p, n, caches) for p, n, runs, caches in all_jobs()
+               if not p.startswith("test_") and ("trend_sniffer.py" in runs or "productbot_git.py" in runs)]
+    assert len(posting) == 3
+    for path, name, caches in posting:
+        novelty = [c for c in caches if c["path"] == ".cache/novelty.db"]
+        assert novelty, f"{path}:{name} has no novelty index cache"
+        assert novelty[0]["restore-keys"] == "novelty-db-" and novelty[0]["key"].startswith("novelty-db-")
+        assert caches.index(novelty[0]) > [c["path"] for c in caches].index(".cache")
+
+
+def test_bots_do_not_restore_each_others_cache():
+    bots = ("trend_sniffer.py", "productbot_git.py", "rightleftbot.py")
+    lineage = {}
+    for path, name, runs, caches in all_jobs():
+        for c in caches:
+            assert c["key"].startswith(c["restore-keys"]), f"{path}:{name} restores {c['restore-keys']}*"
+            if c["path"] == ".cache":
+                lineage.setdefault(c["restore-keys"], set()).update(b for b in bots if b in runs)
+    assert all(len(b) == 1 for b in lineage.values()), lineage
+    assert not any(a != b and b.startswith(a) for a in lineage for b in lineage), lineage
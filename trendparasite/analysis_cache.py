@@ -0,0 +1,61 @@
+# analysis_cache.py — per-submission analysis reused across runs
+#
+# fetch_reddit_context derives the same features (polarity, term counts, top
+# comment) for popular posts run after run, each time refetching their
+# comments. This caches them by submission id together with a watermark of
+# `edited` and `num_comments`. An entry is recomputed only when the post was
+# edited or its comment count grew by more than COMMENT_GROWTH (plus
+# COMMENT_SLACK), so a couple of new comments don't force a refetch. Entries
+# are evicted least-recently-used beyond ANALYSIS_MAX.
+import os
+import json
+import time
+from typing import Dict, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ANALYSIS_CACHE = os.getenv("ANALYSIS_CACHE", os.path.join(ROOT, ".cache", "post_analysis.json"))
+ANALYSIS_MAX   = 5000
+COMMENT_GROWTH = 0.25
+COMMENT_SLACK  = 5
+
+
+def watermark(post) -> list:
+    return [getattr(post, "edited", False) or False, getattr(post, "num_comments", 0) or 0]
+
+def _stale(old: list, new: list) -> bool:
+    if old[0] != new[0]:
+        return True
+    return new[1] > old[1] * (1 + COMMENT_GROWTH) + COMMENT_SLACK
+
+
+class AnalysisCache:
+    def __init__(self, path: str = ANALYSIS_CACHE):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.items: Dict[str, Dict] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.items = {}
+        self.hits = self.misses = 0
+
+    def get(self, post) -> Optional[Dict]:
+        e = self.items.get(post.id)
+        if e is None or _stale(e["wm"], watermark(post)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        e["used"] = time.time()
+        return e["a"]
+
+    def put(self, post, analysis: Dict) -> None:
+        self.items[post.id] = {"wm": watermark(post), "used": time.time(), "a": analysis}
+
+    def save(self) -> None:
+        if len(self.items) > ANALYSIS_MAX:
+            keep = sorted(self.items.items(), key=lambda kv: kv[1]["used"], reverse=True)[:ANALYSIS_MAX]
+            self.items = dict(keep)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.items, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
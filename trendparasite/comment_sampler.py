@@ -0,0 +1,75 @@
+# comment_sampler.py — top comments from a bounded walk of the comment tree
+#
+# Asks Reddit for a small, score-sorted forest (comment_sort="top",
+# comment_limit=budget) and never expands "load more" stubs. The tree is walked
+# breadth-first down to COMMENT_DEPTH, looking at up to COMMENT_BREADTH
+# children per node, and the best COMMENT_TOP_K comments are kept in a
+# min-heap. The walk stops once COMMENT_BUDGET comments have been visited.
+# With gravity > 0 the priority is score / (age_h + 2) ** gravity (same shape
+# as trend_score), so fresh comments beat old ones at equal score.
+# Errors from fetching the submission propagate, so the caller can count them
+# against the reddit breaker; only a malformed tree is tolerated mid-walk.
+import os
+import time
+import heapq
+import itertools
+from collections import deque
+from typing import Dict, List
+
+COMMENT_TOP_K   = int(os.getenv("COMMENT_TOP_K", "5"))
+COMMENT_DEPTH   = int(os.getenv("COMMENT_DEPTH", "1"))      # 0 = top-level only
+COMMENT_BREADTH = int(os.getenv("COMMENT_BREADTH", "8"))
+COMMENT_BUDGET  = int(os.getenv("COMMENT_BUDGET", "30"))
+COMMENT_GRAVITY = float(os.getenv("COMMENT_GRAVITY", "0"))  # 0 = pure score
+COMMENT_CHARS   = 300
+
+_cache: Dict[str, List[Dict]] = {}      # per run: summary, sentiment and keywords share one walk
+
+
+def _priority(c, now: float, gravity: float) -> float:
+    score = getattr(c, "score", 0) or 0
+    if not gravity:
+        return score
+    age_h = max(now - (getattr(c, "created_utc", now) or now), 0) / 3600
+    return score / (age_h + 2) ** gravity
+
+def sample_comments(post, k: int = COMMENT_TOP_K, depth: int = COMMENT_DEPTH,
+                    breadth: int = COMMENT_BREADTH, budget: int = COMMENT_BUDGET,
+                    gravity: float = COMMENT_GRAVITY) -> List[Dict]:
+    """Best `k` comments of `post` as {"body", "score", "depth"}, best first."""
+    key = f"{post.id}:{k}:{depth}:{breadth}:{budget}:{gravity}"
+    if key in _cache:
+        return _cache[key]
+
+    try:
+        post.comment_sort = "top"       # only takes effect before the first fetch
+        post.comment_limit = budget
+    except AttributeError:
+        pass
+
+    now = time.time()
+    heap, seq, visited = [], itertools.count(), 0
+    forest = post.comments              # a Submission's one lazy fetch
+    try:
+        queue = deque((c, 0) for c in itertools.islice(forest, breadth))
+        while queue and visited < budget:
+            c, d = queue.popleft()
+            body = getattr(c, "body", None)
+            if body is None:            # MoreComments stub: never expanded
+                continue
+            visited += 1
+            if body not in ("[deleted]", "[removed]"):
+                item = (_priority(c, now, gravity), next(seq),
+                        {"body": body[:COMMENT_CHARS], "score": getattr(c, "score", 0), "depth": d})
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+            if d < depth:
+                queue.extend((r, d + 1) for r in itertools.islice(getattr(c, "replies", ()), breadth))
+    except Exception as e:
+        print(f"[comments] {getattr(post, 'id', '?')}: {type(e).__name__}: {e}")
+
+    out = [item[2] for item in sorted(heap, key=lambda x: (-x[0], x[1]))]
+    _cache[key] = out
+    return out
@@ -0,0 +1,100 @@
+# listing_cache.py — on-disk snapshots of subreddit hot listings
+#
+# Each sub keeps a snapshot {fullname: record} plus when it was last fetched.
+# Inside LISTING_FRESH seconds the snapshot is served with no network call;
+# after that one listing request is merged in by fullname; every post's
+# score/comments are refreshed, and posts that are new or moved beyond the
+# deltas are counted as changed.
+# Posts that fell out of hot are dropped on that refresh.
+#
+# LISTING_FRESH is kept well under the gap between scheduled trend runs
+# (4.5 h, then overnight), so every scheduled run refetches and the velocity
+# tracker gets a new sample per post; only a run within half an hour of the
+# last fetch (a retry, or right after the poller) reuses the snapshot. It
+# equals trend_velocity.MIN_GAP: a younger snapshot would not give a sample.
+import os
+import json
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LISTING_CACHE  = os.getenv("LISTING_CACHE", os.path.join(ROOT, ".cache", "reddit_listings.json"))
+LISTING_FRESH  = int(os.getenv("LISTING_FRESH", str(30 * 60)))    # skip network inside this window
+LISTING_MAXAGE = 24 * 60 * 60                                      # drop posts older than this
+SCORE_DELTA    = 0.10                                              # >10% score move = changed
+COMMENT_DELTA  = 5
+
+FIELDS = ("id", "fullname", "title", "score", "num_comments", "created_utc",
+          "stickied", "over_18", "selftext")
+
+
+def to_record(post) -> Dict:
+    rec = {f: getattr(post, f, None) for f in FIELDS}
+    rec["subreddit"] = post.subreddit.display_name
+    rec["selftext"] = (rec["selftext"] or "")[:500]
+    return rec
+
+def _changed(old: Dict, new: Dict) -> bool:
+    if abs(new["score"] - old["score"]) > SCORE_DELTA * max(old["score"], 10):
+        return True
+    return abs(new["num_comments"] - old["num_comments"]) >= COMMENT_DELTA
+
+
+class ListingCache:
+    def __init__(self, path: str = LISTING_CACHE):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.data = {}
+        self.requests = 0
+
+    def is_fresh(self, sub: str) -> bool:
+        """True when `listing()` would be served without a network call."""
+        return time.time() - self.data.get(sub, {}).get("fetched_at", 0) < LISTING_FRESH
+
+    def listing(self, reddit, sub: str, limit: int = 40, force: bool = False,
+                offline: bool = False) -> Tuple[List[Dict], Dict]:
+        """Records for `sub`, newest snapshot first; stats say what happened.
+        `offline` serves the snapshot as-is, however old."""
+        now = time.time()
+        snap = self.data.setdefault(sub, {"fetched_at": 0, "posts": {}})
+        posts = snap["posts"]
+        stats = {"sub": sub, "fetched": False, "new": 0, "changed": 0, "unchanged": 0, "dropped": 0}
+
+        if not offline and (force or now - snap["fetched_at"] >= LISTING_FRESH):
+            self.requests += 1
+            stats["fetched"] = True
+            listed = set()
+            for p in reddit.subreddit(sub).hot(limit=limit):
+                rec = to_record(p)
+                listed.add(rec["fullname"])
+                old = posts.get(rec["fullname"])
+                if old is None:
+                    stats["new"] += 1
+                elif _changed(old, rec):
+                    stats["changed"] += 1
+                else:
+                    stats["unchanged"] += 1
+                    old.update(score=rec["score"], num_comments=rec["num_comments"], last_seen=now)
+                    continue
+                rec["first_seen"] = old["first_seen"] if old else now
+                rec["last_seen"] = now
+                posts[rec["fullname"]] = rec
+            stats["dropped"] = len(posts) - len(listed)
+            for fn in [fn for fn in posts if fn not in listed]:
+                del posts[fn]
+            snap["fetched_at"] = now
+
+        for fn in [fn for fn, r in posts.items() if now - r["created_utc"] > LISTING_MAXAGE]:
+            del posts[fn]
+        ordered = sorted(posts.values(), key=lambda r: r["last_seen"], reverse=True)
+        return ordered, stats
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
@@ -0,0 +1,146 @@
+# reddit_corpus.py — local full-text store of every Reddit post we ingest
+#
+# Posts from the hot listings and from live context searches, plus the
+# comments sampled for them, go into SQLite with an FTS5 index over
+# title / selftext / comments. fetch_reddit_context asks here first and only
+# falls back to a live search on a miss. Posts older than CORPUS_MAX_AGE are
+# pruned, and the table is capped at CORPUS_MAX_POSTS.
+#
+#   python trendparasite/reddit_corpus.py "landlord banned smart locks"
+import os
+import sys
+import time
+import sqlite3
+from typing import Dict, Iterable, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
+from text_tokens import tokenize  # noqa
+from bm25 import stem  # noqa
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REDDIT_CORPUS    = os.getenv("REDDIT_CORPUS", os.path.join(ROOT, ".cache", "reddit_corpus.db"))
+CORPUS_MAX_AGE   = int(os.getenv("CORPUS_MAX_AGE", str(7 * 24 * 60 * 60)))
+CORPUS_MAX_POSTS = 50_000
+CORPUS_MIN_HITS  = int(os.getenv("CORPUS_MIN_HITS", "3"))    # fewer local matches = miss
+MIN_COVERAGE     = 0.5          # share of query terms a local post must contain
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    rowid INTEGER PRIMARY KEY, id TEXT UNIQUE, subreddit TEXT, title TEXT, selftext TEXT,
+    score INTEGER, num_comments INTEGER, created_utc REAL, ingested REAL);
+CREATE TABLE IF NOT EXISTS comments (post_id TEXT, body TEXT, score INTEGER, depth INTEGER);
+CREATE INDEX IF NOT EXISTS comments_post ON comments(post_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, selftext, comments, tokenize='porter unicode61');
+"""
+
+
+class LocalComment:
+    __slots__ = ("body", "score", "depth", "replies", "created_utc")
+    def __init__(self, body, score, depth):
+        self.body, self.score, self.depth, self.replies, self.created_utc = body, score, depth, (), None
+
+class LocalPost:
+    """Quacks like a praw Submission for the context helpers (title, score,
+    num_comments, selftext, id, comments)."""
+    __slots__ = ("id", "subreddit", "title", "selftext", "score", "num_comments", "created_utc", "comments")
+    def __init__(self, row, comments):
+        (self.id, self.subreddit, self.title, self.selftext,
+         self.score, self.num_comments, self.created_utc) = row
+        self.comments = comments
+
+
+class RedditCorpus:
+    def __init__(self, path: str = REDDIT_CORPUS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    # ---------- INGEST ----------
+    def _comment_text(self, post_id: str) -> str:
+        return " ".join(b for (b,) in self.db.execute("SELECT body FROM comments WHERE post_id=?", (post_id,)))
+
+    def add_posts(self, posts: Iterable, now: float = None) -> int:
+        """Upsert listing records (dicts) or praw Submissions; returns new posts."""
+        now = now or time.time()
+        added = 0
+        with self.db:
+            for p in posts:
+                g = p.get if isinstance(p, dict) else lambda k, p=p: getattr(p, k, None)
+                sub = g("subreddit")
+                row = (g("id"), getattr(sub, "display_name", sub), g("title") or "", (g("selftext") or "")[:2000],
+                       g("score") or 0, g("num_comments") or 0, g("created_utc") or now)
+                cur = self.db.execute("SELECT rowid FROM posts WHERE id=?", (row[0],)).fetchone()
+                if cur:
+                    self.db.execute("UPDATE posts SET score=?, num_comments=? WHERE rowid=?", (row[4], row[5], cur[0]))
+                    continue
+                rid = self.db.execute(
+                    "INSERT INTO posts (id, subreddit, title, selftext, score, num_comments, created_utc, ingested)"
+                    " VALUES (?,?,?,?,?,?,?,?)", row + (now,)).lastrowid
+                self.db.execute("INSERT INTO posts_fts (rowid, title, selftext, comments) VALUES (?,?,?,'')",
+                                (rid, row[2], row[3]))
+                added += 1
+        return added
+
+    def add_comments(self, post_id: str, comments: List[Dict]) -> None:
+        """Replace the stored comment sample ({"body", "score", "depth"}) of a post."""
+        with self.db:
+            cur = self.db.execute("SELECT rowid FROM posts WHERE id=?", (post_id,)).fetchone()
+            if not cur:
+                return
+            self.db.execute("DELETE FROM comments WHERE post_id=?", (post_id,))
+            self.db.executemany("INSERT INTO comments VALUES (?,?,?,?)",
+                                [(post_id, c["body"], c.get("score") or 0, c.get("depth", 0)) for c in comments])
+            self.db.execute("UPDATE posts_fts SET comments=? WHERE rowid=?", (self._comment_text(post_id), cur[0]))
+
+    def prune(self, now: float = None) -> int:
+        now = now or time.time()
+        with self.db:
+            old = [r for (r,) in self.db.execute(
+                "SELECT rowid FROM posts WHERE created_utc < ? UNION "
+                "SELECT * FROM (SELECT rowid FROM posts ORDER BY created_utc DESC LIMIT -1 OFFSET ?)",
+                (now - CORPUS_MAX_AGE, CORPUS_MAX_POSTS))]
+            for i in range(0, len(old), 500):
+                chunk = old[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                self.db.execute(f"DELETE FROM comments WHERE post_id IN (SELECT id FROM posts WHERE rowid IN ({marks}))", chunk)
+                self.db.execute(f"DELETE FROM posts_fts WHERE rowid IN ({marks})", chunk)
+                self.db.execute(f"DELETE FROM posts WHERE rowid IN ({marks})", chunk)
+        return len(old)
+
+    # ---------- QUERY ----------
+    def _comments(self, post_id: str) -> List[LocalComment]:
+        return [LocalComment(b, s, d) for b, s, d in self.db.execute(
+            "SELECT body, score, depth FROM comments WHERE post_id=? ORDER BY score DESC", (post_id,))]
+
+    def search(self, query: str, limit: int = 100, min_coverage: float = MIN_COVERAGE) -> List[LocalPost]:
+        """Local posts containing at least `min_coverage` of the query terms,
+        in FTS5 bm25 order."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        rows = self.db.execute(
+            "SELECT p.id, p.subreddit, p.title, p.selftext, p.score, p.num_comments, p.created_utc "
+            "FROM posts_fts f JOIN posts p ON p.rowid = f.rowid WHERE posts_fts MATCH ? "
+            "ORDER BY bm25(posts_fts, 3.0, 1.0, 0.5) LIMIT ?", (match, limit)).fetchall()
+        want = {stem(t) for t in terms}
+        out = []
+        for row in rows:
+            have = {stem(t) for t in tokenize(f"{row[2]} {row[3]}")}
+            if len(want & have) >= min_coverage * len(want):
+                out.append(LocalPost(row, self._comments(row[0])))
+        return out
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+if __name__ == "__main__":
+    corpus = RedditCorpus()
+    t = time.time()
+    hits = corpus.search(" ".join(sys.argv[1:]) or "landlord")
+    print(f"{len(corpus)} posts, {len(hits)} hits in {(time.time() - t) * 1000:.1f} ms")
+    for p in hits[:10]:
+        print(f"{p.score:6}  r/{p.subreddit}  {p.title[:80]}")
@@ -12,12 +12,33 @@ import re
 from textblob import TextBlob
 from collections import Counter
 import requests
-import random, functools, difflib
-from collections import OrderedDict
+import random, functools
+from contextlib import nullcontext
 from typing import List, Dict
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "utils"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "Product Bot V2"))
 from slack_notifier import notify_slack
+from draft_ranker import BEST_OF_N, best_novel, score_draft
+from novelty_index import NoveltyIndex, NOVELTY_MAX_SIM, NOVELTY_RETRIES
+from post_journal import PostJournal
+from deadline import current as run_deadline, start as start_deadline
+from circuit_breaker import CircuitOpen, guard, is_open
+from engagement_model import EngagementModel, ENGAGEMENT_W
+from llm_ledger import tracked_chat, trim_to_tokens
+from story_cluster import rank_stories
+from keyword_engine import KeywordEngine
+from text_tokens import tokenize
+from bm25 import BM25Ranker
+from listing_cache import ListingCache
+from trend_velocity import TrendVelocity
+from comment_sampler import sample_comments
+from analysis_cache import AnalysisCache
+from reddit_corpus import RedditCorpus, LocalPost, CORPUS_MIN_HITS
+from catalog import build_aff_link
+from product_index import ProductIndex
+from render import Generation, render
+from state_store import StateStore
 
 # Load environment variables from .env if exists
 load_dotenv()
@@ -31,6 +52,13 @@ client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
 MEMORY_FILE = Path("used_trends.json")
 TREND_METADATA_FILE = Path("trend_metadata.json")
 
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "150"))
+TREND_PRODUCT_MODE = os.getenv("TREND_PRODUCT_MODE", "false").lower() == "true"
+REDDIT_TIMEOUT = 10
+CONTEXT_NEED = 60           # run budget needed to enrich context and still generate
+CONTEXT_SEARCH_LIMIT = int(os.getenv("CONTEXT_SEARCH_LIMIT", "100"))
+SPARE_ACCOUNT = "TrendParasite spare"   # outbox of runner-up drafts, used when generation fails
+
 VIRAL_KEYWORDS = [
     "dies", "ban", "leak", "update", "fired", "explodes",
     "AI", "GPT", "parody", "war", "meme", "love"
@@ -45,7 +73,8 @@ def reddit_client():
         client_secret=os.environ["REDDIT_CLIENT_SECRET"],
         username=os.environ["REDDIT_USERNAME"],
         password=os.environ["REDDIT_PASSWORD"],
-        user_agent=os.environ["REDDIT_USER_AGENT"]
+        user_agent=os.environ["REDDIT_USER_AGENT"],
+        timeout=int(run_deadline().timeout(REDDIT_TIMEOUT))
     )
 
 
@@ -55,6 +84,26 @@ _H1  = 60 * 60
 _MAX_AGE   = 24 * _H1          # candidate posts ≤ 24 h old
 _MAX_STORE = 200               # remember up to 200 used titles
 _HISTORY   = os.getenv("TREND_HISTORY_FILE", ".cache/used_trends.json")
+_MOMENTUM_W = float(os.getenv("TREND_MOMENTUM_WEIGHT", "0.5"))   # weight of upvotes/h in trend_score
+_TOP_K     = 10                # stories kept for the random pick
+
+
+class Candidate:
+    """Compact trend candidate (no per-instance __dict__, no PRAW objects)."""
+    __slots__ = ("id", "title", "subreddit", "score", "created_utc", "trend_score",
+                 "velocity", "accel")
+
+    def __init__(self, id, title, subreddit, score, created_utc, trend_score):
+        self.id, self.title, self.subreddit = id, title, subreddit
+        self.score, self.created_utc, self.trend_score = score, created_utc, trend_score
+        self.velocity = self.accel = None
+
+    def as_dict(self, **extra) -> Dict:
+        d = {f: getattr(self, f) for f in self.__slots__}
+        if d["velocity"] is None:
+            del d["velocity"], d["accel"]
+        d.update(extra)
+        return d
 
 # ──────────────────────────────────────────────────────────────────────────
 def _load_history() -> set[str]:
@@ -77,99 +126,172 @@ def _save_history(add_title: str) -> None:
     with open(_HISTORY, "w", encoding="utf8") as f:
         json.dump(data, f, ensure_ascii=False, indent=0)
 
-def _norm(t):  # simple fuzzy-dup helper
-    return "".join(c for c in t.lower() if c.isalnum() or c.isspace())
-
 def fetch_reddit_trends() -> List[Dict]:
     reddit = reddit_client()
     now    = time.time()
     seen   = _load_history()
-    titles_norm, candidates = [], OrderedDict()
+    candidates: Dict[str, Candidate] = {}                     # title → candidate
+    ingested = {}                                             # id → title, for keyword stats
+    samples = {}                                              # id → (id, ts, score, comments), one per run
 
     subs = ["all", "TrueOffMyChest", "antiwork", "confession", "AmItheAsshole"]
     random.shuffle(subs)
 
-    def maybe_add(post):
-        if post.stickied or post.over_18: return
-        if now - post.created_utc > _MAX_AGE: return
-        title = post.title.strip()
+    def maybe_add(post):                                      # post = listing_cache record
+        ingested[post["id"]] = post["title"]
+        samples[post["id"]] = (post["id"], post["last_seen"], post["score"], post["num_comments"])
+        if post["stickied"] or post["over_18"]: return
+        if now - post["created_utc"] > _MAX_AGE: return
+        title = post["title"].strip()
         if len(title) <= 15 or title.lower().startswith(("til", "meirl", "oc","ama")):
             return
         if title in seen: return                          # already tweeted this day
-        n = _norm(title)
-        if any(difflib.SequenceMatcher(None, n, x).ratio() > .9 for x in titles_norm):
-            return
-        score = post.score / ((now - post.created_utc)/_H1 + 1)**1.3
-        candidates[title] = {
-            "title": title,
-            "subreddit": post.subreddit.display_name,
-            "score": post.score,
-            "created_utc": post.created_utc,
-            "trend_score": score,
-        }
-        titles_norm.append(n)
+        score = post["score"] / ((now - post["created_utc"])/_H1 + 1)**1.3
+        candidates[title] = Candidate(post["id"], title, post["subreddit"],
+                                      post["score"], post["created_utc"], score)
 
+    listings = ListingCache()                                 # snapshot + delta refresh
+    corpus = RedditCorpus()                                   # local full-text store for context
     for sub in subs:
-        for p in reddit.subreddit(sub).hot(limit=40):
+        try:
+            if not run_deadline().allows(REDDIT_TIMEOUT):
+                raise TimeoutError("run deadline")
+            with nullcontext() if listings.is_fresh(sub) else guard("reddit"):
+                records, stats = listings.listing(reddit, sub, limit=40)
+        except Exception as e:                                # serve the last snapshot
+            records, stats = listings.listing(reddit, sub, offline=True)
+            run_deadline().fallback("reddit_listing", f"cached r/{sub} ({type(e).__name__})")
+        for p in records:
             maybe_add(p)
-        time.sleep(0.4)
-
-    picked = sorted(candidates.values(), key=lambda d: d["trend_score"], reverse=True)
+        corpus.add_posts(records)
+        if stats["fetched"]:
+            time.sleep(0.4)
+    listings.save()
+    corpus.prune()
+    corpus.close()
+    print(f"📦 Reddit listings: {listings.requests} request(s) for {len(subs)} subs")
+
+    kw = KeywordEngine()
+    observe_titles(kw, ingested)
+    kw.save()
+
+    # momentum: rising posts beat ones that have plateaued at the same score
+    velocity = TrendVelocity()
+    velocity.record(samples.values())
+    velocity.save()
+    momentum = velocity.momentum()
+    for c in candidates.values():
+        m = momentum.get(c.id)
+        if m:
+            c.velocity, c.accel = m["velocity"], m["accel"]
+            c.trend_score += _MOMENTUM_W * max(m["velocity"], 0.0)
+
+    # same story across subs → one cluster, weighted by its combined score;
+    # only the top-K stories are selected (heap) and turned back into dicts
+    picked = [story["rep"].as_dict(trend_score=story["signal"], cluster_size=story["size"])
+              for story in rank_stories(list(candidates.values()), lambda c: c.title,
+                                        lambda c: c.trend_score, k=_TOP_K)]
     if not picked:                                            # fallback to anything
         picked = [{"title": t} for t in seen][-1:]
 
-    choice = random.choice(picked[:10])                       # variety!
+    choice = random.choice(picked)                            # variety!
     _save_history(choice["title"])
     return [choice]                                           # keep existing shape
 
+def observe_titles(engine: KeywordEngine, titles: Dict[str, str]) -> None:
+    """Listing titles go into the DF stats under their own ids, so the full
+    text analyze_post() submits later for the same post is not skipped."""
+    engine.observe(titles.values(), ids=[f"title:{i}" for i in titles])
+
 # ──────────────────────────────────────────────────────────────────────────
 def fetch_reddit_context(trend: str) -> str:
     """Fetch and analyze Reddit context with relevance scoring"""
     reddit = reddit_client()
+    corpus = RedditCorpus()
     
     try:
-        posts = list(reddit.subreddit("all").search(trend, sort="relevance", limit=15))
+        # local corpus first; live search only when it has too few matches
+        posts, live = corpus.search(trend, limit=CONTEXT_SEARCH_LIMIT), False
+        if len(posts) < CORPUS_MIN_HITS:
+            try:
+                with guard("reddit"):
+                    found = list(reddit.subreddit("all").search(trend, sort="relevance", limit=CONTEXT_SEARCH_LIMIT))
+            except Exception as e:                            # breaker open, timeout, PRAW error
+                run_deadline().fallback("context", f"live search failed ({type(e).__name__}), local results only")
+            else:
+                posts, live = found, True
+                corpus.add_posts(posts)
+        print(f"🔎 Context: {len(posts)} {'live' if live else 'local'} result(s)")
         if not posts:
             return "No relevant Reddit context found."
         
-        # Score posts by relevance
-        scored_posts = []
-        for post in posts:
-            relevance = calculate_relevance(post.title, trend)
-            if relevance > 0.3:  # Filter low relevance
-                scored_posts.append((post, relevance))
-        
-        scored_posts.sort(key=lambda x: x[1], reverse=True)
-        top_posts = [post for post, _ in scored_posts[:5]]
+        # BM25 against the trend (IDF from the running corpus stats)
+        ranker = BM25Ranker(KeywordEngine())
+        top_posts = [post for _, post in ranker.rank(
+            trend, posts, lambda p: f"{p.title} {p.title} {(p.selftext or '')[:300]}", k=5)]
+        # per-post features: reused unless the post was edited or its comments grew
+        cache, engine = AnalysisCache(), KeywordEngine()
+        analyses = []
+        for post in top_posts:
+            a = cache.get(post)
+            if a is None:
+                src, complete = post, True
+                if isinstance(post, LocalPost) and not post.comments and not is_open("reddit"):
+                    src = reddit.submission(id=post.id)    # listing-only: fetch comments once
+                if not isinstance(src, LocalPost):
+                    try:
+                        corpus.add_comments(src.id, fetch_comments(src))
+                    except Exception as e:
+                        run_deadline().fallback("comments", f"post {post.id} ({type(e).__name__})")
+                        if not isinstance(post, LocalPost):
+                            continue                        # a live result has nothing else to analyse
+                        src, complete = post, False         # listing text only; retried next run
+                a = analyze_post(src, engine)
+                if complete:
+                    cache.put(post, a)
+            analyses.append(dict(a, score=post.score, num_comments=post.num_comments))
+        cache.save()
+        engine.save()
+        print(f"🧮 Post analysis: {cache.hits} cached, {cache.misses} computed")
         
         # Build enhanced context
         context_parts = [
-            f"SUMMARY: {summarize_posts(top_posts)}",
-            f"SENTIMENT: {analyze_sentiment(top_posts)}",
-            f"KEYWORDS: {', '.join(extract_keywords(top_posts))}",
-            f"ENGAGEMENT: {get_engagement_signals(top_posts)}"
+            f"SUMMARY: {summarize_posts(analyses)}",
+            f"SENTIMENT: {analyze_sentiment(analyses)}",
+            f"KEYWORDS: {', '.join(extract_keywords(analyses, engine))}",
+            f"ENGAGEMENT: {get_engagement_signals(analyses)}"
         ]
         
         return "\n".join(context_parts)
         
     except Exception as e:
         return f"Context fetch failed: {e}"
-
-def calculate_relevance(post_title: str, trend: str) -> float:
-    """Calculate relevance score between post and trend"""
-    trend_words = set(trend.lower().split())
-    post_words = set(post_title.lower().split())
-    
-    # Jaccard similarity + title overlap bonus
-    intersection = len(trend_words.intersection(post_words))
-    union = len(trend_words.union(post_words))
-    jaccard = intersection / union if union > 0 else 0
-    
-    # Bonus for exact phrase matches
-    if trend.lower() in post_title.lower():
-        jaccard += 0.3
-    
-    return min(jaccard, 1.0)
+    finally:
+        corpus.close()
+
+def fetch_comments(post) -> List[Dict]:
+    """Sampled comments of a praw Submission. Its lazy fetch happens here,
+    under the reddit breaker; a failure raises once instead of being retried
+    by every later attribute access."""
+    with guard("reddit"):
+        return sample_comments(post)
+
+def analyze_post(post, engine: KeywordEngine) -> dict:
+    """Per-post features the context is built from (cached across runs)."""
+    sampled = sample_comments(post)                       # top comments by score, bounded walk
+    texts = [post.title]
+    if getattr(post, "selftext", ""):
+        texts.append(post.selftext[:500])
+    texts += [c["body"][:200] for c in sampled[:5]]
+    doc = " ".join(texts)
+    engine.observe([doc], ids=[f"full:{post.id}"])
+    return {
+        "title": post.title,
+        "top_comment": sampled[0]["body"][:150] if sampled else "",
+        "polarity": TextBlob(doc).sentiment.polarity,
+        "weight": len(doc),
+        "tf": dict(Counter(tokenize(doc, min_len=4)).most_common(40)),
+    }
 
 def summarize_posts(posts) -> str:
     """Create concise summary of top posts"""
@@ -179,18 +301,12 @@ def summarize_posts(posts) -> str:
     summaries = []
     for post in posts[:3]:
         # Extract key info
-        title = post.title[:100]
-        score = post.score
-        comments = post.num_comments
+        title = post["title"][:100]
+        score = post["score"]
+        comments = post["num_comments"]
         
-        # Get top comment if available
-        top_comment = ""
-        try:
-            post.comments.replace_more(limit=0)
-            if post.comments:
-                top_comment = post.comments[0].body[:150]
-        except:
-            pass
+        # Highest-scored sampled comment, if any
+        top_comment = post["top_comment"]
         
         summary = f"• {title} ({score}↑, {comments} comments)"
         if top_comment and len(top_comment) > 20:
@@ -201,27 +317,10 @@ def summarize_posts(posts) -> str:
     return "\n".join(summaries)
 
 def analyze_sentiment(posts) -> str:
-    """Analyze overall sentiment of discussions"""
-    all_text = []
-    
-    for post in posts:
-        all_text.append(post.title)
-        if hasattr(post, 'selftext') and post.selftext:
-            all_text.append(post.selftext[:500])
-        
-        # Sample comments
-        try:
-            post.comments.replace_more(limit=0)
-            for comment in post.comments[:5]:
-                if hasattr(comment, 'body'):
-                    all_text.append(comment.body[:200])
-        except:
-            pass
-    
-    combined_text = " ".join(all_text)
-    blob = TextBlob(combined_text)
-    
-    polarity = blob.sentiment.polarity
+    """Analyze overall sentiment of discussions (per-post polarity,
+    weighted by text length)"""
+    total = sum(p["weight"] for p in posts) or 1
+    polarity = sum(p["polarity"] * p["weight"] for p in posts) / total
     if polarity > 0.1:
         return "positive"
     elif polarity < -0.1:
@@ -229,27 +328,21 @@ def analyze_sentiment(posts) -> str:
     else:
         return "neutral"
 
-def extract_keywords(posts) -> list:
-    """Extract trending keywords from discussions"""
-    all_words = []
-    
-    for post in posts:
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', post.title.lower())
-        all_words.extend(words)
-    
-    # Filter common words and get top keywords
-    common_words = {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'this', 'that', 'with', 'have', 'was', 'will', 'they', 'been', 'said', 'what', 'when', 'how', 'why', 'who', 'where'}
-    filtered_words = [w for w in all_words if w not in common_words and len(w) > 3]
-    
-    return [word for word, count in Counter(filtered_words).most_common(5)]
+def extract_keywords(posts, engine: KeywordEngine) -> list:
+    """Extract trending keywords from discussions (TF-IDF against the
+    running corpus stats, over titles, selftext and sampled comments)"""
+    tf = Counter()
+    for p in posts:
+        tf.update(p["tf"])
+    return engine.keywords_tf(tf, k=5)
 
 def get_engagement_signals(posts) -> dict:
     """Analyze engagement patterns"""
     if not posts:
         return {"avg_score": 0, "avg_comments": 0, "controversy": "low"}
     
-    scores = [p.score for p in posts]
-    comments = [p.num_comments for p in posts]
+    scores = [p["score"] for p in posts]
+    comments = [p["num_comments"] for p in posts]
     
     avg_score = sum(scores) / len(scores)
     avg_comments = sum(comments) / len(comments)
@@ -310,6 +403,12 @@ def score_trends(trends):
 
         if trend.get("score", 0) > 5000:
             score += 3
+        score += min(trend.get("cluster_size", 1) - 1, 3)   # covered by several subs
+        if "velocity" in trend:
+            if trend.get("accel", 0) > 0:
+                score += 2                                  # still accelerating
+            elif trend["velocity"] <= 0:
+                score -= 2                                  # plateaued
         age_minutes = (now - trend.get("created_utc", now)) / 60
         if age_minutes < 120:
             score += 2
@@ -324,14 +423,67 @@ def score_trends(trends):
 # ─────────────────────────────────────
 # GPT-4 Tweet Generator
 # ─────────────────────────────────────
-def generate_tweet(trend_title):
-    context = fetch_reddit_context(trend_title)
+def _context_keywords(context: str) -> List[str]:
+    for line in context.splitlines():
+        if line.startswith("KEYWORDS:"):
+            return [k.strip() for k in line[len("KEYWORDS:"):].split(",") if k.strip()]
+    return []
+
+def _draft_text(raw: str) -> str:
+    try:
+        out = json.loads(raw)
+        return f"{out.get('tweet', '')} {out.get('cta', '')}".strip()
+    except (ValueError, AttributeError):
+        return raw
+
+_ENGAGEMENT_META = dict(bot="TrendParasite", mode="trend")
+
+def score_tweet_draft(raw: str, keywords: List[str], index: NoveltyIndex,
+                      model: EngagementModel = None) -> float:
+    """Local quality score for one raw JSON draft; unparseable drafts lose."""
+    try:
+        out = json.loads(raw)
+        tweet = out.get("tweet", "").strip()
+        cta = out.get("cta", "").strip()
+        hashtag = out.get("hashtag", "").strip()
+    except (ValueError, AttributeError):
+        return float("-inf")
+    if not tweet or not cta or not hashtag:
+        return float("-inf")
+    full = f"{tweet}\n\n{cta} {hashtag}"
+    score = score_draft(full, min_len=200, max_len=250, keywords=keywords, index=index)
+    if model is not None:
+        score += ENGAGEMENT_W * model.z(full, hour=datetime.datetime.now(datetime.timezone.utc).hour, **_ENGAGEMENT_META)
+    return score
+
+def match_product(trend_title, context):
+    """Best catalog product for the trend, or None when nothing fits."""
+    hits = ProductIndex().match(trend_title, _context_keywords(context), k=1)
+    return hits[0][1] if hits else None
+
+def generate_tweet(trend_title, n=BEST_OF_N, with_product=TREND_PRODUCT_MODE):
+    """(raw JSON draft, context, product, spare drafts); raises when no draft can be made.
+    Spares are the runner-ups that passed the same novelty and dud checks."""
+    if is_open("openai"):                       # don't spend Reddit calls on a draft we can't get
+        raise CircuitOpen("openai circuit open")
+    if run_deadline().allows(CONTEXT_NEED):
+        context = fetch_reddit_context(trend_title)
+        if context.startswith("Context fetch failed"):
+            run_deadline().fallback("context", context)
+    else:
+        context = "No Reddit context available."
+        run_deadline().fallback("context", "skipped enrichment")
+    product = match_product(trend_title, context) if with_product else None
+    tie_in = ""
+    if product:
+        tie_in = (f"\nTie-in product: {product.title} ({', '.join(product.benefits[:2]) or 'n/a'})"
+                  f"\n- Work the product in as a natural, relevant pick; the link is added for you\n")
     
     prompt = f"""Create viral Twitter content for this trending topic.
 
 Topic: "{trend_title}"
-Context: {context[:600]}
-
+Context: {trim_to_tokens(context, CONTEXT_TOKEN_BUDGET, "gpt-4")}
+{tie_in}
 Requirements:
 - 200-250 characters total
 - Natural trend reference (not forced exact wording)
@@ -356,8 +508,9 @@ Return JSON only:
 
 Limits: tweet ≤200, cta ≤25, total ≤250. Be substantive, not reactive."""
 
-    try:
-        res = client.chat.completions.create(
+    def one_draft():
+        res = tracked_chat(
+            client, bot="TrendParasite", mode="trend",
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.8,
@@ -366,22 +519,47 @@ Limits: tweet ≤200, cta ≤25, total ≤250. Be substantive, not reactive."""
             presence_penalty=0.2,
             max_tokens=250
         )
-        return res.choices[0].message.content.strip(), context
-    except Exception as e:
-        return f"ERROR: {e}", context
+        return res.choices[0].message.content.strip()
+
+    keywords = _context_keywords(context)
+    index = NoveltyIndex()
+    model = EngagementModel.load()
+    hour = datetime.datetime.now(datetime.timezone.utc).hour
+    # N concurrent calls: wall-clock ≈ one call, best local score wins;
+    # drafts too close to anything already posted, or predicted duds, are regenerated
+    best, drafts = best_novel(
+        one_draft, lambda d: score_tweet_draft(d, keywords, index, model), _draft_text,
+        index, NOVELTY_MAX_SIM, n=n, retries=NOVELTY_RETRIES,
+        accept=lambda d: not model.is_dud(_draft_text(d), hour=hour, **_ENGAGEMENT_META))
+    if len(drafts) > 1:
+        print(f"🏁 Best-of-{len(drafts)} scores:", [round(sc, 2) for sc, _ in drafts])
+    spares = [d for _, d in drafts
+              if d is not best and index.max_similarity(_draft_text(d)) <= NOVELTY_MAX_SIM
+              and not model.is_dud(_draft_text(d), hour=hour, **_ENGAGEMENT_META)]
+    return best, context, product, spares
+
+def take_spare():
+    """Oldest queued spare draft that is still novel, or None."""
+    store, index = StateStore(), NoveltyIndex()
+    while True:
+        spare = store.take(SPARE_ACCOUNT)
+        if spare is None or index.max_similarity(_draft_text(spare["raw"])) <= NOVELTY_MAX_SIM:
+            return spare
+        store.ack(spare["outbox_id"])              # too close to something posted since: drop it
 
 # ─────────────────────────────────────
 # Twitter Posting
 # ─────────────────────────────────────
 def post_to_twitter(full_tweet):
     try:
-        client = tweepy.Client(
-            consumer_key=os.environ["TWITTER_API_KEY"],
-            consumer_secret=os.environ["TWITTER_API_SECRET"],
-            access_token=os.environ["TWITTER_ACCESS_TOKEN"],
-            access_token_secret=os.environ["TWITTER_ACCESS_SECRET"]
-        )
-        client.create_tweet(text=full_tweet)
+        with guard("x"):
+            client = tweepy.Client(
+                consumer_key=os.environ["TWITTER_API_KEY"],
+                consumer_secret=os.environ["TWITTER_API_SECRET"],
+                access_token=os.environ["TWITTER_ACCESS_TOKEN"],
+                access_token_secret=os.environ["TWITTER_ACCESS_SECRET"]
+            )
+            client.create_tweet(text=full_tweet)
         print("✅ Tweet posted successfully.")
     except Exception as e:
         print("❌ Twitter post failed:", e)
@@ -392,40 +570,91 @@ def post_to_twitter(full_tweet):
 # ─────────────────────────────────────
 if __name__ == "__main__":
     print(f"🗓️ TrendParasite — {datetime.datetime.now().strftime('%Y-%m-%d')}")
-    
-    trends = fetch_reddit_trends()
-    if not trends:
-        print("🛑 Failed to fetch trends.")
+    start_deadline()
+    if is_open("x"):                               # nothing can be posted; don't spend Reddit or OpenAI calls
+        print("🔌 X circuit open, skipping this run.")
+        notify_slack(bot_name="TrendParasite", status="fail", message_block="X circuit open, nothing posted.")
         exit()
 
-    memory = load_memory()
-    recent_titles = {entry["trend"] for entry in memory}
-    fresh_trends = [t for t in trends if t["title"] not in recent_titles]
+    journal = PostJournal("trendparasite")
+    entry = journal.pending()
+    if entry and "raw" in entry["data"]:
+        # crashed after the LLM answered: reuse the same draft instead of paying for a new one
+        d = entry["data"]
+        selected, context, output_raw, link = d["trend"], d["context"], d["raw"], d.get("link", "")
+        print(f"[journal] resuming {entry['id']} (done: {', '.join(entry['steps']) or 'raw draft'})")
+    else:
+        if entry:
+            journal.finish("abandoned")            # nothing durable to resume
+        trends = fetch_reddit_trends()
+        if not trends:
+            print("🛑 Failed to fetch trends.")
+            exit()
 
-    if not fresh_trends:
-        print("🛑 No fresh trends available.")
-        exit()
+        memory = load_memory()
+        recent_titles = {entry["trend"] for entry in memory}
+        fresh_trends = [t for t in trends if t["title"] not in recent_titles]
 
-    ranked = score_trends(fresh_trends)
-    selected = ranked[0]
+        if not fresh_trends:
+            print("🛑 No fresh trends available.")
+            exit()
 
-    save_trend_to_memory(selected["title"])  # existing memory
-    save_trend_metadata(selected)            # new metadata
+        ranked = score_trends(fresh_trends)
+        selected = ranked[0]
 
-    print(f"🧠 Selected Trend: {selected['title']}")
-    output_raw, context = generate_tweet(selected["title"])
+        save_trend_to_memory(selected["title"])  # existing memory
+        save_trend_metadata(selected)            # new metadata
+
+        print(f"🧠 Selected Trend: {selected['title']}")
+        spare = None
+        try:
+            output_raw, context, product, spares = generate_tweet(selected["title"])
+            link = build_aff_link(product, "trend") if product else ""   # trend + product mode
+            if product:
+                print(f"🛒 Tie-in product: {product.title}")
+            trend_ref = {k: selected[k] for k in ("title", "subreddit") if k in selected}
+            store = StateStore()
+            for raw in spares:                     # kept for a later run whose generation fails
+                store.queue(SPARE_ACCOUNT, {"trend": trend_ref, "context": context, "raw": raw, "link": link})
+        except Exception as e:
+            print("❌ Generation failed:", e)
+            spare = take_spare()
+            if spare is None:
+                notify_slack(
+                    bot_name="TrendParasite",
+                    status="fail",
+                    message_block=f"Generation failed.\n```{type(e).__name__}: {e}```",
+                    trend=selected["title"]
+                )
+                exit()
+            run_deadline().fallback("generate", f"spare draft: {spare['trend']['title'][:60]}")
+            selected, context, output_raw, link = spare["trend"], spare["context"], spare["raw"], spare["link"]
+        journal.begin(trend={k: selected[k] for k in ("title", "subreddit") if k in selected},
+                      context=context, raw=output_raw, link=link)
+        if spare:                                  # the journal owns the spare now
+            StateStore().ack(spare["outbox_id"])
 
     try:
-        output = json.loads(output_raw)
-        tweet = output.get("tweet", "").strip()
-        cta = output.get("cta", "").strip()
-        hashtag = output.get("hashtag", "").strip()
-        if not tweet or not cta or not hashtag:
-            raise ValueError("Missing required tweet components.")
-        full_tweet = f"{tweet}\n\n{cta} {hashtag}"
+        if not journal.done("generated"):
+            output = json.loads(output_raw)
+            tweet = output.get("tweet", "").strip()
+            cta = output.get("cta", "").strip()
+            hashtag = output.get("hashtag", "").strip()
+            if not tweet or not cta or not hashtag:
+                raise ValueError("Missing required tweet components.")
+            # X weighted length: the tie-in link counts 23 and is never cut
+            full_tweet = render(Generation(hook=tweet, cta=cta, hashtags=[hashtag.lstrip("#")]), "trend", link)[0]
+            journal.mark("generated", full_tweet=full_tweet, hashtag=hashtag)
+        full_tweet, hashtag = journal.data["full_tweet"], journal.data["hashtag"]
         print("📤 Final Output:")
         print(json.dumps({"tweet": full_tweet}, indent=2))
-        post_to_twitter(full_tweet)
+        if not journal.done("posted"):
+            post_to_twitter(full_tweet)
+            journal.mark("posted")
+        if not journal.done("logged"):
+            NoveltyIndex().add(full_tweet, bot="TrendParasite")
+            journal.mark("logged")
+        journal.finish()
         notify_slack(
             bot_name="TrendParasite",
             status="success",
@@ -438,6 +667,8 @@ if __name__ == "__main__":
     except Exception as e:
         print("❌ Error parsing tweet:", e)
         print("🔎 Raw output:", output_raw)
+        if not journal.done("generated"):
+            journal.finish("failed")               # unusable draft: start fresh next run
         notify_slack(
             bot_name="TrendParasite",
             status="fail",
@@ -0,0 +1,148 @@
+# trend_velocity.py — score time-series per post and momentum
+#
+# Keeps the last SLOTS (ts, score, comments) samples of up to MAX_POSTS posts
+# in fixed-size NumPy ring buffers (≈0.8 MB at the defaults); the least
+# recently sampled post is evicted when full. `momentum()` computes velocity
+# and acceleration for every tracked post in one vectorised pass.
+# A sample closer than MIN_GAP to the post's previous one is dropped: the same
+# post seen in r/all and in its own sub seconds apart would otherwise turn a
+# few points of score noise into a huge per-hour velocity.
+#
+#   python trendparasite/trend_velocity.py poll --interval 1800 --rounds 6
+import os
+import time
+import argparse
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+VELOCITY_STORE = os.getenv("VELOCITY_STORE", os.path.join(ROOT, ".cache", "trend_velocity.npz"))
+MAX_POSTS = 4000
+SLOTS     = 8
+MIN_GAP   = 30 * 60         # seconds between two samples of one post
+_MIN_DT_H = MIN_GAP / 3600  # never divide by less than that
+
+
+class TrendVelocity:
+    def __init__(self, path: str = VELOCITY_STORE, max_posts: int = MAX_POSTS, slots: int = SLOTS):
+        self.path = path
+        try:
+            with np.load(path) as z:
+                self.ids = z["ids"]
+                self.ts, self.score, self.comments = z["ts"], z["score"], z["comments"]
+                self.head, self.count = z["head"], z["count"]
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            self.ids = np.full(max_posts, "", dtype="U16")
+            self.ts = np.zeros((max_posts, slots))
+            self.score = np.zeros((max_posts, slots))
+            self.comments = np.zeros((max_posts, slots))
+            self.head = np.zeros(max_posts, dtype=np.int16)
+            self.count = np.zeros(max_posts, dtype=np.int16)
+        self.slots = self.ts.shape[1]
+        self.row = {str(pid): i for i, pid in enumerate(self.ids) if pid}
+        self.free = [i for i, pid in enumerate(self.ids) if not pid]
+
+    def __len__(self) -> int:
+        return len(self.row)
+
+    def _last_ts(self, i: int) -> float:
+        return self.ts[i, (self.head[i] - 1) % self.slots]
+
+    def _alloc(self, pid: str) -> int:
+        if self.free:
+            i = self.free.pop()
+        else:  # evict the post sampled least recently
+            live = np.nonzero(self.count)[0]
+            last = self.ts[live, (self.head[live] - 1) % self.slots]
+            i = int(live[np.argmin(last)])
+            del self.row[str(self.ids[i])]
+        self.ids[i], self.head[i], self.count[i] = pid, 0, 0
+        self.row[pid] = i
+        return i
+
+    def record(self, samples: Iterable[Tuple[str, float, float, float]]) -> int:
+        """Append (post_id, ts, score, comments) samples; ones less than
+        MIN_GAP after the post's previous sample are skipped."""
+        n = 0
+        for pid, ts, score, comments in samples:
+            i = self.row.get(pid)
+            if i is None:
+                i = self._alloc(pid)
+            elif ts < self._last_ts(i) + MIN_GAP:
+                continue
+            h = self.head[i]
+            self.ts[i, h], self.score[i, h], self.comments[i, h] = ts, score, comments
+            self.head[i] = (h + 1) % self.slots
+            self.count[i] = min(self.count[i] + 1, self.slots)
+            n += 1
+        return n
+
+    def momentum(self) -> Dict[str, Dict[str, float]]:
+        """{post_id: velocity, accel (score/h, score/h²), comment_velocity}
+        for every post with at least two samples."""
+        rows = np.nonzero(self.count >= 2)[0]
+        if not len(rows):
+            return {}
+        h = self.head[rows].astype(np.int64)
+        i1, i2, i3 = (h - 1) % self.slots, (h - 2) % self.slots, (h - 3) % self.slots
+        t1, t2, t3 = self.ts[rows, i1], self.ts[rows, i2], self.ts[rows, i3]
+        s1, s2, s3 = self.score[rows, i1], self.score[rows, i2], self.score[rows, i3]
+        c1, c2 = self.comments[rows, i1], self.comments[rows, i2]
+
+        dt12 = np.maximum((t1 - t2) / 3600, _MIN_DT_H)
+        dt23 = np.maximum((t2 - t3) / 3600, _MIN_DT_H)
+        vel = (s1 - s2) / dt12
+        prev = (s2 - s3) / dt23
+        has3 = self.count[rows] >= 3
+        acc = np.where(has3, (vel - prev) / ((dt12 + dt23) / 2), 0.0)
+        cvel = (c1 - c2) / dt12
+        return {
+            str(self.ids[r]): {"velocity": float(v), "accel": float(a), "comment_velocity": float(c)}
+            for r, v, a, c in zip(rows, vel, acc, cvel)
+        }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, ids=self.ids, ts=self.ts, score=self.score,
+                                comments=self.comments, head=self.head, count=self.count)
+        os.replace(tmp, self.path)
+
+
+# ──── Poller ────────────────────────────────────────────────────────────────
+def poll(subs, interval: int, rounds: int, limit: int = 40) -> None:
+    """Sample hot listings every `interval` seconds; also keeps the listing
+    snapshot fresh so the next bot run can skip the network."""
+    import praw
+    from listing_cache import ListingCache
+
+    reddit = praw.Reddit(
+        client_id=os.environ["REDDIT_CLIENT_ID"],
+        client_secret=os.environ["REDDIT_CLIENT_SECRET"],
+        username=os.environ["REDDIT_USERNAME"],
+        password=os.environ["REDDIT_PASSWORD"],
+        user_agent=os.environ["REDDIT_USER_AGENT"]
+    )
+    for n in range(rounds):
+        store, listings = TrendVelocity(), ListingCache()
+        added = 0
+        for sub in subs:
+            records, _ = listings.listing(reddit, sub, limit=limit, force=True)
+            added += store.record((r["id"], r["last_seen"], r["score"], r["num_comments"])
+                                  for r in records)
+        store.save()
+        listings.save()
+        print(f"[poll {n + 1}/{rounds}] {added} samples, {len(store)} posts tracked")
+        if n + 1 < rounds:
+            time.sleep(interval)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Trend velocity poller")
+    ap.add_argument("cmd", choices=["poll"])
+    ap.add_argument("--subs", default="all,TrueOffMyChest,antiwork,confession,AmItheAsshole")
+    ap.add_argument("--interval", type=int, default=MIN_GAP)
+    ap.add_argument("--rounds", type=int, default=1)
+    a = ap.parse_args()
+    poll(a.subs.split(","), a.interval, a.rounds)
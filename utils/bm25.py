@@ -0,0 +1,83 @@
+"""BM25 ranking of short posts against a query.
+
+Tokens come from text_tokens.tokenize and go through a light suffix stemmer
+("layoffs" → "layoff", "banned" → "ban"). Both the stemmer and per-text
+analysis are memoised, so re-ranking the same posts costs little. IDF comes
+from the running KeywordEngine corpus statistics when given, because IDF over
+the candidate set alone is skewed when every search hit contains the query.
+Ranking 100 search results takes about a millisecond.
+"""
+import heapq
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from text_tokens import tokenize
+
+T = TypeVar("T")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_SUFFIXES = (("ies", "y"), ("sses", "ss"), ("ing", ""), ("ed", ""), ("ly", ""), ("s", ""))
+
+
+@lru_cache(maxsize=50_000)
+def stem(word: str) -> str:
+    base = word
+    for suf, rep in _SUFFIXES:
+        if word.endswith(suf) and len(word) - len(suf) >= 3:
+            if suf == "s" and word.endswith(("ss", "us", "is")):
+                break
+            base = word[:-len(suf)] + rep
+            if suf in ("ing", "ed") and len(base) > 3 and base[-1] == base[-2] and base[-1] not in "lsz":
+                base = base[:-1]                     # "banned" → "ban", "running" → "run"
+            break
+    if len(base) > 3 and base.endswith("e"):
+        base = base[:-1]                             # "update"/"updated"/"updates" → "updat"
+    return base
+
+@lru_cache(maxsize=4096)
+def analyze(text: str) -> Tuple[Tuple[str, str], ...]:
+    """(stem, surface token) pairs for `text`."""
+    return tuple((stem(t), t) for t in tokenize(text))
+
+
+class BM25Ranker:
+    def __init__(self, engine=None, k1: float = BM25_K1, b: float = BM25_B):
+        self.engine = engine      # KeywordEngine or None (IDF from the candidates)
+        self.k1, self.b = k1, b
+
+    def _idf(self, surfaces: Sequence[str], n: int, local_df: int) -> float:
+        if self.engine is not None and self.engine.n_docs:
+            N = self.engine.n_docs
+            df = max(self.engine.df.get(t, 0) for t in surfaces)
+        else:
+            N, df = n, local_df
+        return math.log(1 + (N - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str, texts: Sequence[str]) -> List[float]:
+        q: dict = {}
+        for s, t in analyze(query):
+            q.setdefault(s, set()).add(t)
+        docs = [Counter(s for s, _ in analyze(x)) for x in texts]
+        if not q or not docs:
+            return [0.0] * len(docs)
+        avgdl = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+        idf = {s: self._idf(tuple(surf), len(docs), sum(1 for d in docs if s in d))
+               for s, surf in q.items()}
+        out = []
+        for d in docs:
+            dl = sum(d.values())
+            norm = self.k1 * (1 - self.b + self.b * dl / avgdl)
+            out.append(sum(idf[s] * d[s] * (self.k1 + 1) / (d[s] + norm)
+                           for s in q if s in d))
+        return out
+
+    def rank(self, query: str, items: Sequence[T], text_of: Callable[[T], str],
+             k: int = 5, min_score: float = 0.0) -> List[Tuple[float, T]]:
+        """Top-k (score, item) above `min_score`, best first."""
+        scored = self.scores(query, [text_of(x) for x in items])
+        top = heapq.nlargest(k, range(len(items)), key=scored.__getitem__)
+        return [(scored[i], items[i]) for i in top if scored[i] > min_score]
@@ -0,0 +1,172 @@
+"""Circuit breakers for the bots' upstreams (reddit, openai, x, newsdata).
+
+Each dependency keeps a rolling window of recent call outcomes. A call that
+fails in a way that says the dependency is unhealthy (transport error,
+timeout, HTTP 429 or 5xx), or that runs slower than its SLOW_CALL
+threshold, counts as a failure. Other errors, such as X's 403 for a
+duplicate post or OpenAI's 400 for a bad request, are the caller's problem:
+the dependency answered, so they count as successful calls. Once the window
+holds at least MIN_CALLS outcomes and the failure rate reaches ERROR_RATE,
+the breaker opens. While open, `guard()` raises CircuitOpen immediately, so
+callers go straight to cached or queued content instead of waiting on
+timeouts. After OPEN_SECONDS one probe call is let through (half-open):
+success closes the breaker, failure re-opens it.
+
+State lives in .cache/breakers.json, so a breaker opened by one scheduled run
+is still open for the next. Transitions are printed as they happen and
+`summary()` reports them for Slack.
+
+    python utils/circuit_breaker.py            # show state
+    python utils/circuit_breaker.py reset x    # force-close a breaker
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BREAKER_STATE = os.getenv("BREAKER_STATE", os.path.join(ROOT, ".cache", "breakers.json"))
+
+WINDOW         = 10                  # outcomes kept per dependency
+WINDOW_SECONDS = 6 * 60 * 60         # older outcomes no longer count
+MIN_CALLS      = 3
+ERROR_RATE     = 0.5
+OPEN_SECONDS   = int(os.getenv("BREAKER_OPEN_SECONDS", str(30 * 60)))
+SLOW_CALL      = {"reddit": 10.0, "openai": 45.0, "x": 15.0, "newsdata": 10.0}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_lock = threading.Lock()
+_state: Dict[str, Dict] = {}
+_loaded = False
+_probing: set = set()
+transitions: List[Tuple[str, str, str, str]] = []   # (dep, from, to, why) this run
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+def _load() -> None:
+    global _loaded
+    if _loaded:
+        return
+    try:
+        with open(BREAKER_STATE, "r", encoding="utf-8") as f:
+            _state.update(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    _loaded = True
+
+def _save() -> None:
+    os.makedirs(os.path.dirname(BREAKER_STATE), exist_ok=True)
+    tmp = f"{BREAKER_STATE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_state, f, indent=1)
+    os.replace(tmp, BREAKER_STATE)
+
+def _get(dep: str) -> Dict:
+    _load()
+    return _state.setdefault(dep, {"state": CLOSED, "opened_at": 0, "outcomes": []})
+
+def _move(dep: str, b: Dict, to: str, why: str) -> None:
+    transitions.append((dep, b["state"], to, why))
+    print(f"🔌 [{dep}] breaker {b['state']} → {to} ({why})")
+    b["state"] = to
+    if to == OPEN:
+        b["opened_at"] = time.time()
+    elif to == CLOSED:
+        b["outcomes"] = []
+
+
+def allow(dep: str) -> bool:
+    """True if a call to `dep` may go out now (may move open → half-open)."""
+    with _lock:
+        b = _get(dep)
+        if b["state"] == OPEN and time.time() - b["opened_at"] >= OPEN_SECONDS:
+            _move(dep, b, HALF_OPEN, "cooldown over, probing")
+            _save()
+        if b["state"] == CLOSED:
+            return True
+        if b["state"] == HALF_OPEN and dep not in _probing:
+            _probing.add(dep)
+            return True
+        return False
+
+def record(dep: str, ok: bool, latency: float, why: str = "") -> None:
+    with _lock:
+        b = _get(dep)
+        now = time.time()
+        b["outcomes"] = [o for o in b["outcomes"] if now - o[0] < WINDOW_SECONDS][-(WINDOW - 1):]
+        b["outcomes"].append([round(now), int(ok), round(latency, 2)])
+        if b["state"] == HALF_OPEN and dep in _probing:
+            _probing.discard(dep)
+            _move(dep, b, CLOSED if ok else OPEN, "probe ok" if ok else f"probe failed: {why}")
+        elif b["state"] == CLOSED:
+            fails = sum(1 for o in b["outcomes"] if not o[1])
+            if len(b["outcomes"]) >= MIN_CALLS and fails / len(b["outcomes"]) >= ERROR_RATE:
+                _move(dep, b, OPEN, f"{fails}/{len(b['outcomes'])} recent calls failed, last: {why}")
+        _save()
+
+_OUTAGE_NAMES = ("Timeout", "Connection", "RequestException", "ServerError", "RateLimit")
+
+def is_outage(e: BaseException) -> bool:
+    """True when `e` means the dependency itself is failing."""
+    status = getattr(e, "status_code", None)
+    if status is None:                              # tweepy / prawcore keep the response
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(e, OSError):                      # socket errors, TimeoutError, requests' transport errors
+        return True
+    if any(n in cls.__name__ for cls in type(e).__mro__ for n in _OUTAGE_NAMES):
+        return True                                 # openai.APIConnectionError, prawcore.RequestException, ...
+    cause = e.__cause__ or e.__context__            # e.g. tweepy wrapping a requests error
+    return cause is not None and cause is not e and is_outage(cause)
+
+@contextmanager
+def guard(dep: str):
+    """Wrap one call to `dep`: raises CircuitOpen when the breaker is open,
+    otherwise records the outcome and latency of the block."""
+    if not allow(dep):
+        raise CircuitOpen(f"{dep} circuit open")
+    t0 = time.monotonic()
+    try:
+        yield
+    except Exception as e:
+        outage = is_outage(e)
+        record(dep, not outage, time.monotonic() - t0, type(e).__name__ if outage else "")
+        raise
+    latency = time.monotonic() - t0
+    slow = latency > SLOW_CALL.get(dep, 30.0)
+    record(dep, not slow, latency, f"slow ({latency:.0f}s)" if slow else "")
+
+def call(dep: str, fn, *args, **kwargs):
+    with guard(dep):
+        return fn(*args, **kwargs)
+
+def is_open(dep: str) -> bool:
+    with _lock:
+        b = _get(dep)
+        return b["state"] == OPEN and time.time() - b["opened_at"] < OPEN_SECONDS
+
+def summary() -> str:
+    """Non-closed breakers plus this run's transitions; empty when all is well."""
+    with _lock:
+        _load()
+        parts = [f"{dep}: {b['state']}" for dep, b in sorted(_state.items()) if b["state"] != CLOSED]
+    parts += [f"{dep} {a}→{b} ({why})" for dep, a, b, why in transitions]
+    return "; ".join(parts)
+
+if __name__ == "__main__":
+    _load()
+    if sys.argv[1:2] == ["reset"]:
+        for dep in sys.argv[2:]:
+            _get(dep).update(state=CLOSED, outcomes=[])
+        _save()
+    for dep, b in sorted(_state.items()):
+        fails = sum(1 for o in b["outcomes"] if not o[1])
+        print(f"{dep:9} {b['state']:9} {fails}/{len(b['outcomes'])} recent failures")
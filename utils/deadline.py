@@ -0,0 +1,60 @@
+"""Run-level deadline shared by every stage of a bot run.
+
+The clock starts when the module is first imported, or again on `start()`.
+The run has RUN_SLA seconds. Stages ask `timeout(cap)` for their network
+timeout, which is the smaller of their own cap and what is left after
+POST_RESERVE (the time kept back for posting and logging). Before optional
+work they check `allows(seconds)`. When a stage skips or degrades it
+records `fallback(stage, what)`; `summary()` lists those for the log and
+Slack.
+"""
+import os
+import time
+from typing import List, Tuple
+
+RUN_SLA      = float(os.getenv("RUN_SLA", "300"))
+POST_RESERVE = float(os.getenv("POST_RESERVE", "30"))
+MIN_TIMEOUT  = 2.0
+
+
+class Deadline:
+    def __init__(self, seconds: float = RUN_SLA, reserve: float = POST_RESERVE):
+        self.seconds, self.reserve = seconds, reserve
+        self.started = time.monotonic()
+        self.fallbacks: List[Tuple[str, str]] = []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return self.seconds - self.elapsed()
+
+    def budget(self) -> float:
+        """Seconds left for non-posting stages."""
+        return self.remaining() - self.reserve
+
+    def allows(self, seconds: float) -> bool:
+        return self.budget() >= seconds
+
+    def timeout(self, cap: float, posting: bool = False) -> float:
+        left = self.remaining() if posting else self.budget()
+        return max(MIN_TIMEOUT, min(cap, left))
+
+    def fallback(self, stage: str, what: str) -> None:
+        self.fallbacks.append((stage, what))
+        print(f"⏱️ [{stage}] fallback: {what} ({self.remaining():.0f}s left)")
+
+    def summary(self) -> str:
+        return "; ".join(f"{s}: {w}" for s, w in self.fallbacks)
+
+
+_current = Deadline()
+
+def current() -> Deadline:
+    return _current
+
+def start(seconds: float = RUN_SLA, reserve: float = POST_RESERVE) -> Deadline:
+    """Restart the run clock (call at the top of a bot's entry point)."""
+    global _current
+    _current = Deadline(seconds, reserve)
+    return _current
@@ -0,0 +1,121 @@
+import os
+import re
+import difflib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from deadline import current
+
+T = TypeVar("T")
+
+# How many drafts to request per post; 1 keeps the classic single-call behaviour.
+BEST_OF_N = max(1, int(os.getenv("BEST_OF_N", "1")))
+ROUND_SECONDS = 45      # run budget one generation round needs; fewer → no novelty retry
+
+BANNED_CLICHES = [
+    "game-changer", "game changer", "must-have", "must have", "next level",
+    "mind-blowing", "mind blowing", "you won't believe", "let that sink in",
+    "buckle up", "thoughts?", "can't believe", "in today's world",
+    "unpopular opinion", "hot take:", "life-changing", "say goodbye to",
+]
+
+
+# ---------- SCORING ----------
+def _norm(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", text.lower())).strip()
+
+def length_fit(text: str, min_len: int, max_len: int) -> float:
+    """1.0 inside [min_len, max_len], decaying linearly outside it."""
+    n = len(text)
+    if min_len <= n <= max_len:
+        return 1.0
+    gap = min_len - n if n < min_len else n - max_len
+    return max(0.0, 1.0 - gap / max(max_len, 1))
+
+def cliche_hits(text: str) -> int:
+    t = text.lower()
+    return sum(1 for c in BANNED_CLICHES if c in t)
+
+def novelty(text: str, recent: Iterable[str]) -> float:
+    """1 - highest similarity to any recent post (1.0 = nothing alike)."""
+    n = _norm(text)
+    best = 0.0
+    for r in recent:
+        sm = difflib.SequenceMatcher(None, n, _norm(r))
+        if sm.real_quick_ratio() <= best or sm.quick_ratio() <= best:
+            continue
+        best = max(best, sm.ratio())
+    return 1.0 - best
+
+def keyword_coverage(text: str, keywords: Iterable[str]) -> float:
+    kws = [k.lower() for k in keywords if k]
+    if not kws:
+        return 0.0
+    t = text.lower()
+    return sum(1 for k in kws if k in t) / len(kws)
+
+def score_draft(text: str, *, min_len: int, max_len: int,
+                keywords: Iterable[str] = (), recent: Iterable[str] = (),
+                index=None) -> float:
+    """Higher is better. Novelty comes from `index` (a NoveltyIndex) when given."""
+    nov = 1.0 - index.max_similarity(text) if index is not None else novelty(text, recent)
+    return (
+        2.0 * length_fit(text, min_len, max_len)
+        + 1.5 * nov
+        + 1.0 * keyword_coverage(text, keywords)
+        - 1.0 * cliche_hits(text)
+    )
+
+
+# ---------- BEST-OF-N ----------
+def best_of_n(generate: Callable[[], T], score: Callable[[T], float],
+              n: int = BEST_OF_N) -> Tuple[T, List[Tuple[float, T]]]:
+    """Run `generate` n times concurrently and return the best-scoring draft.
+
+    Failed generations are dropped; if every call fails the last error is
+    re-raised so callers keep their existing error handling.
+    """
+    if n <= 1:
+        d = generate()
+        return d, [(score(d), d)]
+
+    scored: List[Tuple[float, T]] = []
+    err: Optional[BaseException] = None
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(generate) for _ in range(n)]
+        for fut in as_completed(futures):
+            try:
+                d = fut.result()
+            except Exception as e:
+                err = e
+                continue
+            scored.append((score(d), d))
+    if not scored:
+        raise err
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[0][1], scored
+
+
+def best_novel(generate: Callable[[], T], score: Callable[[T], float],
+               text_of: Callable[[T], str], index, max_sim: float,
+               n: int = BEST_OF_N, retries: int = 0,
+               accept: Optional[Callable[[T], bool]] = None) -> Tuple[T, List[Tuple[float, T]]]:
+    """best_of_n, rejecting drafts too close to past posts (or failing
+    `accept`, e.g. predicted duds) and regenerating.
+
+    Raises RuntimeError once `retries` extra rounds still produce nothing usable.
+    """
+    for attempt in range(retries + 1):
+        _, scored = best_of_n(generate, score, n=n)
+        novel = [(sc, d) for sc, d in scored if index.max_similarity(text_of(d)) <= max_sim]
+        kept = [(sc, d) for sc, d in novel if accept is None or accept(d)]
+        if kept:
+            return kept[0][1], scored
+        if novel:
+            print(f"[engagement] round {attempt + 1}: all {len(novel)} novel drafts predicted duds")
+        else:
+            print(f"[novelty] round {attempt + 1}: all {len(scored)} drafts too similar to past posts")
+        if attempt < retries and not current().allows(ROUND_SECONDS):
+            current().fallback("generate", f"no time for novelty retry {attempt + 1}")
+            break
+    raise RuntimeError("No draft passed the novelty and engagement checks.")
@@ -0,0 +1,204 @@
+"""Engagement prediction for draft tweets.
+
+A ridge regression on log1p(likes + 2·replies + 2·retweets + quotes), the
+same reward the bandit credits. Features are hashed word uni/bigrams of the
+text plus bot, mode, product category and posting hour. Training reads the
+state store: every logged post with a text, joined to its latest metrics
+harvest. It solves in dual form over a sparse design, so memory is the n×n
+Gram matrix (~70 MB for 3k posts) and training takes a second or two.
+
+Scoring a draft is a sum over ~40 hashed weights (tens of microseconds).
+`z()` standardises the prediction against the training targets, and
+`is_dud()` flags drafts whose prediction falls in the bottom DUD_QUANTILE of
+the model's own in-sample predictions (ridge shrinks predictions towards the
+mean, so a cut taken on the targets would flag almost nothing). Both are
+neutral for a bot with fewer than MIN_TRAIN posts in the training set, so a
+model fitted on one bot's threads never gates another bot's drafts.
+
+    python utils/engagement_model.py train
+    python utils/engagement_model.py score "draft text" --bot "ProductBot V2" --mode spiky
+"""
+import os
+import csv
+import zlib
+import argparse
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from text_tokens import tokenize
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENGAGEMENT_MODEL = os.getenv("ENGAGEMENT_MODEL", os.path.join(ROOT, ".cache", "engagement_model.npz"))
+V2_PRODUCTS = os.path.join(ROOT, "Product Bot V2", "products.csv")
+
+DIM          = 1 << 14
+RIDGE        = 1.0
+MIN_TRAIN    = int(os.getenv("ENGAGEMENT_MIN_TRAIN", "50"))
+DUD_QUANTILE = 0.25
+ENGAGEMENT_W = float(os.getenv("ENGAGEMENT_W", "1.0"))   # weight of z() in draft scores
+
+
+def reward(likes, replies, retweets, quotes) -> float:
+    return float(likes) + 2 * float(replies) + 2 * float(retweets) + float(quotes)
+
+def features(text: str, bot: str = "", mode: str = "", category: str = "",
+             hour: Optional[int] = None) -> np.ndarray:
+    """Indices of the hashed features of one draft (duplicates allowed)."""
+    words = tokenize(text, min_len=2)
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    grams += [f"bot={bot}", f"mode={mode}", f"cat={category}", f"len={len(text) // 40}"]
+    if hour is not None:
+        grams.append(f"hour={hour}")
+    return np.fromiter((zlib.crc32(g.encode()) % DIM for g in grams), dtype=np.int64, count=len(grams))
+
+
+class EngagementModel:
+    def __init__(self, w: Optional[np.ndarray] = None, bias: float = 0.0, mean: float = 0.0,
+                 std: float = 1.0, dud: float = float("-inf"), n: int = 0,
+                 bots: Optional[Dict[str, int]] = None):
+        self.w = w if w is not None else np.zeros(DIM)
+        self.bias, self.mean, self.std, self.dud, self.n = bias, mean, std, dud, n
+        self.bots = bots or {}          # training posts per bot
+
+    @classmethod
+    def load(cls, path: str = ENGAGEMENT_MODEL) -> "EngagementModel":
+        """The trained model, or a neutral one when none has been trained yet."""
+        try:
+            with np.load(path) as z:
+                return cls(z["w"], float(z["bias"]), float(z["mean"]), float(z["std"]),
+                           float(z["dud"]), int(z["n"]),
+                           {str(b): int(c) for b, c in zip(z["bots"], z["bot_n"])})
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return cls()
+
+    def save(self, path: str = ENGAGEMENT_MODEL) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, w=self.w, bias=self.bias, mean=self.mean, std=self.std,
+                                dud=self.dud, n=self.n, bots=np.array(list(self.bots), dtype=str),
+                                bot_n=np.array(list(self.bots.values()), dtype=np.int64))
+        os.replace(tmp, path)
+
+    @property
+    def ready(self) -> bool:
+        return self.n >= MIN_TRAIN
+
+    def knows(self, bot: str = "") -> bool:
+        """Trained on at least MIN_TRAIN of `bot`'s own posts."""
+        return self.bots.get(bot, 0) >= MIN_TRAIN
+
+    def predict(self, text: str, **meta) -> float:
+        """Predicted log1p(reward) for a draft."""
+        idx = features(text, **meta)
+        return self.bias + float(self.w[idx].sum()) / np.sqrt(max(len(idx), 1))
+
+    def z(self, text: str, **meta) -> float:
+        if not self.knows(meta.get("bot", "")):
+            return 0.0
+        return (self.predict(text, **meta) - self.mean) / self.std
+
+    def is_dud(self, text: str, **meta) -> bool:
+        return self.knows(meta.get("bot", "")) and self.predict(text, **meta) < self.dud
+
+
+# ---------- TRAINING ----------
+def _read_csv(path: str) -> List[Dict[str, str]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def load_examples(store=None, products_csv: str = V2_PRODUCTS) -> List[Dict]:
+    """Posted texts from the state store's post log with their latest metrics."""
+    if store is None:
+        from state_store import StateStore
+        store = StateStore()
+    category = {r.get("title", "").strip(): r.get("category", "") for r in _read_csv(products_csv)}
+    out = []
+    for p in store.scored_posts():
+        hour = datetime.fromisoformat(p["ts"]).hour if p["ts"] else None
+        out.append({
+            "text": p["text"], "bot": p["bot"], "mode": p["mode"], "hour": hour,
+            "category": category.get((p["product_title"] or "").strip(), ""),
+            "y": float(np.log1p(reward(p["likes"], p["replies"], p["retweets"], p["quotes"]))),
+        })
+    return out
+
+def _design(ex: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The non-zero entries of X as (row, col, value) arrays."""
+    rows, cols, vals = [], [], []
+    for i, e in enumerate(ex):
+        idx = features(e["text"], e.get("bot", ""), e.get("mode", ""), e.get("category", ""), e.get("hour"))
+        col, count = np.unique(idx, return_counts=True)
+        rows.append(np.full(len(col), i))
+        cols.append(col)
+        vals.append(count / np.sqrt(max(len(idx), 1)))
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+def _gram(rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, n: int) -> np.ndarray:
+    """X Xᵀ, accumulated one feature column at a time."""
+    K = np.zeros((n, n))
+    order = np.argsort(cols, kind="stable")
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    cuts = np.flatnonzero(np.diff(cols)) + 1
+    for r, v in zip(np.split(rows, cuts), np.split(vals, cuts)):
+        K[np.ix_(r, r)] += np.outer(v, v)
+    return K
+
+def train(examples: Iterable[Dict], ridge: float = RIDGE) -> EngagementModel:
+    ex = list(examples)
+    if not ex:
+        return EngagementModel()
+    rows, cols, vals = _design(ex)
+    K = _gram(rows, cols, vals, len(ex))
+    y = np.array([e["y"] for e in ex])
+    bias = float(y.mean())
+    alpha = np.linalg.solve(K + ridge * np.eye(len(ex)), y - bias)   # dual ridge: n×n
+    w = np.zeros(DIM)
+    np.add.at(w, cols, vals * alpha[rows])                          # w = Xᵀα
+    fitted = K @ alpha + bias
+    return EngagementModel(w, bias, bias, float(y.std()) or 1.0,
+                           float(np.quantile(fitted, DUD_QUANTILE)), len(ex),
+                           dict(Counter(e.get("bot", "") for e in ex)))
+
+def evaluate(examples: List[Dict], holdout: float = 0.2, seed: int = 0) -> Dict[str, float]:
+    """Holdout MAE of the model vs. always predicting the training mean."""
+    ex = list(examples)
+    np.random.default_rng(seed).shuffle(ex)
+    cut = max(1, int(len(ex) * holdout))
+    test, fit = ex[:cut], ex[cut:]
+    model = train(fit)
+    y = np.array([e["y"] for e in test])
+    pred = np.array([model.predict(e["text"], bot=e.get("bot", ""), mode=e.get("mode", ""),
+                                   category=e.get("category", ""), hour=e.get("hour")) for e in test])
+    return {"n_train": len(fit), "n_test": len(test),
+            "mae": float(np.abs(pred - y).mean()), "baseline_mae": float(np.abs(model.bias - y).mean())}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Engagement model")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("train")
+    t.add_argument("--products", default=V2_PRODUCTS)
+    s = sub.add_parser("score")
+    s.add_argument("text")
+    s.add_argument("--bot", default="ProductBot V2")
+    s.add_argument("--mode", default="")
+    s.add_argument("--category", default="")
+    s.add_argument("--hour", type=int, default=None)
+    a = ap.parse_args()
+
+    if a.cmd == "train":
+        ex = load_examples(products_csv=a.products)
+        if len(ex) >= 10:
+            print("holdout:", {k: round(v, 3) if isinstance(v, float) else v for k, v in evaluate(ex).items()})
+        model = train(ex)
+        model.save()
+        print(f"trained on {len(ex)} posts {model.bots} (ready={model.ready}) → {ENGAGEMENT_MODEL}")
+    else:
+        model = EngagementModel.load()
+        meta = dict(bot=a.bot, mode=a.mode, category=a.category, hour=a.hour)
+        print(f"pred={model.predict(a.text, **meta):.3f} z={model.z(a.text, **meta):.2f} dud={model.is_dud(a.text, **meta)}")
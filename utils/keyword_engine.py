@@ -0,0 +1,82 @@
+"""Corpus-aware keyword extraction.
+
+Keeps running document frequencies over every text the bots ingest
+(titles, selftext, comments, news), persisted as one compact JSON file and
+updated incrementally. `keywords()` scores a post set by TF-IDF against those
+statistics, so words that are common everywhere stop dominating.
+"""
+import os
+import math
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from text_tokens import tokenize
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+KEYWORD_DF = os.getenv("KEYWORD_DF", os.path.join(ROOT, ".cache", "keyword_df.json"))
+
+MAX_TERMS = 60_000     # prune rarest terms beyond this
+MAX_SEEN  = 20_000     # remembered doc ids, so re-ingested posts are not double counted
+
+
+class KeywordEngine:
+    def __init__(self, path: str = KEYWORD_DF):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self.n_docs: int = data.get("n", 0)
+        self.df: Counter = Counter(data.get("df", {}))
+        self.seen: List[str] = data.get("seen", [])
+        self._seen_set = set(self.seen)
+
+    # ---------- STATS ----------
+    def observe(self, docs: Iterable[str], ids: Optional[Iterable[str]] = None) -> int:
+        """Add documents to the statistics; returns how many were new."""
+        ids = list(ids) if ids is not None else None
+        added = 0
+        for i, doc in enumerate(docs):
+            if ids is not None:
+                if ids[i] in self._seen_set:
+                    continue
+                self._seen_set.add(ids[i])
+                self.seen.append(ids[i])
+            terms = set(tokenize(doc))
+            if not terms:
+                continue
+            self.df.update(terms)
+            self.n_docs += 1
+            added += 1
+        return added
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + self.n_docs) / (1 + self.df.get(term, 0))) + 1.0
+
+    def save(self) -> None:
+        if len(self.df) > MAX_TERMS:
+            self.df = Counter(dict(self.df.most_common(MAX_TERMS)))
+        self.seen = self.seen[-MAX_SEEN:]
+        self._seen_set = set(self.seen)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"n": self.n_docs, "df": self.df, "seen": self.seen}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    # ---------- SCORING ----------
+    def keywords(self, docs: Iterable[str], k: int = 5) -> List[str]:
+        """Top-k TF-IDF terms of the post set treated as one document."""
+        tf = Counter()
+        for doc in docs:
+            tf.update(tokenize(doc, min_len=4))
+        return self.keywords_tf(tf, k)
+
+    def keywords_tf(self, tf: Dict[str, int], k: int = 5) -> List[str]:
+        """keywords() from precomputed term counts (e.g. cached per post)."""
+        scored = ((1 + math.log(c)) * self.idf(t) for t, c in tf.items())
+        ranked = sorted(zip(scored, tf), reverse=True)
+        return [t for _, t in ranked[:k]]
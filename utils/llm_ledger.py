@@ -0,0 +1,191 @@
+"""Token, cost and latency accounting for every OpenAI chat call.
+
+`tracked_chat` wraps `client.chat.completions.create`, appends one row per
+call to a CSV ledger, and the CLI turns the ledger into per-bot / per-mode
+reports:
+
+    python utils/llm_ledger.py report --days 7
+"""
+import os
+import re
+import csv
+import math
+import time
+import threading
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from deadline import current
+from circuit_breaker import guard
+
+try:  # exact counts when tiktoken is installed, a close estimate otherwise
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LEDGER_CSV = os.getenv("LLM_LEDGER_CSV", os.path.join(ROOT, ".cache", "llm_usage.csv"))
+LEDGER_COLUMNS = ["ts", "bot", "mode", "model", "prompt_tokens", "completion_tokens",
+                  "est_prompt_tokens", "latency_ms", "cost_usd", "status"]
+
+# USD per 1M tokens (input, output)
+PRICES = {
+    "gpt-4":         (30.00, 60.00),
+    "gpt-4o":        (2.50, 10.00),
+    "gpt-4o-mini":   (0.15, 0.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+
+_lock = threading.Lock()
+_WORDISH = re.compile(r"\w+|[^\w\s]")
+
+
+# ---------- TOKENS ----------
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text))
+    # BPE averages ~4 chars/token on English; long words split into several
+    return sum(max(1, math.ceil(len(w) / 4)) for w in _WORDISH.findall(text))
+
+def count_message_tokens(messages: List[Dict], model: str = "gpt-4") -> int:
+    # 3 tokens of framing per message plus 3 to prime the reply
+    return sum(3 + count_tokens(m.get("content") or "", model) for m in messages) + 3
+
+def trim_to_tokens(text: str, budget: int, model: str = "gpt-4") -> str:
+    """Longest prefix of `text` that fits in `budget` tokens, cut on a line
+    or word boundary where possible."""
+    if count_tokens(text, model) <= budget:
+        return text
+    enc = _encoding(model)
+    if enc is not None:
+        cut = enc.decode(enc.encode(text)[:budget])
+    else:
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(text[:mid], model) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        cut = text[:lo]
+    for sep in ("\n", " "):
+        i = cut.rfind(sep)
+        if i > len(cut) // 2:
+            return cut[:i].rstrip()
+    return cut
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    key = max((k for k in PRICES if model.startswith(k)), key=len, default=None)
+    if key is None:
+        return 0.0
+    pin, pout = PRICES[key]
+    return (prompt_tokens * pin + completion_tokens * pout) / 1_000_000
+
+
+# ---------- LEDGER ----------
+def record(row: Dict) -> None:
+    with _lock:
+        os.makedirs(os.path.dirname(LEDGER_CSV) or ".", exist_ok=True)
+        new = not os.path.exists(LEDGER_CSV)
+        with open(LEDGER_CSV, "a", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=LEDGER_COLUMNS)
+            if new:
+                w.writeheader()
+            w.writerow(row)
+
+def tracked_chat(client, *, bot: str, mode: str = "", **kwargs):
+    """Drop-in for client.chat.completions.create(**kwargs) that records
+    prompt/completion tokens, latency and cost to the ledger. The request
+    timeout is capped by what is left of the run deadline."""
+    kwargs.setdefault("timeout", current().timeout(OPENAI_TIMEOUT))
+    model = kwargs.get("model", "")
+    est = count_message_tokens(kwargs.get("messages", []), model)
+    t0 = time.perf_counter()
+    status, pt, ct = "ok", est, 0
+    try:
+        with guard("openai"):
+            res = client.chat.completions.create(**kwargs)
+        usage = getattr(res, "usage", None)
+        if usage is not None:
+            pt, ct = usage.prompt_tokens, usage.completion_tokens
+        return res
+    except Exception as e:
+        status = f"error:{type(e).__name__}"
+        raise
+    finally:
+        record({
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "bot": bot, "mode": mode, "model": model,
+            "prompt_tokens": pt, "completion_tokens": ct, "est_prompt_tokens": est,
+            "latency_ms": int((time.perf_counter() - t0) * 1000),
+            "cost_usd": f"{cost_usd(model, pt, ct):.6f}",
+            "status": status,
+        })
+
+
+# ---------- REPORTS ----------
+def _pct(xs: List[int], p: float) -> int:
+    if not xs:
+        return 0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+def load_rows(days: Optional[float] = None, path: str = LEDGER_CSV) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    since = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return [r for r in rows if since is None or datetime.fromisoformat(r["ts"]) >= since]
+
+def summarize(rows: List[Dict], by=("bot", "mode")) -> List[Dict]:
+    groups = defaultdict(list)
+    for r in rows:
+        groups[tuple(r[k] for k in by)].append(r)
+    out = []
+    for key, rs in sorted(groups.items()):
+        lat = [int(r["latency_ms"]) for r in rs]
+        out.append({
+            **dict(zip(by, key)),
+            "calls": len(rs),
+            "errors": sum(1 for r in rs if r["status"] != "ok"),
+            "prompt_tokens": sum(int(r["prompt_tokens"]) for r in rs),
+            "completion_tokens": sum(int(r["completion_tokens"]) for r in rs),
+            "cost_usd": round(sum(float(r["cost_usd"]) for r in rs), 6),
+            "p50_ms": _pct(lat, 0.5),
+            "p95_ms": _pct(lat, 0.95),
+        })
+    return out
+
+def print_table(rows: List[Dict]) -> None:
+    if not rows:
+        print("(no calls recorded)")
+        return
+    cols = list(rows[0])
+    widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in cols]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(cols, widths)))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="LLM usage report")
+    ap.add_argument("cmd", choices=["report"])
+    ap.add_argument("--days", type=float, default=1, help="1 = daily, 7 = weekly")
+    ap.add_argument("--by", default="bot,mode", help="comma-separated: bot,mode,model")
+    a = ap.parse_args()
+    rows = load_rows(a.days)
+    print(f"LLM usage — last {a.days:g} day(s), {len(rows)} call(s)")
+    print_table(summarize(rows, by=tuple(a.by.split(","))))
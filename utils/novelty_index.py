@@ -0,0 +1,131 @@
+"""Persistent near-duplicate index over everything the account has posted.
+
+MinHash signatures over word shingles, bucketed with LSH bands in SQLite so a
+lookup is a handful of indexed queries regardless of how many tweets are
+stored. Candidates from the buckets are confirmed with exact Jaccard.
+"""
+import os
+import re
+import csv
+import sys
+import json
+import time
+import sqlite3
+import zlib
+import random
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+NOVELTY_DB = os.getenv("NOVELTY_DB", os.path.join(ROOT, ".cache", "novelty.db"))
+NOVELTY_MAX_SIM = float(os.getenv("NOVELTY_MAX_SIM", "0.6"))   # reject drafts above this
+NOVELTY_RETRIES = int(os.getenv("NOVELTY_RETRIES", "2"))
+
+NUM_PERM = 64
+BANDS    = 16
+ROWS     = NUM_PERM // BANDS     # ~0.5 Jaccard threshold for becoming a candidate
+SHINGLE  = 3
+_PRIME   = (1 << 61) - 1
+_MASK    = (1 << 32) - 1
+
+_rng = random.Random(0x5EED)     # fixed seed: signatures must be stable across runs
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str) -> set:
+    words = re.findall(r"[a-z0-9']+", re.sub(r"https?://\S+|#\w+", " ", text.lower()))
+    if len(words) < SHINGLE:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + SHINGLE]).encode())
+            for i in range(len(words) - SHINGLE + 1)}
+
+def minhash(sh: Iterable[int]) -> List[int]:
+    sh = list(sh)
+    if not sh:
+        return [_MASK] * NUM_PERM
+    return [min(((a * h + b) % _PRIME) & _MASK for h in sh) for a, b in _PERMS]
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _band_keys(sig: List[int]) -> List[int]:
+    return [zlib.crc32(array("I", sig[i * ROWS:(i + 1) * ROWS]).tobytes()) for i in range(BANDS)]
+
+
+class NoveltyIndex:
+    def __init__(self, path: str = NOVELTY_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS posts (
+                id INTEGER PRIMARY KEY, ts REAL, bot TEXT, tweet_id TEXT, text TEXT);
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER, key INTEGER, post_id INTEGER);
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands(band, key);
+        """)
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def add(self, text: str, bot: str = "", tweet_id: Optional[str] = None,
+            ts: Optional[float] = None) -> None:
+        """Index one posted tweet (incremental, one transaction)."""
+        sig = minhash(shingles(text))
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO posts (ts, bot, tweet_id, text) VALUES (?,?,?,?)",
+                (ts or time.time(), bot, tweet_id or "", text))
+            self.db.executemany(
+                "INSERT INTO bands (band, key, post_id) VALUES (?,?,?)",
+                [(i, k, cur.lastrowid) for i, k in enumerate(_band_keys(sig))])
+
+    def nearest(self, text: str, k: int = 3) -> List[Tuple[float, str]]:
+        """Top-k (jaccard, text) among LSH candidates for `text`."""
+        sh = shingles(text)
+        keys = _band_keys(minhash(sh))
+        q = " UNION ".join(["SELECT post_id FROM bands WHERE band=? AND key=?"] * BANDS)
+        params = [x for i, key in enumerate(keys) for x in (i, key)]
+        ids = [r[0] for r in self.db.execute(q, params)]
+        if not ids:
+            return []
+        rows = self.db.execute(
+            f"SELECT text FROM posts WHERE id IN ({','.join('?' * len(ids))})", ids)
+        hits = sorted(((jaccard(sh, shingles(t)), t) for (t,) in rows), reverse=True)
+        return hits[:k]
+
+    def max_similarity(self, text: str) -> float:
+        hits = self.nearest(text, k=1)
+        return hits[0][0] if hits else 0.0
+
+    def is_novel(self, text: str, max_sim: float = NOVELTY_MAX_SIM) -> bool:
+        return self.max_similarity(text) <= max_sim
+
+
+# ---------- BOOTSTRAP ----------
+def import_csv(index: NoveltyIndex, path: str, text_col: str, bot: str) -> int:
+    """Backfill from an existing tweet log (e.g. productbot/logs/tweet_logs.csv)."""
+    n = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            if (r.get("status") or "").startswith("success") and r.get(text_col):
+                index.add(r[text_col], bot=bot)
+                n += 1
+    return n
+
+def import_json(index: NoveltyIndex, path: str, bot: str) -> int:
+    """Backfill from a [{"text":..., "ts":...}] recent-posts file."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for d in data:
+        index.add(d["text"], bot=bot, ts=d.get("ts"))
+    return len(data)
+
+if __name__ == "__main__":
+    # python utils/novelty_index.py csv <path> <text_col> <bot>
+    # python utils/novelty_index.py json <path> <bot>
+    idx = NoveltyIndex()
+    kind, args = sys.argv[1], sys.argv[2:]
+    n = import_csv(idx, *args) if kind == "csv" else import_json(idx, *args)
+    print(f"Imported {n} posts; index now holds {len(idx)}.")
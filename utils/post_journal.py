@@ -0,0 +1,88 @@
+"""Write-ahead journal for one in-flight post per bot.
+
+Each step (generated, t1_posted, media_uploaded, t2_posted, logged, ...) is
+recorded with its outputs before the next one starts, using an fsync'd
+atomic replace. A rerun after a crash picks up the pending entry and skips
+every step already done, so it never regenerates a draft or posts twice.
+"""
+import os
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", os.path.join(ROOT, ".cache", "journal"))
+JOURNAL_MAX_AGE = 24 * 60 * 60     # older pending entries are abandoned, not resumed
+JOURNAL_MAX_ATTEMPTS = 3
+
+
+class PostJournal:
+    def __init__(self, bot: str, directory: str = JOURNAL_DIR):
+        self.bot = bot
+        self.path = os.path.join(directory, f"{bot}.json")
+        self.entry: Optional[Dict[str, Any]] = None
+
+    # ---------- IO ----------
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entry, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    # ---------- API ----------
+    def pending(self) -> Optional[Dict[str, Any]]:
+        """The unfinished entry to resume, if any; counts this as an attempt."""
+        e = self._read()
+        if not e or e.get("status") != "pending":
+            return None
+        if time.time() - e["created"] > JOURNAL_MAX_AGE or e["attempts"] >= JOURNAL_MAX_ATTEMPTS:
+            self.entry = e
+            self.finish("abandoned")
+            print(f"[journal] abandoned {self.bot} entry {e['id']} after {e['attempts']} attempt(s): steps={list(e['steps'])}")
+            return None
+        e["attempts"] += 1
+        self.entry = e
+        self._write()
+        return e
+
+    def begin(self, **data) -> Dict[str, Any]:
+        self.entry = {"id": uuid.uuid4().hex[:12], "bot": self.bot, "created": time.time(),
+                      "status": "pending", "attempts": 1, "steps": {}, "data": data}
+        self._write()
+        return self.entry
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self.entry["data"]
+
+    def done(self, step: str) -> bool:
+        return bool(self.entry) and step in self.entry["steps"]
+
+    def mark(self, step: str, **data) -> None:
+        """Record that `step` completed, together with whatever it produced."""
+        self.entry["steps"][step] = time.time()
+        self.entry["data"].update(data)
+        self._write()
+
+    def step(self, name: str, fn, *args, **kwargs):
+        """Run fn once; if `name` already completed, return its recorded result."""
+        if self.done(name):
+            return self.entry["data"][name]
+        result = fn(*args, **kwargs)
+        self.mark(name, **{name: result})
+        return result
+
+    def finish(self, status: str = "done") -> None:
+        self.entry["status"] = status
+        self._write()
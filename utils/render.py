@@ -0,0 +1,206 @@
+"""Render one structured generation into every post format the bots use.
+
+The LLM is asked once for the parts of a post (hook, claims, benefits, CTA,
+hashtags). Local templates then assemble those parts into ProductBot's single
+tweet, ProductBot V2's two-tweet thread and TrendParasite's tweet + CTA +
+hashtag. The same generation can be rendered for several accounts, each with
+its own format, template and affiliate tracking ID (via the `link_for(mode)`
+callback, normally `build_aff_link`).
+
+Lengths are X's weighted lengths, not len(): any URL counts 23, a complete
+emoji sequence counts 2, CJK and other characters outside the Latin/punctuation
+ranges count 2. A draft that is too long first loses optional parts (extra
+claims, benefits, hashtags), and only then is its lead text cut at a word.
+
+Accounts come from RENDER_ACCOUNTS, e.g.
+    {"ProductBot": {"format": "single", "mode": "single", "hashtags": 1}}
+Cross-account variants are opt-in: with RENDER_ACCOUNTS unset or empty,
+nothing is queued for other accounts. Set it in the environment of the job
+that runs product_bot_v2.py to turn variants on.
+
+    python utils/render.py '{"hook": "...", "benefits": ["..."], "cta": "..."}' --link https://amzn.to/x
+"""
+import os
+import re
+import json
+import zlib
+import argparse
+import unicodedata
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+TWEET_MAX  = 280
+URL_WEIGHT = 23
+ELLIPSIS   = "…"
+RENDER_ACCOUNTS = json.loads(os.getenv("RENDER_ACCOUNTS") or "{}")   # unset repo variable → ""
+
+# twitter-text v3: these code point ranges weigh 1, everything else 2
+_LIGHT = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+_URL_RE = re.compile(r"https?://\S+")
+_PICTO = r"\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF"
+_MOD   = r"[\uFE0E\uFE0F]?[\U0001F3FB-\U0001F3FF]?"
+_EMOJI_RE = re.compile(
+    r"[0-9#*]\uFE0F?\u20E3"                         # keycaps
+    r"|[\U0001F1E6-\U0001F1FF]{2}"                  # flags
+    rf"|[{_PICTO}]{_MOD}[\U000E0020-\U000E007F]*"   # emoji (+ tag sequence)
+    rf"(?:\u200D[{_PICTO}]{_MOD})*"                 # ZWJ sequences
+)
+_TOKEN_RE = re.compile(f"(?P<url>{_URL_RE.pattern})|(?P<emoji>{_EMOJI_RE.pattern})")
+
+
+def _char_weight(ch: str) -> int:
+    cp = ord(ch)
+    return 1 if any(lo <= cp <= hi for lo, hi in _LIGHT) else 2
+
+def weighted_length(text: str) -> int:
+    """Length as X counts it against the 280 limit."""
+    text = unicodedata.normalize("NFC", text)
+    n, pos = 0, 0
+    for m in _TOKEN_RE.finditer(text):
+        n += sum(_char_weight(c) for c in text[pos:m.start()])
+        n += URL_WEIGHT if m.group("url") else 2
+        pos = m.end()
+    return n + sum(_char_weight(c) for c in text[pos:])
+
+def truncate(text: str, limit: int) -> str:
+    """Cut `text` to at most `limit` weighted chars, at a word boundary, with an ellipsis."""
+    if weighted_length(text) <= limit:
+        return text
+    budget = limit - weighted_length(ELLIPSIS)
+    words, out = text.split(" "), ""
+    for w in words:
+        cand = f"{out} {w}" if out else w
+        if weighted_length(cand) > budget:
+            break
+        out = cand
+    if not out:                                    # one long word: cut by character
+        for ch in text:
+            if weighted_length(out + ch) > budget:
+                break
+            out += ch
+    return out.rstrip(" ,;:.-—") + ELLIPSIS
+
+
+# ---------- GENERATION ----------
+@dataclass
+class Generation:
+    hook: str
+    claims: List[str] = field(default_factory=list)
+    benefits: List[str] = field(default_factory=list)
+    cta: str = ""
+    hashtags: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Generation":
+        """Parse the LLM's JSON answer; raises ValueError when it is unusable."""
+        try:
+            j = json.loads(raw)
+            hook = str(j["hook"]).strip()
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"bad generation JSON: {e} | RAW: {raw[:220]}")
+        if not hook:
+            raise ValueError("generation has no hook")
+        items = lambda k: [str(x).strip() for x in j.get(k) or [] if str(x).strip()]
+        return cls(hook=hook, claims=items("claims"), benefits=items("benefits"),
+                   cta=str(j.get("cta") or "").strip(),
+                   hashtags=[t.lstrip("#") for t in items("hashtags")])
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+# ---------- FORMATS ----------
+@dataclass
+class Format:
+    templates: List[List[str]]          # alternatives; each is one template per tweet
+    limits: Tuple[int, ...]             # weighted limit per tweet
+    shrink: Tuple[str, ...]             # list parts dropped (last item first) when too long
+    hashtags: int = 2
+
+FORMATS: Dict[str, Format] = {
+    # ProductBot: one tweet with link
+    "single": Format([["{hook} {cta}\n{link}\n\n{tags}"],
+                      ["{hook} {claims}\n\n{cta} {link}\n{tags}"]],
+                     limits=(TWEET_MAX,), shrink=("claims", "tags")),
+    # ProductBot V2: link-free opener, then a reply with benefits + link
+    "thread": Format([["{hook}", "{benefits}. {cta}\n{link}\n\n{tags}"],
+                      ["{hook} {claims}", "{benefits}. {cta}\n{link}\n\n{tags}"]],
+                     limits=(190, TWEET_MAX), shrink=("claims", "benefits", "tags")),
+    # TrendParasite: take, CTA + one hashtag, optional tie-in link
+    "trend": Format([["{hook}\n\n{cta} {tags}\n{link}"]],
+                    limits=(TWEET_MAX,), shrink=("tags",), hashtags=1),
+}
+
+def _sentence(s: str) -> str:
+    return s if not s or s[-1] in ".!?…:" else s + "."
+
+def _fill(template: str, parts: Dict[str, List[str]], text: Dict[str, str]) -> str:
+    benefits = ", ".join(b.rstrip(".") for b in parts["benefits"])
+    slots = dict(text,
+                 hook=_sentence(text["hook"]) if parts["claims"] and "{claims}" in template else text["hook"],
+                 claims=" ".join(_sentence(c) for c in parts["claims"]),
+                 benefits=benefits[:1].upper() + benefits[1:],
+                 tags=" ".join(f"#{t}" for t in parts["tags"]))
+    out = template.format(**slots)
+    out = re.sub(r"^[ .,]+|(?<=\n)[ .,]+", "", out)          # parts left empty by shrinking
+    out = re.sub(r"[ \t]+\n", "\n", re.sub(r"[ \t]{2,}", " ", out))
+    return re.sub(r"\n{3,}", "\n\n", out).strip()
+
+def _render_one(template: str, limit: int, gen: Generation, link: str,
+                shrink: Tuple[str, ...], hashtags: int) -> str:
+    parts = {"claims": list(gen.claims[:2]), "benefits": list(gen.benefits[:2]),
+             "tags": list(gen.hashtags[:hashtags])}
+    text = {"hook": gen.hook, "cta": gen.cta, "link": link}
+    out = _fill(template, parts, text)
+    for name in shrink:
+        while weighted_length(out) > limit and parts[name] and f"{{{name}}}" in template:
+            parts[name].pop()
+            out = _fill(template, parts, text)
+    over = weighted_length(out) - limit
+    if over > 0:                                   # cut the lead text, never the link
+        lead = "hook" if "{hook}" in template else "cta"
+        text[lead] = truncate(text[lead], max(1, weighted_length(text[lead]) - over))
+        out = _fill(template, parts, text)
+        if weighted_length(out) > limit:
+            out = truncate(out, limit)
+    return out
+
+def render(gen: Generation, fmt: str, link: str = "", template: int = 0,
+           hashtags: Optional[int] = None) -> List[str]:
+    """The tweets of `fmt` for `gen` (one per tweet), each within its limit."""
+    f = FORMATS[fmt]
+    tpl = f.templates[template % len(f.templates)]
+    n_tags = f.hashtags if hashtags is None else hashtags
+    return [_render_one(t, lim, gen, link, f.shrink, n_tags) for t, lim in zip(tpl, f.limits)]
+
+
+# ---------- ACCOUNT VARIANTS ----------
+def render_variants(gen: Generation, link_for: Callable[[str], str],
+                    accounts: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+    """{account: {"format", "mode", "link", "tweets"}} for every configured account.
+
+    Each account has a "format", a "mode" whose tracking ID goes into the link,
+    and optionally "template" (default: stable per account, so two accounts on
+    one format don't post the same arrangement) and "hashtags"."""
+    out = {}
+    for name, acc in (RENDER_ACCOUNTS if accounts is None else accounts).items():
+        fmt = acc.get("format", "single")
+        mode = acc.get("mode", fmt)
+        link = link_for(mode)
+        template = acc.get("template", zlib.crc32(name.encode()))
+        out[name] = {"format": fmt, "mode": mode, "link": link,
+                     "tweets": render(gen, fmt, link, template, acc.get("hashtags"))}
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Render a generation into every format")
+    ap.add_argument("generation", help="JSON with hook/claims/benefits/cta/hashtags")
+    ap.add_argument("--link", default="https://www.amazon.com/dp/B000000000/?tag=example-20")
+    a = ap.parse_args()
+    g = Generation.from_json(a.generation)
+    for fmt, f in FORMATS.items():
+        for i in range(len(f.templates)):
+            print(f"── {fmt} / template {i}")
+            for t in render(g, fmt, a.link, i):
+                print(f"[{weighted_length(t)}] {t}\n")
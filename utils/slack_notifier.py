@@ -1,7 +1,57 @@
 import os
+import json
 import requests
 from datetime import datetime
 
+from deadline import current
+import circuit_breaker
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SLACK_OUTBOX = os.getenv("SLACK_OUTBOX", os.path.join(ROOT, ".cache", "slack_outbox.jsonl"))
+SLACK_TIMEOUT = 10
+SLACK_MIN_LEFT = 5      # fewer seconds than this left in the run → defer instead of sending
+
+def _defer(payload, reason):
+    """Park a payload in the outbox; the next successful notify sends it."""
+    os.makedirs(os.path.dirname(SLACK_OUTBOX), exist_ok=True)
+    with open(SLACK_OUTBOX, "a", encoding="utf-8") as f:
+        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    current().fallback("slack", f"deferred ({reason})")
+
+def _flush_outbox(webhook_url):
+    """Resend parked payloads in order; whatever is not sent stays parked."""
+    if not os.path.exists(SLACK_OUTBOX):
+        return
+    pending = []
+    with open(SLACK_OUTBOX, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                pending.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue                # blank or torn line from an interrupted append
+    sent = 0
+    for payload in pending:
+        deadline = current()
+        if deadline.remaining() < SLACK_MIN_LEFT:
+            break
+        try:
+            r = requests.post(webhook_url, json=payload, timeout=deadline.timeout(SLACK_TIMEOUT, posting=True))
+        except requests.RequestException:
+            break
+        if r.status_code != 200:
+            break
+        sent += 1
+    # the file is only rewritten once the sends are done, so a crash can resend but never lose
+    if sent == len(pending):
+        os.remove(SLACK_OUTBOX)
+    else:
+        tmp = SLACK_OUTBOX + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(p, ensure_ascii=False) + "\n" for p in pending[sent:])
+        os.replace(tmp, SLACK_OUTBOX)
+    if sent:
+        print(f"📬 Sent {sent} deferred Slack message(s), {len(pending) - sent} still parked.")
+
 def notify_slack(
     bot_name,
     status,
@@ -52,14 +102,38 @@ def notify_slack(
             "short": False
         })
 
+    deadline = current()
+    if deadline.fallbacks:
+        fields.append({
+            "title": "⏱️ Fallbacks",
+            "value": deadline.summary(),
+            "short": False
+        })
+
+    breakers = circuit_breaker.summary()
+    if breakers:
+        fields.append({
+            "title": "🔌 Dependencies",
+            "value": breakers,
+            "short": False
+        })
+
     payload = { "attachments": [ { "fallback": f"{bot_name} update: {status}", "color": color, "fields": fields } ] }
 
+    webhook_url = os.getenv("SLACK_WEBHOOK_URL")
+    if not webhook_url:
+        print("❌ Slack notification failed: SLACK_WEBHOOK_URL not set")
+        return
+    if deadline.remaining() < SLACK_MIN_LEFT:
+        _defer(payload, "run deadline")
+        return
     try:
-        webhook_url = os.environ["SLACK_WEBHOOK_URL"]
-        response = requests.post(webhook_url, json=payload)
+        response = requests.post(webhook_url, json=payload, timeout=deadline.timeout(SLACK_TIMEOUT, posting=True))
         if response.status_code != 200:
             print(f"⚠️ Slack returned {response.status_code}: {response.text}")
         else:
             print("✅ Slack notified.")
-    except Exception as e:
+            _flush_outbox(webhook_url)
+    except requests.RequestException as e:
         print("❌ Slack notification failed:", e)
+        _defer(payload, type(e).__name__)
@@ -0,0 +1,244 @@
+"""Transactional state shared by the posting and harvesting jobs.
+
+One SQLite database in WAL mode, with typed tables for bandit arms, used
+products, post records, metrics and an outbox of rendered posts that one
+bot's generation leaves for other accounts. Readers never block writers. Every
+read-modify-write runs inside BEGIN IMMEDIATE, so overlapping jobs serialise
+on the write lock (waiting up to BUSY_TIMEOUT) instead of overwriting each
+other's JSON. Bandit rewards are atomic increments, and claiming an unused
+product is a single transaction.
+
+That locking only covers processes that share the database file. In CI
+each job restores its own copy from actions/cache (key prefix `state-db-`)
+and saves a new snapshot when it ends. The product workflows therefore
+share the `product-state` concurrency group, so they run one at a time and
+each run starts from the snapshot the previous one saved.
+
+On first open, the existing files are imported once: bandit.json,
+used_set.json, tweet_logs.csv and metrics.csv from Product Bot V2, and
+used_products.txt from productbot.
+
+    python utils/state_store.py            # table sizes + bandit
+    python utils/state_store.py migrate    # import legacy files not yet imported
+"""
+import os
+import csv
+import json
+import random
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STATE_DB = os.getenv("STATE_DB", os.path.join(ROOT, ".cache", "state.db"))
+BUSY_TIMEOUT   = 30                  # seconds to wait for another job's write lock
+MIN_WEIGHT     = 0.2                 # bandit floor, keeps exploration alive
+OUTBOX_MAX_AGE = 2 * 24 * 60 * 60    # queued posts older than this are stale
+OUTBOX_LEASE   = 60 * 60             # a take neither acked nor released comes back after this
+
+V2_DIR = os.path.join(ROOT, "Product Bot V2")
+PRODUCTBOT_DIR = os.path.join(ROOT, "productbot")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS bandit (
+    bot TEXT, arm TEXT, n INTEGER NOT NULL DEFAULT 0, r REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (bot, arm));
+CREATE TABLE IF NOT EXISTS used (bot TEXT, key TEXT, ts REAL, PRIMARY KEY (bot, key));
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY, ts TEXT, bot TEXT, mode TEXT, product_title TEXT, asin TEXT,
+    tweet_id TEXT, tweet_id_2 TEXT, link TEXT, status TEXT, text TEXT);
+CREATE UNIQUE INDEX IF NOT EXISTS posts_tweet ON posts(tweet_id) WHERE tweet_id != '';
+CREATE TABLE IF NOT EXISTS metrics (
+    ts TEXT, tweet_id TEXT, likes INTEGER, replies INTEGER, retweets INTEGER, quotes INTEGER,
+    PRIMARY KEY (tweet_id, ts));
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY, account TEXT, ts REAL, payload TEXT, taken REAL, posted REAL);
+"""
+
+
+def weight(n: int, r: float) -> float:
+    return max(MIN_WEIGHT, r / n) if n else 1.0
+
+
+class StateStore:
+    def __init__(self, path: str = STATE_DB, migrate: bool = True):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        if migrate:
+            self.migrate()
+
+    def close(self) -> None:
+        self.db.close()
+
+    @contextmanager
+    def tx(self):
+        """Write transaction; takes the database write lock up front."""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    # ---------- BANDIT ----------
+    def bandit(self, bot: str, arms: Iterable[str] = ()) -> Dict[str, Dict[str, float]]:
+        """{arm: {"w", "n", "r"}}; missing `arms` are created at weight 1.0."""
+        arms = list(arms)
+        if arms:
+            with self.tx() as db:
+                db.executemany("INSERT OR IGNORE INTO bandit (bot, arm) VALUES (?, ?)", [(bot, a) for a in arms])
+        return {arm: {"w": weight(n, r), "n": n, "r": r}
+                for arm, n, r in self.db.execute("SELECT arm, n, r FROM bandit WHERE bot=?", (bot,))}
+
+    def reward(self, bot: str, arm: str, reward: float, pulls: int = 1) -> None:
+        """Atomic n += pulls, r += reward."""
+        with self.tx() as db:
+            db.execute("INSERT INTO bandit (bot, arm, n, r) VALUES (?, ?, ?, ?) "
+                       "ON CONFLICT(bot, arm) DO UPDATE SET n = n + excluded.n, r = r + excluded.r",
+                       (bot, arm, pulls, reward))
+
+    # ---------- USED SET ----------
+    def used(self, bot: str) -> set:
+        return {k for (k,) in self.db.execute("SELECT key FROM used WHERE bot=?", (bot,))}
+
+    def claim(self, bot: str, keys: Sequence[str], choose: Callable[[List[str]], str] = random.choice,
+              reset_when_empty: bool = False) -> Optional[str]:
+        """Pick an unused key and mark it used in one transaction, so two
+        concurrent jobs never get the same one. With `reset_when_empty` a
+        fully used list starts over; otherwise None is returned."""
+        with self.tx() as db:
+            used = {k for (k,) in db.execute("SELECT key FROM used WHERE bot=?", (bot,))}
+            avail = [k for k in keys if k not in used]
+            if not avail:
+                if not reset_when_empty or not keys:
+                    return None
+                db.execute("DELETE FROM used WHERE bot=?", (bot,))
+                avail = list(keys)
+            key = choose(avail)
+            db.execute("INSERT OR REPLACE INTO used (bot, key, ts) VALUES (?, ?, ?)", (bot, key, time.time()))
+            return key
+
+    # ---------- POSTS / METRICS ----------
+    def log_post(self, bot: str, **fields) -> None:
+        cols = ["ts", "mode", "product_title", "asin", "tweet_id", "tweet_id_2", "link", "status", "text"]
+        row = [fields.get(c) or "" for c in cols]
+        with self.tx() as db:
+            db.execute(f"INSERT OR IGNORE INTO posts (bot, {', '.join(cols)}) VALUES (?{', ?' * len(cols)})",
+                       [bot] + row)
+
+    def recent_posts(self, bot: str, limit: int = 40) -> List[Dict]:
+        cur = self.db.execute("SELECT * FROM posts WHERE bot=? ORDER BY id DESC LIMIT ?", (bot, limit))
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur][::-1]
+
+    def scored_posts(self) -> List[Dict]:
+        """Posts with a logged text, each joined to its latest metrics harvest."""
+        cur = self.db.execute(
+            "SELECT p.bot, p.ts, p.mode, p.product_title, p.text, m.likes, m.replies, m.retweets, m.quotes "
+            "FROM posts p JOIN metrics m ON m.tweet_id = p.tweet_id "
+            "WHERE p.text != '' AND m.ts = (SELECT MAX(ts) FROM metrics WHERE tweet_id = p.tweet_id) "
+            "ORDER BY p.id")
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur]
+
+    def add_metrics(self, rows: Iterable[Sequence]) -> int:
+        """(ts, tweet_id, likes, replies, retweets, quotes) rows; duplicates ignored."""
+        with self.tx() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO metrics VALUES (?, ?, ?, ?, ?, ?)",
+                           [tuple(r) for r in rows])
+            return db.total_changes - before
+
+    # ---------- OUTBOX ----------
+    def queue(self, account: str, payload: Dict) -> None:
+        """Leave a rendered post for another account's job to publish."""
+        with self.tx() as db:
+            db.execute("INSERT INTO outbox (account, ts, payload) VALUES (?, ?, ?)",
+                       (account, time.time(), json.dumps(payload, ensure_ascii=False)))
+
+    def take(self, account: str, max_age: float = OUTBOX_MAX_AGE) -> Optional[Dict]:
+        """Lease the oldest fresh queued post for `account` (so no other job
+        gets it) and return its payload plus "outbox_id"; None when there is
+        none. Call `ack()` once it is posted or discarded, or `release()` when
+        posting failed; a lease that gets neither expires after OUTBOX_LEASE."""
+        now = time.time()
+        with self.tx() as db:
+            row = db.execute("SELECT id, payload FROM outbox WHERE account=? AND posted IS NULL "
+                             "AND (taken IS NULL OR taken<?) AND ts>=? ORDER BY id LIMIT 1",
+                             (account, now - OUTBOX_LEASE, now - max_age)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE outbox SET taken=? WHERE id=?", (now, row[0]))
+            return dict(json.loads(row[1]), outbox_id=row[0])
+
+    def ack(self, outbox_id: int) -> None:
+        """The taken post is done with (posted, or deliberately dropped)."""
+        with self.tx() as db:
+            db.execute("UPDATE outbox SET posted=? WHERE id=?", (time.time(), outbox_id))
+
+    def release(self, outbox_id: int) -> None:
+        """Posting failed: put the taken post back for the next job."""
+        with self.tx() as db:
+            db.execute("UPDATE outbox SET taken=NULL WHERE id=? AND posted IS NULL", (outbox_id,))
+
+    # ---------- MIGRATION ----------
+    def _once(self, db, key: str) -> bool:
+        """True the first time `key` is seen (inside the caller's tx)."""
+        return db.execute("INSERT OR IGNORE INTO meta VALUES (?, ?)", (key, str(time.time()))).rowcount == 1
+
+    def migrate(self, v2_dir: str = V2_DIR, productbot_dir: str = PRODUCTBOT_DIR) -> None:
+        """Import the legacy JSON/CSV/TXT state once per source file."""
+        with self.tx() as db:
+            path = os.path.join(v2_dir, "state", "bandit.json")
+            if os.path.exists(path) and self._once(db, "migrated:v2_bandit"):
+                for arm, st in _load_json(path, {}).items():
+                    db.execute("INSERT OR REPLACE INTO bandit VALUES ('ProductBot V2', ?, ?, ?)",
+                               (arm, int(st.get("n", 0)), float(st.get("r", 0.0))))
+            path = os.path.join(v2_dir, "state", "used_set.json")
+            if os.path.exists(path) and self._once(db, "migrated:v2_used"):
+                db.executemany("INSERT OR IGNORE INTO used VALUES ('ProductBot V2', ?, ?)",
+                               [(k, time.time()) for k in _load_json(path, [])])
+            path = os.path.join(productbot_dir, "used_products.txt")
+            if os.path.exists(path) and self._once(db, "migrated:productbot_used"):
+                with open(path, "r", encoding="utf-8") as f:
+                    keys = {" ".join(ln.strip().lower().split()) for ln in f if ln.strip()}
+                db.executemany("INSERT OR IGNORE INTO used VALUES ('ProductBot', ?, ?)",
+                               [(k, time.time()) for k in keys])
+            path = os.path.join(v2_dir, "logs", "tweet_logs.csv")
+            if os.path.exists(path) and self._once(db, "migrated:v2_posts"):
+                for r in _read_csv(path):
+                    db.execute("INSERT OR IGNORE INTO posts (bot, ts, mode, product_title, asin, tweet_id, "
+                               "tweet_id_2, link, status, text) VALUES ('ProductBot V2', ?, ?, ?, ?, ?, ?, ?, ?, '')",
+                               (r["ts"], r["mode"], r["product_title"], r["asin"], r["tweet_id_1"],
+                                r["tweet_id_2"], r["link"], r["status"]))
+            path = os.path.join(v2_dir, "logs", "metrics.csv")
+            if os.path.exists(path) and self._once(db, "migrated:v2_metrics"):
+                db.executemany("INSERT OR IGNORE INTO metrics VALUES (?, ?, ?, ?, ?, ?)",
+                               [(r["ts"], r["tweet_id"], r["likes"], r["replies"], r["retweets"], r["quotes"])
+                                for r in _read_csv(path)])
+
+
+def _load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return default
+
+def _read_csv(path: str) -> List[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+if __name__ == "__main__":
+    store = StateStore(migrate=sys.argv[1:2] == ["migrate"])
+    for table in ("bandit", "used", "posts", "metrics", "outbox"):
+        print(f"{table:8} {store.db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]}")
+    for bot, arm, n, r in store.db.execute("SELECT bot, arm, n, r FROM bandit ORDER BY bot, arm"):
+        print(f"  {bot:14} {arm:12} n={n:<4} r={r:<8.1f} w={weight(n, r):.2f}")
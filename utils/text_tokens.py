@@ -0,0 +1,27 @@
+import re
+from typing import List
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been
+before being below between both but by can can't cannot could couldn't did didn't do does
+doesn't doing don't down during each even ever every few for from further get gets got had
+hadn't has hasn't have haven't having he he'd he'll he's her here here's hers herself him
+himself his how how's i i'd i'll i'm i've if in into is isn't it it's its itself just let's
+like make many me more most much mustn't my myself new no nor not now of off on once one only
+or other ought our ours ourselves out over own really right said same say says see shan't she
+she'd she'll she's should shouldn't so some still such than that that's the their theirs them
+themselves then there there's these they they'd they'll they're they've thing things think
+this those though through to too two under until up upon us very via was wasn't way we we'd
+we'll we're we've well were weren't what what's when when's where where's which while who
+who's whom why why's will with won't would wouldn't yeah yes yet you you'd you'll you're
+you've your yours yourself yourselves
+""".split())
+
+_WORD = re.compile(r"[a-z][a-z0-9']+")
+
+
+def tokenize(text: str, min_len: int = 3) -> List[str]:
+    """Lower-cased word tokens with stopwords, URLs and short words removed."""
+    text = re.sub(r"https?://\S+", " ", text.lower())
+    return [w.strip("'") for w in _WORD.findall(text)
+            if len(w) >= min_len and w not in STOPWORDS]